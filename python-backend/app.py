@@ -1,32 +1,67 @@
 from flask import Flask, request, jsonify
+import click
 from flask_cors import CORS
-from flask_sqlalchemy import SQLAlchemy
-from flask_marshmallow import Marshmallow
 from datetime import datetime, date
 import os
+import secrets
 
 # Initialize Flask app
 app = Flask(__name__)
 
 # Configure SQLite database
 basedir = os.path.abspath(os.path.dirname(__file__))
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(basedir, 'fwfps.db')
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get(
+    'DATABASE_URL', 'sqlite:///' + os.path.join(basedir, 'fwfps.db'))
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SECRET_KEY'] = 'fwfps-demo-secret-key'
+# Signs the bearer tokens and the session cookie, so it only ever comes from
+# the environment. Debug runs without one sign with a random key for the
+# process; anything else issues and accepts no tokens until it is set
+app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY') or (secrets.token_hex(32) if app.debug else None)
+# Connection PRAGMAs (production, durable or off) and pool size; see utils/sqlite_profile.py
+app.config['SQLITE_PROFILE'] = os.environ.get('SQLITE_PROFILE', 'production')
+app.config['SQLITE_POOL_SIZE'] = int(os.environ.get('SQLITE_POOL_SIZE', 10))
+# GET requests of the API blueprints read through a pool of read-only
+# connections (SQLITE_POOL_SIZE of them) and writes share one writer connection
+app.config['SQLITE_READ_ROUTING'] = os.environ.get('SQLITE_READ_ROUTING', 'true').lower() == 'true'
+# Opt-in group commit: mutating routes queue their writes and one writer
+# thread commits everything that arrives within GROUP_COMMIT_WINDOW seconds
+app.config['GROUP_COMMIT'] = os.environ.get('GROUP_COMMIT', 'false').lower() == 'true'
+app.config['GROUP_COMMIT_WINDOW'] = float(os.environ.get('GROUP_COMMIT_WINDOW', 0.002))
+app.config['GROUP_COMMIT_MAX_BATCH'] = int(os.environ.get('GROUP_COMMIT_MAX_BATCH', 64))
+# Seconds a cached dashboard response may be served if no commit invalidates it
+app.config['RESPONSE_CACHE_TTL'] = int(os.environ.get('RESPONSE_CACHE_TTL', 30))
+# Password checks run on a bounded pool: worker threads, queued checks beyond
+# which logins get 503, and seconds a login waits for its check
+app.config['LOGIN_HASH_WORKERS'] = int(os.environ.get('LOGIN_HASH_WORKERS', max(1, (os.cpu_count() or 2) - 1)))
+app.config['LOGIN_HASH_QUEUE'] = int(os.environ.get('LOGIN_HASH_QUEUE', 256))
+app.config['LOGIN_HASH_TIMEOUT'] = int(os.environ.get('LOGIN_HASH_TIMEOUT', 30))
+# Seconds between batched last_login writes (0 writes on every login)
+app.config['LAST_LOGIN_FLUSH_INTERVAL'] = float(os.environ.get('LAST_LOGIN_FLUSH_INTERVAL', 5))
+# Lifetime of signed bearer tokens, and of cached user rows behind them
+app.config['AUTH_TOKEN_MAX_AGE'] = int(os.environ.get('AUTH_TOKEN_MAX_AGE', 8 * 3600))
+app.config['PRINCIPAL_CACHE_TTL'] = int(os.environ.get('PRINCIPAL_CACHE_TTL', 60))
+# Add a Server-Timing header (request, SQL and serialization time) to every response
+app.config['SERVER_TIMING'] = os.environ.get('SERVER_TIMING', 'false').lower() == 'true'
+# Log statements repeated more than QUERY_REPEAT_THRESHOLD times in one request
+# (likely N+1 loading) and statements slower than SLOW_QUERY_MS. Requests over
+# their view's @query_budget are logged, or fail when QUERY_BUDGET_ENFORCE is set
+app.config['QUERY_REPEAT_THRESHOLD'] = int(os.environ.get('QUERY_REPEAT_THRESHOLD', 5))
+app.config['SLOW_QUERY_MS'] = int(os.environ.get('SLOW_QUERY_MS', 200))
+app.config['QUERY_BUDGET_ENFORCE'] = os.environ.get('QUERY_BUDGET_ENFORCE', 'false').lower() == 'true'
 
 # Initialize extensions
-db = SQLAlchemy(app)
-ma = Marshmallow(app)
 CORS(app, origins=["http://localhost:4200"])
 
-# Initialize models with db and ma instances
-from models import init_models
-init_models(db, ma)
+# Initialize models with the db instance
+from models import db, init_models
+init_models(app)
 
 # Now import the classes after initialization
-from models.user import User, UserSchema
-from models.workplan import Workplan, WorkplanTask, WorkplanSchema
-from models.pac_operation import PacOperation, PacSample, PacOperationSchema
+from models.user import User
+from models.workplan import Workplan, WorkplanTask
+from models.pac_operation import PacOperation, PacSample
+from models.dashboard_counter import DashboardCounter
+from models.table_version import TableVersion
 
 # Import routes
 from routes.auth_routes import auth_bp
@@ -38,6 +73,13 @@ app.register_blueprint(auth_bp, url_prefix='/api/auth')
 app.register_blueprint(workplan_bp, url_prefix='/api/workplans')
 app.register_blueprint(pac_bp, url_prefix='/api/pac')
 
+# Per-route request, SQL and serialization timings, served at /api/metrics,
+# and the per-request N+1 / slow query checks
+from utils.metrics import init_metrics
+from utils.query_guard import init_query_guard
+init_metrics(app)
+init_query_guard(app)
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     return jsonify({
@@ -46,9 +88,61 @@ def health_check():
         'timestamp': datetime.now().isoformat()
     })
 
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    """Hit/miss counters for the dashboard response cache"""
+    from utils.cache import response_cache
+    return jsonify({
+        'success': True,
+        'cache': response_cache.stats()
+    })
+
+@app.cli.command('upgrade-db')
+def upgrade_db_command():
+    """Apply pending schema migrations to the configured database"""
+    from migrations import upgrade_database, current_version, latest_version
+    applied = upgrade_database(db.engine)
+    for step in applied:
+        print(f"Applied migration {step}")
+    with db.engine.connect() as connection:
+        print(f"Database schema at version {current_version(connection)} (latest {latest_version()})")
+
+@app.cli.command('seed')
+@click.option('--users', default=1000, show_default=True, help='Users to create (60% inspectors).')
+@click.option('--workplans', default=10000, show_default=True, help='Workplans to create.')
+@click.option('--tasks-per-workplan', default=5, show_default=True, help='Average tasks per workplan.')
+@click.option('--operations', default=100000, show_default=True, help='PAC operations to create.')
+@click.option('--samples-per-operation', default=2, show_default=True,
+              help='Average samples per started or completed operation.')
+@click.option('--seed', type=int, help='Random seed, for a reproducible dataset.')
+@click.option('--chunk-size', default=20000, show_default=True, help='Rows per executemany batch.')
+def seed_command(users, workplans, tasks_per_workplan, operations, samples_per_operation, seed, chunk_size):
+    """Add a large synthetic dataset to the configured database for load testing"""
+    from migrations import upgrade_database
+    from utils.seeder import Seeder
+    from utils.sqlite_profile import is_sqlite_file
+    if not is_sqlite_file(app.config['SQLALCHEMY_DATABASE_URI']):
+        raise click.UsageError('flask seed needs a file-backed SQLite database')
+    upgrade_database(db.engine)
+    counts = Seeder(db.engine, seed=seed, chunk_size=chunk_size).run(
+        users=users, workplans=workplans, tasks_per_workplan=tasks_per_workplan,
+        operations=operations, samples_per_operation=samples_per_operation)
+    for table, count in counts.items():
+        print(f"{table:15} {count:>10}")
+
+@app.cli.command('reconcile-rollups')
+def reconcile_rollups_command():
+    """Recount the stored child rollups (such as workplan task counts), repairing any drift"""
+    from models.rollups import reconcile_rollups
+    with db.engine.begin() as connection:
+        repaired = reconcile_rollups(connection)
+    for target, count in repaired.items():
+        print(f"{target:20} {count:>8} rows repaired")
+
 def init_db():
     """Initialize database with sample data"""
-    db.create_all()
+    from migrations import upgrade_database
+    upgrade_database(db.engine)
     
     # Check if data already exists
     if User.query.first() is None:
@@ -155,5 +249,8 @@ if __name__ == '__main__':
     with app.app_context():
         init_db()
     
+    if not app.config['SECRET_KEY']:
+        # The development server below runs in debug mode
+        app.config['SECRET_KEY'] = secrets.token_hex(32)
     print("FWFPS Python Backend starting on http://localhost:5000")
     app.run(debug=True, host='0.0.0.0', port=5000)
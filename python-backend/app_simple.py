@@ -1,7 +1,7 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
-from flask_marshmallow import Marshmallow
+from sqlalchemy import func
 from datetime import datetime, date
 from werkzeug.security import generate_password_hash, check_password_hash
 import os
@@ -14,10 +14,16 @@ basedir = os.path.abspath(os.path.dirname(__file__))
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(basedir, 'fwfps.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SECRET_KEY'] = 'fwfps-demo-secret-key'
+app.config['SQLITE_PROFILE'] = os.environ.get('SQLITE_PROFILE', 'production')
+
+# Same connection tuning as app.py; see utils/sqlite_profile.py
+from utils.sqlite_profile import engine_options, sqlite_profile, install_pragmas
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
 
 # Initialize extensions
 db = SQLAlchemy(app)
-ma = Marshmallow(app)
+with app.app_context():
+    install_pragmas(db.engine, sqlite_profile(app.config['SQLITE_PROFILE']))
 CORS(app, origins=["http://localhost:4200"])
 
 # Define models directly here for simplicity
@@ -200,12 +206,13 @@ def create_workplan():
 @app.route('/api/workplans/dashboard', methods=['GET'])
 def workplan_dashboard():
     """Get workplan dashboard data"""
-    workplans = Workplan.query.all()
+    # One grouped aggregate instead of loading every row
+    by_status = dict(db.session.query(Workplan.status, func.count()).group_by(Workplan.status).all())
     
-    total = len(workplans)
-    active = len([w for w in workplans if w.status == 'active'])
-    completed = len([w for w in workplans if w.status == 'completed'])
-    planned = len([w for w in workplans if w.status == 'planned'])
+    total = sum(by_status.values())
+    active = by_status.get('active', 0)
+    completed = by_status.get('completed', 0)
+    planned = by_status.get('planned', 0)
     
     return jsonify({
         'success': True,
@@ -260,12 +267,13 @@ def create_pac_operation():
 @app.route('/api/pac/dashboard', methods=['GET'])
 def pac_dashboard():
     """Get PAC operations dashboard data"""
-    operations = PacOperation.query.all()
+    # One grouped aggregate instead of loading every row
+    by_status = dict(db.session.query(PacOperation.status, func.count()).group_by(PacOperation.status).all())
     
-    total = len(operations)
-    scheduled = len([o for o in operations if o.status == 'scheduled'])
-    in_progress = len([o for o in operations if o.status == 'in_progress'])
-    completed = len([o for o in operations if o.status == 'completed'])
+    total = sum(by_status.values())
+    scheduled = by_status.get('scheduled', 0)
+    in_progress = by_status.get('in_progress', 0)
+    completed = by_status.get('completed', 0)
     
     return jsonify({
         'success': True,
@@ -0,0 +1,157 @@
+"""ASGI serving mode for the FWFPS API.
+
+    uvicorn asgi_app:application --port 5000
+
+Connections are coroutines, so thousands of slow polling clients hold no
+threads. A GET to the workplan, PAC or auth APIs that repeats the ETag of
+its last response (as browsers do for no-cache responses) is revalidated on
+the event loop: the table versions behind the ETag are read through an
+async SQLite driver (aiosqlite) and, when nothing changed, the 304 is sent
+without running the view. Every other GET runs the same Flask view as
+app.py on a bounded pool of ASGI_VIEW_WORKERS threads, reading through the
+read-only connection pool, so the views' CPU work never blocks the loop.
+Everything else (mutations, logins, streamed exports) is passed to the WSGI
+app on a small thread pool, keeping its single writer connection and
+optional group commit.
+"""
+import asyncio
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from a2wsgi import WSGIMiddleware
+from a2wsgi.wsgi import build_environ
+from flask import request
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app import app as flask_app, init_db
+from models import db
+from models.table_version import TableVersion
+from utils.etag import etag_for, not_modified
+from utils.sqlite_profile import install_pragmas, sqlite_profile
+
+# URL prefixes whose GET requests are served by the view pool (and revalidated on the loop)
+ASYNC_PREFIXES = ('/api/workplans', '/api/pac', '/api/auth', '/api/health')
+# Streamed responses stay on the WSGI side so they are not buffered
+WSGI_SUFFIXES = ('/export',)
+
+flask_app.config.setdefault('ASGI_READ_POOL_SIZE', int(os.environ.get('ASGI_READ_POOL_SIZE', 4)))
+flask_app.config.setdefault('ASGI_VIEW_WORKERS', int(os.environ.get('ASGI_VIEW_WORKERS', 8)))
+flask_app.config.setdefault('ASGI_WSGI_WORKERS', int(os.environ.get('ASGI_WSGI_WORKERS', 8)))
+
+def create_async_reader(app):
+    """An aiosqlite engine of read-only connections to the app's database file"""
+    with app.app_context():
+        path = db.engine.url.database
+    pragmas = sqlite_profile(app.config.get('SQLITE_PROFILE', 'production'))
+    engine = create_async_engine(
+        f'sqlite+aiosqlite:///file:{path}?mode=ro&uri=true',
+        pool_size=app.config['ASGI_READ_POOL_SIZE'],
+        max_overflow=0,
+        connect_args={'timeout': pragmas.get('busy_timeout', 5000) / 1000}
+    )
+    read_pragmas = {name: value for name, value in pragmas.items() if name != 'journal_mode'}
+    read_pragmas['query_only'] = 1
+    install_pragmas(engine.sync_engine, read_pragmas)
+    return engine
+
+def _run_view(environ):
+    """Run the Flask app for one request and buffer its response; called on the view pool"""
+    started = {}
+    
+    def start_response(status, headers, exc_info=None):
+        started['status'] = status
+        started['headers'] = headers
+
+    body_iterable = flask_app.wsgi_app(environ, start_response)
+    try:
+        body = b''.join(body_iterable)
+    finally:
+        if hasattr(body_iterable, 'close'):
+            body_iterable.close()
+    return started['status'], started['headers'], body
+
+class AsyncApi:
+    """ASGI application revalidating GETs on the loop and running views on thread pools"""
+    
+    def __init__(self, app):
+        self.app = app
+        self.wsgi = WSGIMiddleware(app, workers=app.config['ASGI_WSGI_WORKERS'])
+        self.views = ThreadPoolExecutor(app.config['ASGI_VIEW_WORKERS'], thread_name_prefix='asgi-view')
+        self.reader = None
+    
+    def is_async(self, scope):
+        path = scope['path']
+        return (scope['method'] in ('GET', 'HEAD')
+                and path.startswith(ASYNC_PREFIXES)
+                and not path.rstrip('/').endswith(WSGI_SUFFIXES))
+    
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http' and self.is_async(scope):
+            await self.serve_async(scope, send)
+        else:
+            await self.wsgi(scope, receive, send)
+    
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                # Same startup as `python app.py`: migrate and seed the sample data
+                with self.app.app_context():
+                    init_db()
+                self.reader = create_async_reader(self.app)
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.reader is not None:
+                    await self.reader.dispose()
+                self.views.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    
+    async def serve_async(self, scope, send):
+        environ = build_environ(scope, io.BytesIO())
+        response = await self.revalidate(environ)
+        if response is not None:
+            status, headers, body = response.status, response.headers.to_wsgi_list(), b''
+        else:
+            loop = asyncio.get_running_loop()
+            status, headers, body = await loop.run_in_executor(self.views, _run_view, environ)
+        code = int(status.split(' ', 1)[0])
+        await send({
+            'type': 'http.response.start',
+            'status': code,
+            'headers': [(name.lower().encode('latin1'), value.encode('latin1')) for name, value in headers]
+        })
+        await send({'type': 'http.response.body', 'body': body if scope['method'] != 'HEAD' else b''})
+    
+    async def revalidate(self, environ):
+        """The 304 for a conditional GET whose ETag is still current, or None when the view must run.
+
+        Matches the route, reads the versions of the view's etag_tables with
+        one async query and builds the 304 through the app's request hooks
+        (CORS, metrics), all on the loop.
+        """
+        if 'HTTP_IF_NONE_MATCH' not in environ:
+            return None
+        if self.reader is None:
+            self.reader = create_async_reader(self.app)
+        context = self.app.request_context(environ)
+        context.push()
+        try:
+            view = self.app.view_functions.get(request.endpoint) if request.routing_exception is None else None
+            tables = getattr(view, 'etag_tables', None)
+            if tables is None:
+                return None
+            async with self.reader.connect() as connection:
+                versions = TableVersion.ordered(await connection.execute(TableVersion.statement(tables)), tables)
+            etag = etag_for(versions)
+            if not request.if_none_match.contains(etag):
+                return None
+            response = self.app.preprocess_request() or not_modified(etag)
+            return self.app.process_response(self.app.make_response(response))
+        finally:
+            context.pop()
+
+application = AsyncApi(flask_app)
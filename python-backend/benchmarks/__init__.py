@@ -0,0 +1 @@
+# Performance checks and benchmarks for the FWFPS Python backend
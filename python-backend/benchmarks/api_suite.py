@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""Latency, throughput and query counts for the main API endpoints.
+
+Generates a dataset of the requested size in a throwaway database, then
+sends every scenario a fixed number of requests, either in process through
+the Flask test client or over real HTTP to a threaded server started on the
+same app (--http). --base-url runs the scenarios against a server that is
+already running, with its own data and without query counts.
+
+Every endpoint reports p50/p95/p99 latency, throughput and the SQL
+statements one uncached request runs. Results are saved as JSON; passing an
+earlier result file with --baseline flags endpoints whose p95 or throughput
+got worse by more than --threshold (and p95 by over a millisecond), or
+that run more queries, and exits 1.
+
+    python benchmarks/api_suite.py [--scale N] [--requests N] [--concurrency N]
+                                   [--http | --base-url URL] [--only TEXT]
+                                   [--output FILE] [--baseline FILE] [--threshold 0.25]
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from common import BACKEND_DIR, count_queries, load_app, seed
+
+RESULTS_DIR = os.path.join(BACKEND_DIR, 'benchmarks', 'results')
+# p95 changes smaller than this are timer noise, whatever their relative size
+MIN_DELTA_MS = 1.0
+BENCH_USER = {'username': 'bench', 'password': 'bench-password'}
+
+# name -> method, path, JSON body, and an optional cap on the request count
+# (logins are capped because each one runs a deliberately slow password hash)
+SCENARIOS = {
+    'health': ('GET', '/api/health', None, None),
+    'workplans.list': ('GET', '/api/workplans/?limit=50', None, None),
+    'workplans.list+tasks': ('GET', '/api/workplans/?limit=50&include=tasks,counts', None, None),
+    'workplans.detail': ('GET', '/api/workplans/1', None, None),
+    'workplans.tasks': ('GET', '/api/workplans/1/tasks', None, None),
+    'workplans.dashboard': ('GET', '/api/workplans/dashboard', None, None),
+    'pac.list': ('GET', '/api/pac/operations?limit=50', None, None),
+    'pac.list+samples': ('GET', '/api/pac/operations?limit=50&include=samples,counts', None, None),
+    'pac.search': ('GET', '/api/pac/operations?limit=50&q=facility', None, None),
+    'pac.detail': ('GET', '/api/pac/operations/1', None, None),
+    'pac.samples': ('GET', '/api/pac/operations/1/samples', None, None),
+    'pac.dashboard': ('GET', '/api/pac/dashboard', None, None),
+    'pac.create': ('POST', '/api/pac/operations', {
+        'operation_type': 'inspection',
+        'facility_name': 'Benchmark Facility',
+        'operation_date': '2025-06-01T09:00:00'
+    }, None),
+    'auth.login': ('POST', '/api/auth/login', BENCH_USER, 20),
+}
+
+class TestClientTransport:
+    """Requests through the Flask test client, one client per thread"""
+    
+    def __init__(self, app):
+        self.app = app
+        self.local = threading.local()
+    
+    def request(self, method, path, body):
+        if not hasattr(self.local, 'client'):
+            self.local.client = self.app.test_client()
+        response = self.local.client.open(path, method=method, json=body)
+        response.get_data()
+        return response.status_code
+    
+    def close(self):
+        pass
+
+class HttpTransport:
+    """Requests over keep-alive HTTP connections, one connection per thread"""
+    
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.local = threading.local()
+    
+    def request(self, method, path, body):
+        if not hasattr(self.local, 'connection'):
+            self.local.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        payload = json.dumps(body) if body is not None else None
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        try:
+            self.local.connection.request(method, path, body=payload, headers=headers)
+            response = self.local.connection.getresponse()
+            response.read()
+        except (http.client.HTTPException, OSError):
+            self.local.connection.close()
+            del self.local.connection
+            raise
+        return response.status
+    
+    def close(self):
+        pass
+
+class LocalServer(HttpTransport):
+    """A threaded Werkzeug server on the in-process app, for --http runs"""
+    
+    def __init__(self, app):
+        from werkzeug.serving import make_server
+        
+        self.server = make_server('127.0.0.1', 0, app, threaded=True)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        super().__init__(f'http://127.0.0.1:{self.server.server_port}')
+    
+    def close(self):
+        self.server.shutdown()
+
+def generate_dataset(app_module, scale):
+    """Seed scale workplans and operations plus the user the login scenario signs in as"""
+    from models.user import User
+
+    app, db = app_module.app, app_module.db
+    with app.app_context():
+        seed(db, workplans=scale, operations=scale)
+        user = User(username=BENCH_USER['username'], email='bench@example.com',
+                    full_name='Bench User', role='analyst')
+        user.set_password(BENCH_USER['password'])
+        db.session.add(user)
+        db.session.commit()
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def measure_queries(app_module, transport, method, path, body):
+    """SQL statements run by one request with the response cache cleared"""
+    from models.routing import routed_engines
+    from utils.cache import response_cache
+
+    with app_module.app.app_context():
+        engines = routed_engines()
+    response_cache.clear()
+    with count_queries(*engines) as statements:
+        transport.request(method, path, body)
+    return len(statements)
+
+def run_scenario(transport, method, path, body, requests, concurrency):
+    """Send requests split over concurrency threads; return the latency summary"""
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def worker(count):
+        own, failed = [], 0
+        for _ in range(count):
+            started = time.perf_counter()
+            try:
+                status = transport.request(method, path, body)
+            except Exception:
+                status = None
+            own.append(time.perf_counter() - started)
+            if status is None or status >= 400:
+                failed += 1
+        with lock:
+            latencies.extend(own)
+            errors.append(failed)
+
+    shares = [requests // concurrency + (1 if n < requests % concurrency else 0) for n in range(concurrency)]
+    threads = [threading.Thread(target=worker, args=(share,)) for share in shares if share]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    ordered = sorted(latencies)
+    return {
+        'requests': len(ordered),
+        'errors': sum(errors),
+        'throughput': round(len(ordered) / elapsed, 1),
+        'p50_ms': round(percentile(ordered, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(ordered, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 3),
+    }
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline, threshold, min_delta_ms=MIN_DELTA_MS):
+    """Endpoints slower, less throughput or more queries than in the baseline run"""
+    regressions = []
+    for name, current in results['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(name)
+        if previous is None:
+            continue
+        slower = current['p95_ms'] - previous['p95_ms']
+        if slower > min_delta_ms and current['p95_ms'] > previous['p95_ms'] * (1 + threshold):
+            regressions.append(f"{name}: p95 {previous['p95_ms']:.2f}ms -> {current['p95_ms']:.2f}ms")
+        if current['throughput'] < previous['throughput'] * (1 - threshold):
+            regressions.append(f"{name}: throughput {previous['throughput']:.1f} -> {current['throughput']:.1f} req/s")
+        if None not in (current['queries'], previous.get('queries')) and current['queries'] > previous['queries']:
+            regressions.append(f"{name}: queries {previous['queries']} -> {current['queries']}")
+    return regressions
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark the FWFPS API endpoints.')
+    parser.add_argument('--scale', type=int, default=1000, help='workplans and operations to generate')
+    parser.add_argument('--requests', type=int, default=200, help='timed requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=1, help='client threads per endpoint')
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--http', action='store_true', help='go through a local HTTP server')
+    target.add_argument('--base-url', help='benchmark an already running server instead')
+    parser.add_argument('--only', help='run only scenarios whose name contains this text')
+    parser.add_argument('--output', help='result file (default benchmarks/results/<time>.json)')
+    parser.add_argument('--baseline', help='earlier result file to flag regressions against')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed relative slowdown')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    scenarios = {name: scenario for name, scenario in SCENARIOS.items()
+                 if not args.only or args.only in name}
+
+    app_module = None
+    if args.base_url:
+        mode = 'remote'
+        transport = HttpTransport(args.base_url)
+    else:
+        app_module = load_app()
+        generate_dataset(app_module, args.scale)
+        mode = 'http' if args.http else 'test-client'
+        transport = LocalServer(app_module.app) if args.http else TestClientTransport(app_module.app)
+
+    results = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'mode': mode,
+        'scale': None if args.base_url else args.scale,
+        'requests': args.requests,
+        'concurrency': args.concurrency,
+        'endpoints': {}
+    }
+    print(f"{mode}, scale {results['scale']}, {args.requests} requests per endpoint, "
+          f'concurrency {args.concurrency}')
+    try:
+        for name, (method, path, body, cap) in scenarios.items():
+            requests = min(args.requests, cap) if cap else args.requests
+            queries = measure_queries(app_module, transport, method, path, body) if app_module else None
+            # Warm up connections and caches before timing
+            transport.request(method, path, body)
+            summary = run_scenario(transport, method, path, body, requests, args.concurrency)
+            summary['queries'] = queries
+            results['endpoints'][name] = summary
+            print(f"{name:22} p50 {summary['p50_ms']:8.2f}ms  p95 {summary['p95_ms']:8.2f}ms  "
+                  f"p99 {summary['p99_ms']:8.2f}ms  {summary['throughput']:8.1f} req/s  "
+                  f"queries {'-' if queries is None else queries:>2}  errors {summary['errors']}")
+    finally:
+        transport.close()
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    with open(output, 'w') as result_file:
+        json.dump(results, result_file, indent=2)
+    print(f'\nSaved {output}')
+
+    failed = [name for name, summary in results['endpoints'].items() if summary['errors']]
+    if failed:
+        print(f"Requests failed for: {', '.join(failed)}")
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        differing = [key for key in ('mode', 'scale', 'concurrency') if baseline.get(key) != results[key]]
+        if differing:
+            print(f"Warning: baseline was run with a different {', '.join(differing)}")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f'\n{len(regressions)} regression(s) against {args.baseline}:')
+            for line in regressions:
+                print(f'  {line}')
+            return 1
+        print(f'No regressions against {args.baseline}')
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
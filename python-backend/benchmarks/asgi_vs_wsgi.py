@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""Latency and throughput of the WSGI and ASGI serving modes side by side.
+
+Starts each server on a copy of the same seeded database (the threaded
+Werkzeug server for app.py, uvicorn for asgi_app.py) and runs waves of
+polling clients against the operation list: each client polls, sleeps a
+little, and polls again, like the dashboards in the field. Every wave runs
+twice: with clients that fetch the full page on every poll, and with
+clients that revalidate with If-None-Match as browsers do, while one writer
+changes an operation every WRITE_INTERVAL seconds. Reports request latency
+percentiles, throughput, the share of 304s and the most threads the server
+used. Needs the packages in requirements-asgi.txt.
+
+    python benchmarks/asgi_vs_wsgi.py [clients ...]
+"""
+import asyncio
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import BACKEND_DIR, load_app, seed
+
+POLL_URL = '/api/pac/operations?limit=20&include=counts'
+POLLS_PER_CLIENT = 10
+POLL_INTERVAL = 0.2
+WRITE_INTERVAL = 1.0
+
+SERVERS = {
+    'wsgi': [sys.executable, '-c',
+             'from werkzeug.serving import run_simple; from app import app; '
+             'run_simple("127.0.0.1", {port}, app, threaded=True)'],
+    'asgi': [sys.executable, '-m', 'uvicorn', 'asgi_app:application',
+             '--host', '127.0.0.1', '--port', '{port}', '--log-level', 'warning'],
+}
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def thread_count(pid):
+    with open(f'/proc/{pid}/status') as status:
+        for line in status:
+            if line.startswith('Threads:'):
+                return int(line.split()[1])
+    return 0
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+async def wait_until_up(client):
+    for _ in range(100):
+        try:
+            if (await client.get('/api/health')).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError('server did not start')
+
+async def poll_wave(base_url, clients, pid, revalidate):
+    import httpx
+
+    # The writer and the thread watcher share one client; every poller has its own
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        await wait_until_up(client)
+        latencies = []
+        errors = 0
+        not_modified = 0
+        max_threads = thread_count(pid)
+
+        async def poller():
+            # One connection per client, as separate browsers have; a client shared by
+            # hundreds of keep-alive connections costs httpx more CPU than the server
+            nonlocal errors, not_modified
+            etag = None
+            async with httpx.AsyncClient(base_url=base_url, timeout=60) as own_client:
+                for _ in range(POLLS_PER_CLIENT):
+                    headers = {'If-None-Match': etag} if etag else {}
+                    started = time.perf_counter()
+                    try:
+                        response = await own_client.get(POLL_URL, headers=headers)
+                        if response.status_code == 304:
+                            not_modified += 1
+                        elif response.status_code != 200:
+                            errors += 1
+                        elif revalidate:
+                            etag = response.headers.get('ETag')
+                    except httpx.HTTPError:
+                        errors += 1
+                    latencies.append(time.perf_counter() - started)
+                    await asyncio.sleep(POLL_INTERVAL)
+
+        async def writer():
+            # Each write bumps pac_operations' version, so every client's next poll is a full page
+            revision = 0
+            while True:
+                await asyncio.sleep(WRITE_INTERVAL)
+                revision += 1
+                await client.put('/api/pac/operations/1', json={'notes': f'revision {revision}'})
+
+        async def watch_threads():
+            nonlocal max_threads
+            while True:
+                max_threads = max(max_threads, thread_count(pid))
+                await asyncio.sleep(0.05)
+
+        background = [asyncio.create_task(watch_threads())]
+        if revalidate:
+            background.append(asyncio.create_task(writer()))
+        started = time.perf_counter()
+        await asyncio.gather(*(poller() for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+        for task in background:
+            task.cancel()
+
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'not_modified': not_modified / len(latencies),
+        'throughput': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'max_threads': max_threads,
+    }
+
+def main():
+    waves = [int(arg) for arg in sys.argv[1:]] or [10, 100, 500]
+
+    workdir = tempfile.mkdtemp(prefix='fwfps-bench-')
+    template = os.path.join(workdir, 'template.db')
+    app_module = load_app(template)
+    with app_module.app.app_context():
+        seed(app_module.db, workplans=200, operations=5000, samples_per_operation=2)
+        app_module.init_db()
+        app_module.db.engine.dispose()
+
+    print(f'{POLLS_PER_CLIENT} polls per client, {POLL_INTERVAL}s apart, GET {POLL_URL}')
+    for name, command in SERVERS.items():
+        database = os.path.join(workdir, f'{name}.db')
+        shutil.copyfile(template, database)
+        port = free_port()
+        env = dict(os.environ, DATABASE_URL='sqlite:///' + database)
+        server = subprocess.Popen([part.replace('{port}', str(port)) for part in command],
+                                  cwd=BACKEND_DIR, env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            for revalidate in (False, True):
+                for clients in waves:
+                    result = asyncio.run(poll_wave(f'http://127.0.0.1:{port}', clients, server.pid, revalidate))
+                    print(f"{name}  {'revalidate' if revalidate else 'full':10}  clients {clients:5}  "
+                          f"{result['throughput']:8.1f} req/s  "
+                          f"p50 {result['p50_ms']:8.1f}ms  p95 {result['p95_ms']:8.1f}ms  "
+                          f"p99 {result['p99_ms']:8.1f}ms  304s {result['not_modified']:4.0%}  "
+                          f"errors {result['errors']:4}  server threads {result['max_threads']}")
+        finally:
+            server.terminate()
+            server.wait()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""Compare creating operations one request at a time with the /bulk endpoint.
+
+Both paths run in process against fresh database files, so the numbers
+include the per-commit fsync that dominates the single-row path.
+
+    python benchmarks/bulk_insert.py [rows]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from common import load_app
+
+def operation_payload(i):
+    return {
+        'operation_type': ('inspection', 'sampling', 'audit')[i % 3],
+        'facility_name': f'Bulk Facility {i}',
+        'facility_id': f'FDA-{i:06d}',
+        'operation_date': f'2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}T09:00:00',
+        'priority': ('low', 'medium', 'high')[i % 3],
+        'inspector': f'Inspector {i % 40}',
+        'notes': 'Quarterly plan load'
+    }
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    payloads = [operation_payload(i) for i in range(rows)]
+
+    app_module = load_app(os.path.join(tempfile.mkdtemp(prefix='fwfps-bench-'), 'bulk.db'))
+    client = app_module.app.test_client()
+
+    started = time.perf_counter()
+    for payload in payloads:
+        response = client.post('/api/pac/operations', json=payload)
+        assert response.status_code == 201, response.get_data(as_text=True)
+    single = time.perf_counter() - started
+
+    started = time.perf_counter()
+    response = client.post('/api/pac/operations/bulk', json=payloads)
+    bulk = time.perf_counter() - started
+    assert response.status_code == 201, response.get_data(as_text=True)
+    assert response.get_json()['created'] == rows
+
+    print(f'rows:            {rows}')
+    print(f'per-row POSTs:   {single:8.3f}s  ({rows / single:10.0f} rows/s)')
+    print(f'one bulk POST:   {bulk:8.3f}s  ({rows / bulk:10.0f} rows/s)')
+    print(f'speed-up:        {single / bulk:8.1f}x')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
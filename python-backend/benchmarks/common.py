@@ -0,0 +1,83 @@
+"""Shared setup for the benchmark scripts.
+
+The scripts run the Flask app in process against a throwaway SQLite file,
+so no server needs to be running and the real fwfps.db is never touched.
+"""
+import os
+import secrets
+import sys
+import tempfile
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+def load_app(db_path=None):
+    """Import the app bound to a fresh database file and create the schema"""
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(prefix='fwfps-bench-'), 'bench.db')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + db_path
+    # Tokens issued against a throwaway database only need a throwaway key
+    os.environ.setdefault('SECRET_KEY', secrets.token_hex(32))
+    import app as app_module
+    from migrations import upgrade_database
+    with app_module.app.app_context():
+        upgrade_database(app_module.db.engine)
+    return app_module
+
+def seed(db, workplans=100, tasks_per_workplan=5, operations=100, samples_per_operation=3):
+    """Insert a simple dataset with children attached to every parent row"""
+    from models.workplan import Workplan, WorkplanTask
+    from models.pac_operation import PacOperation, PacSample
+
+    statuses = ('planned', 'active', 'completed')
+    op_statuses = ('scheduled', 'in_progress', 'completed')
+    op_types = ('inspection', 'sampling', 'audit')
+    base = datetime(2025, 1, 1, 9, 0)
+
+    for i in range(workplans):
+        workplan = Workplan(
+            title=f'Workplan {i}',
+            description='Generated workplan',
+            status=statuses[i % len(statuses)],
+            priority='high' if i % 4 == 0 else 'medium',
+            start_date=date(2025, 1, 1),
+            end_date=date(2025, 12, 31),
+            assigned_to=f'Team {i % 7}'
+        )
+        workplan.tasks = [WorkplanTask(title=f'Task {i}.{j}') for j in range(tasks_per_workplan)]
+        db.session.add(workplan)
+
+    for i in range(operations):
+        operation = PacOperation(
+            operation_type=op_types[i % len(op_types)],
+            facility_name=f'Facility {i}',
+            operation_date=base + timedelta(hours=i),
+            status=op_statuses[i % len(op_statuses)],
+            priority='high' if i % 5 == 0 else 'medium',
+            inspector=f'Inspector {i % 11}'
+        )
+        operation.samples = [PacSample(sample_type='product') for _ in range(samples_per_operation)]
+        db.session.add(operation)
+
+    db.session.commit()
+
+@contextmanager
+def count_queries(*engines):
+    """Collect every SQL statement executed on the engines inside the block"""
+    from sqlalchemy import event
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        for engine in engines:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
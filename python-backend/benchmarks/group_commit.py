@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Write throughput with per-request commits versus group commit.
+
+Writer threads create operations and samples and update operations for a
+fixed time, once per mode in a fresh process and database. Both modes run
+the durable profile (synchronous=FULL), so every commit is fsynced and
+the comparison is at equal durability.
+
+    python benchmarks/group_commit.py [seconds] [writers]
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+MODES = (('per-request', 'false'), ('group commit', 'true'))
+
+def run_mode(group_commit, seconds, writers):
+    os.environ['SQLITE_PROFILE'] = 'durable'
+    os.environ['GROUP_COMMIT'] = group_commit
+    from common import load_app
+
+    app_module = load_app(os.path.join(tempfile.mkdtemp(prefix='fwfps-bench-'), 'group-commit.db'))
+    app = app_module.app
+
+    counts = {'ok': 0, 'failed': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def writer(n):
+        client = app.test_client()
+        response = client.post('/api/pac/operations', json={
+            'operation_type': 'inspection',
+            'facility_name': f'Writer {n}',
+            'operation_date': '2025-06-01T09:00:00'
+        })
+        operation_id = response.get_json()['operation']['id']
+        i = 0
+        while time.perf_counter() < deadline:
+            if i % 2:
+                response = client.post(f'/api/pac/operations/{operation_id}/samples', json={'sample_type': 'swab'})
+            else:
+                response = client.put(f'/api/pac/operations/{operation_id}', json={'notes': f'Visit note {i}'})
+            with lock:
+                counts['ok' if response.status_code in (200, 201) else 'failed'] += 1
+            i += 1
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    from utils.write_queue import write_queue
+    counts.update(write_queue.stats())
+    return counts
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--mode':
+        print(json.dumps(run_mode(sys.argv[2], float(sys.argv[3]), int(sys.argv[4]))))
+        return 0
+
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    writers = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    print(f'{seconds:.0f}s per mode, {writers} writer threads, synchronous=FULL')
+    for label, group_commit in MODES:
+        output = subprocess.run(
+            [sys.executable, __file__, '--mode', group_commit, str(seconds), str(writers)],
+            check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        groups = f"  mean group size {result['mean_group_size']}" if result['groups'] else ''
+        print(f"{label:13} writes {result['ok'] / seconds:8.1f}/s ({result['failed']} failed){groups}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
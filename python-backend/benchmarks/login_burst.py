@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Measure list endpoint latency while a burst of users log in at once.
+
+Runs the burst twice in separate processes: once the way login used to work
+(every login hashes on its own thread and commits last_login) and once with
+the bounded hashing pool and write-behind last_login buffer.
+
+    python benchmarks/login_burst.py [users]
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from common import load_app
+
+PASSWORD = 'shift-start'
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def run_burst(users, mode):
+    if mode == 'inline':
+        # One hashing thread per login and a commit per login, as before the pool
+        os.environ['LOGIN_HASH_WORKERS'] = str(users)
+        os.environ['LAST_LOGIN_FLUSH_INTERVAL'] = '0'
+    app_module = load_app(os.path.join(tempfile.mkdtemp(prefix='fwfps-bench-'), 'login.db'))
+    app, db = app_module.app, app_module.db
+
+    from sqlalchemy import insert
+    from werkzeug.security import generate_password_hash
+    from models.user import User
+
+    with app.app_context():
+        password_hash = generate_password_hash(PASSWORD)
+        db.session.execute(insert(User), [{
+            'username': f'inspector{i}',
+            'email': f'inspector{i}@fda.gov',
+            'full_name': f'Inspector {i}',
+            'password_hash': password_hash
+        } for i in range(users)])
+        db.session.commit()
+
+    statuses = []
+    latencies = []
+    done = threading.Event()
+
+    def log_in(i):
+        response = app.test_client().post('/api/auth/login', json={
+            'username': f'inspector{i}', 'password': PASSWORD})
+        statuses.append(response.status_code)
+
+    def probe():
+        client = app.test_client()
+        while not done.is_set():
+            started = time.perf_counter()
+            client.get('/api/workplans/?limit=20')
+            latencies.append(time.perf_counter() - started)
+            time.sleep(0.01)
+
+    prober = threading.Thread(target=probe)
+    prober.start()
+    started = time.perf_counter()
+    logins = [threading.Thread(target=log_in, args=(i,)) for i in range(users)]
+    for thread in logins:
+        thread.start()
+    for thread in logins:
+        thread.join()
+    burst = time.perf_counter() - started
+    done.set()
+    prober.join()
+
+    return {
+        'mode': mode,
+        'logins_ok': statuses.count(200),
+        'burst_seconds': burst,
+        'probe_p50_ms': percentile(latencies, 0.50) * 1000,
+        'probe_p99_ms': percentile(latencies, 0.99) * 1000,
+        'probe_max_ms': max(latencies) * 1000
+    }
+
+def main():
+    if len(sys.argv) > 2:
+        print(json.dumps(run_burst(int(sys.argv[1]), sys.argv[2])))
+        return 0
+
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    print(f'users: {users}')
+    for mode in ('inline', 'pooled'):
+        output = subprocess.run([sys.executable, __file__, str(users), mode],
+                                check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{mode:7} logins ok {result['logins_ok']:4}  burst {result['burst_seconds']:6.2f}s  "
+              f"other requests p50 {result['probe_p50_ms']:8.1f}ms  p99 {result['probe_p99_ms']:8.1f}ms  "
+              f"max {result['probe_max_ms']:8.1f}ms")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Check that list and dashboard endpoints run a fixed number of SQL queries.
+
+Every endpoint is requested against a small and a large dataset; the query
+count must match the declared budget for both, which catches N+1 loading of
+the tasks and samples relationships.
+
+    python benchmarks/query_counts.py
+"""
+import sys
+
+from common import load_app, seed, count_queries
+
+# endpoint -> number of SQL statements it is allowed to run
+# (list and detail routes include one read of the table versions for their ETag)
+QUERY_BUDGETS = {
+    '/api/workplans/?limit=50': 2,
+    '/api/workplans/?limit=50&include=tasks,counts': 3,
+    '/api/workplans/?limit=50&include=counts': 2,
+    '/api/workplans/?limit=50&include=': 2,
+    '/api/workplans/?limit=50&include=&fields=title,status': 2,
+    '/api/workplans/1': 3,
+    '/api/workplans/1?include=counts': 2,
+    '/api/workplans/1?include=&fields=title': 2,
+    '/api/workplans/dashboard': 3,
+    '/api/workplans/dashboard?include=counts': 2,
+    '/api/pac/operations?limit=50': 2,
+    '/api/pac/operations?limit=50&include=samples,counts': 3,
+    '/api/pac/operations?limit=50&include=counts': 2,
+    '/api/pac/operations?limit=50&include=': 2,
+    '/api/pac/operations?limit=50&include=&fields=facility_name,status': 2,
+    '/api/pac/operations/1': 3,
+    '/api/pac/operations/1?include=counts': 2,
+    '/api/pac/operations/1?include=&fields=notes,findings': 2,
+    '/api/pac/dashboard': 3,
+    '/api/pac/dashboard?include=counts': 2,
+    '/api/pac/calendar?from=2025-01-01&to=2025-12-31': 2,
+}
+
+def measure(app_module):
+    """Return the query count for every budgeted endpoint"""
+    from utils.cache import response_cache
+    
+    # Measure the real work, not cached dashboard responses
+    response_cache.clear()
+    client = app_module.app.test_client()
+    counts = {}
+    from models.routing import routed_engines
+    with app_module.app.app_context():
+        engines = routed_engines()
+    for url in QUERY_BUDGETS:
+        with count_queries(*engines) as statements:
+            response = client.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f'{url} returned {response.status_code}: {response.get_data(as_text=True)}')
+        counts[url] = len(statements)
+    return counts
+
+def main():
+    app_module = load_app()
+    db = app_module.db
+    # Requests over the @query_budget declared on their view fail as well
+    app_module.app.config['QUERY_BUDGET_ENFORCE'] = True
+
+    failures = []
+    for size in (10, 200):
+        with app_module.app.app_context():
+            seed(db, workplans=size, operations=size)
+        counts = measure(app_module)
+        for url, budget in QUERY_BUDGETS.items():
+            status = 'ok' if counts[url] == budget else 'FAIL'
+            print(f'{status:4}  rows+={size:<4} {counts[url]:>3} queries (budget {budget})  {url}')
+            if counts[url] != budget:
+                failures.append(url)
+
+    if failures:
+        print(f'\n{len(failures)} endpoint(s) outside their query budget')
+        return 1
+    print('\nAll endpoints within their query budget')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
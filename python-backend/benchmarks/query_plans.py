@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Check the SQLite query plan of every statement the list and detail routes run.
+
+Each route is requested in process, the SQL it executes is captured with its
+parameters, and EXPLAIN QUERY PLAN is run for it. A route fails the check
+when one of its statements scans a whole data table without an index or sorts
+in a temporary b-tree, or when its main query does not use the index declared
+for it below, which is how a dropped or unused index shows up.
+
+    python benchmarks/query_plans.py [-v]
+"""
+import re
+import sys
+
+from common import load_app, seed
+
+# route -> index its main (first data) query is expected to use, or None for any
+ROUTES = [
+    ('/api/workplans/?limit=20', 'ix_workplans_created_at'),
+    ('/api/workplans/?limit=20&status=active', 'ix_workplans_status_created_at'),
+    ('/api/workplans/?limit=20&priority=high', 'ix_workplans_priority_created_at'),
+    ('/api/workplans/?limit=20&status=active&priority=high', None),
+    ('/api/workplans/?limit=20&include=counts', 'ix_workplans_created_at'),
+    ('/api/workplans/?limit=20&q=workplan', 'workplans_fts'),
+    ('/api/workplans/?limit=20&assigned_to=team', 'workplans_fts'),
+    ('/api/workplans/1', None),
+    ('/api/workplans/1/tasks', None),
+    ('/api/workplans/dashboard', None),
+    ('/api/pac/operations?limit=20', 'ix_pac_operations_operation_date'),
+    ('/api/pac/operations?limit=20&status=scheduled', 'ix_pac_operations_status_operation_date'),
+    ('/api/pac/operations?limit=20&type=audit', 'ix_pac_operations_type_operation_date'),
+    ('/api/pac/operations?limit=20&priority=high', 'ix_pac_operations_priority_operation_date'),
+    ('/api/pac/operations?limit=20&status=completed&type=sampling', None),
+    ('/api/pac/operations?limit=20&include=counts', 'ix_pac_operations_operation_date'),
+    ('/api/pac/operations?limit=20&q=facility', 'pac_operations_fts'),
+    ('/api/pac/operations?limit=20&inspector=inspector', 'pac_operations_fts'),
+    ('/api/pac/operations?limit=20&from=2025-01-03&to=2025-01-05', 'ix_pac_operations_operation_date'),
+    ('/api/pac/operations?limit=20&status=scheduled&from=2025-01-03', 'ix_pac_operations_status_operation_date'),
+    ('/api/pac/operations/1', None),
+    ('/api/pac/operations/1/samples', None),
+    ('/api/pac/dashboard', None),
+    ('/api/pac/calendar?from=2025-01-01&to=2025-12-31', 'ix_pac_operations_calendar'),
+    ('/api/pac/calendar?from=2025-01-01&to=2025-12-31&bucket=week&type=audit', 'ix_pac_operations_type_operation_date'),
+]
+
+# Tables that grow with usage; scanning the small lookup tables is fine
+LARGE_TABLES = ('pac_operations', 'pac_samples', 'workplans', 'workplan_tasks', 'users')
+FULL_SCAN = re.compile(r'^SCAN (\w+)$')
+# Small bookkeeping reads (ETag versions, dashboard counters) are not a route's main query
+BOOKKEEPING = re.compile(r'\bFROM (table_versions|dashboard_counters)\b')
+
+def plan_problems(plan_lines):
+    # Full-text queries sort only their matches (by rank or date), which is expected
+    searched = any('VIRTUAL TABLE INDEX' in line for line in plan_lines)
+    problems = []
+    for line in plan_lines:
+        match = FULL_SCAN.match(line)
+        if match and match.group(1) in LARGE_TABLES:
+            problems.append(line)
+        if 'USE TEMP B-TREE FOR ORDER BY' in line and not searched:
+            problems.append(line)
+    return problems
+
+def capture_statements(app_module, url):
+    """SELECT statements run for a route, including its second page when it pages"""
+    from sqlalchemy import event
+    from utils.cache import response_cache
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            statements.append((statement, parameters))
+
+    from models.routing import routed_engines
+    with app_module.app.app_context():
+        engines = routed_engines()
+    client = app_module.app.test_client()
+    response_cache.clear()
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = client.get(url)
+        next_cursor = (response.get_json(silent=True) or {}).get('next_cursor')
+        if next_cursor:
+            response = client.get(f'{url}&cursor={next_cursor}')
+    finally:
+        for engine in engines:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    if response.status_code != 200:
+        raise RuntimeError(f'{url} returned {response.status_code}: {response.get_data(as_text=True)}')
+    return statements
+
+def explain(app_module, statement, parameters):
+    with app_module.app.app_context():
+        connection = app_module.db.engine.raw_connection()
+        try:
+            rows = connection.cursor().execute('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+        finally:
+            connection.close()
+    return [row[-1] for row in rows]
+
+def check_route(app_module, url, expected_index):
+    """(statement, plan, problems) for every statement a route runs"""
+    results = []
+    main_query_seen = False
+    for statement, parameters in capture_statements(app_module, url):
+        plan = explain(app_module, statement, parameters)
+        problems = plan_problems(plan)
+        if not main_query_seen and not BOOKKEEPING.search(statement):
+            main_query_seen = True
+            if expected_index and not any(expected_index in line for line in plan):
+                problems.append(f'expected {expected_index}')
+        results.append((statement, plan, problems))
+    return results
+
+def main():
+    verbose = '-v' in sys.argv
+    app_module = load_app()
+    with app_module.app.app_context():
+        seed(app_module.db, workplans=300, operations=300)
+
+    failures = 0
+    for url, expected_index in ROUTES:
+        route_failed = False
+        for statement, plan, problems in check_route(app_module, url, expected_index):
+            route_failed = route_failed or bool(problems)
+            if problems or verbose:
+                print(f"{'FAIL' if problems else 'ok':4}  {url}")
+                print('      ' + ' '.join(statement.split())[:160])
+                for line in plan:
+                    print(f'        {line}')
+                for problem in problems:
+                    print(f'        -> {problem}')
+        if route_failed:
+            failures += 1
+        elif not verbose:
+            print(f'ok    {url}')
+
+    if failures:
+        print(f'\n{failures} route(s) with a query that has no usable index')
+        return 1
+    print('\nAll route queries use an index')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Time the inspector assignment planner and check that its plans are sound.
+
+Generates a window of operations (a mix of scheduled visits, some already
+assigned, and visits under way), plans them for a roster, and verifies
+that no inspector is double-booked or over their daily capacity on a day
+the planner added visits to. Then times the same plan end to end through
+POST /api/pac/schedule/optimize (dry run) against a throwaway database.
+
+    python benchmarks/schedule_optimize.py [operations] [inspectors]
+"""
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from common import load_app
+
+TYPES = ('inspection', 'sampling', 'audit', 'investigation')
+LEVELS = ('low', 'medium', 'high', 'critical')
+WINDOW_DAYS = 90
+
+def generate(count, inspectors, seed=1):
+    """Operations over WINDOW_DAYS of weekday working hours, a fifth of them under way"""
+    rng = random.Random(seed)
+    start = datetime(2025, 6, 2)
+    rows = []
+    for operation_id in range(1, count + 1):
+        day = start + timedelta(days=rng.randrange(WINDOW_DAYS))
+        if day.weekday() >= 5:
+            day -= timedelta(days=2)
+        inspector_id = rng.randint(1, inspectors) if rng.random() < 0.6 else None
+        rows.append(SimpleNamespace(
+            id=operation_id,
+            operation_type=rng.choice(TYPES),
+            operation_date=day.replace(hour=rng.randint(7, 15), minute=rng.choice((0, 30))),
+            status='in_progress' if inspector_id and rng.random() < 0.2 else 'scheduled',
+            priority=rng.choice(LEVELS),
+            risk_level=rng.choice(LEVELS),
+            inspector=f'Inspector {inspector_id}' if inspector_id else None,
+            inspector_id=inspector_id,
+        ))
+    return rows
+
+def check(rows, roster, plan, durations):
+    """Return the problems found in a plan: double bookings and over-capacity days"""
+    capacity = {inspector_id: limit for _, inspector_id, limit in roster}
+    changed = {change['id']: change['to']['inspector_id'] for change in plan['changes']}
+    unassigned = {operation['id'] for operation in plan['unassigned']}
+    visits = defaultdict(list)
+    for row in rows:
+        if row.id in unassigned:
+            continue
+        inspector_id = changed.get(row.id, row.inspector_id)
+        if inspector_id in capacity:
+            end = row.operation_date + timedelta(hours=durations[row.operation_type])
+            visits[inspector_id].append((row.operation_date, end, row.status == 'scheduled'))
+    problems = []
+    for inspector_id, booked in visits.items():
+        booked.sort()
+        per_day = defaultdict(lambda: [0, False])
+        # Latest end so far of any visit and of a planned one; fixed visits may overlap each other
+        any_end = planned_end = datetime.min
+        for start, end, planned in booked:
+            per_day[start.date()][0] += 1
+            per_day[start.date()][1] |= planned
+            if start < planned_end or (planned and start < any_end):
+                problems.append(f'inspector {inspector_id} double-booked at {start}')
+            any_end = max(any_end, end)
+            if planned:
+                planned_end = max(planned_end, end)
+        for day, (count, planned) in per_day.items():
+            if planned and count > capacity[inspector_id]:
+                problems.append(f'inspector {inspector_id} has {count} visits on {day}')
+    return problems
+
+def seed_operations(db, rows):
+    from sqlalchemy import insert
+    from models.pac_operation import PacOperation
+
+    db.session.execute(insert(PacOperation), [{
+        'id': row.id,
+        'operation_type': row.operation_type,
+        'facility_name': f'Facility {row.id}',
+        'operation_date': row.operation_date,
+        'status': row.status,
+        'priority': row.priority,
+        'risk_level': row.risk_level,
+        'inspector': row.inspector,
+    } for row in rows])
+    db.session.commit()
+
+def main():
+    from utils.scheduler import VISIT_HOURS, plan_schedule
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 30000
+    inspectors = int(sys.argv[2]) if len(sys.argv) > 2 else 120
+    rows = generate(count, inspectors)
+    roster = [(f'Inspector {number}', number, 3) for number in range(1, inspectors + 1)]
+
+    started = time.perf_counter()
+    plan = plan_schedule(rows, roster)
+    elapsed = time.perf_counter() - started
+    problems = check(rows, roster, plan, VISIT_HOURS)
+
+    print(f'operations:   {count} over {WINDOW_DAYS} days, {inspectors} inspectors with 3 visits/day')
+    print(f'planner:      {elapsed:8.3f}s  {plan["summary"]}')
+
+    # The roster by name only, so the endpoint needs no users; the rows carry no inspector_id either
+    app_module = load_app()
+    app = app_module.app
+    with app.app_context():
+        seed_operations(app_module.db, rows)
+    body = {
+        'from': '2025-06-01',
+        'to': '2025-09-30',
+        'inspectors': [{'name': name, 'capacity': capacity} for name, _, capacity in roster],
+    }
+    client = app.test_client()
+    started = time.perf_counter()
+    response = client.post('/api/pac/schedule/optimize', json=body)
+    elapsed = time.perf_counter() - started
+    print(f'endpoint:     {elapsed:8.3f}s  status {response.status_code}, '
+          f'{len(response.get_data()) / 1024:.0f} KB diff')
+
+    if problems or response.status_code != 200:
+        for problem in problems[:20]:
+            print(f'  {problem}')
+        print(f'\n{len(problems)} problem(s) in the plan' if problems else '\nThe endpoint failed')
+        return 1
+    print('\nNo double bookings or over-capacity days')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Compare the ORM + to_dict + jsonify path with the column-tuple encoders.
+
+Every path reads and serializes the same operation rows; the numbers cover
+the fetch, the dict building and the JSON encoding, which is what a list
+or export request spends its time on once the query itself is indexed.
+
+The baseline is a copy of the hand-written to_dict the list routes used
+before the encoders; the models' to_dict is now built on the encoders
+itself, so it is timed separately as ORM + encoder to_dict.
+
+    python benchmarks/serialization.py [rows]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from common import load_app
+
+def insert_operations(db, rows):
+    from sqlalchemy import insert
+    from models.pac_operation import PacOperation
+
+    base = datetime(2025, 1, 1, 9, 0)
+    db.session.execute(insert(PacOperation), [{
+        'operation_type': ('inspection', 'sampling', 'audit')[i % 3],
+        'facility_name': f'Facility {i}',
+        'facility_id': f'FDA-{i:06d}',
+        'facility_address': f'{i} Industrial Way',
+        'operation_date': base + timedelta(minutes=i),
+        'status': ('scheduled', 'in_progress', 'completed')[i % 3],
+        'priority': ('low', 'medium', 'high')[i % 3],
+        'inspector': f'Inspector {i % 40}',
+        'notes': 'Routine visit',
+        'created_at': base,
+        'updated_at': base
+    } for i in range(rows)])
+    db.session.commit()
+
+def original_to_dict(operation):
+    """PacOperation.to_dict(include=()) as it was written before the encoders"""
+    return {
+        'id': operation.id,
+        'operation_type': operation.operation_type,
+        'facility_name': operation.facility_name,
+        'facility_id': operation.facility_id,
+        'facility_address': operation.facility_address,
+        'operation_date': operation.operation_date.isoformat() if operation.operation_date else None,
+        'status': operation.status,
+        'priority': operation.priority,
+        'inspector': operation.inspector,
+        'inspector_id': operation.inspector_id,
+        'notes': operation.notes,
+        'findings': operation.findings,
+        'risk_level': operation.risk_level,
+        'compliance_status': operation.compliance_status,
+        'created_at': operation.created_at.isoformat() if operation.created_at else None,
+        'updated_at': operation.updated_at.isoformat() if operation.updated_at else None,
+        'completed_at': operation.completed_at.isoformat() if operation.completed_at else None
+    }
+
+def timed(function, repeat=3):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    app_module = load_app(os.path.join(tempfile.mkdtemp(prefix='fwfps-bench-'), 'serialize.db'))
+    app, db = app_module.app, app_module.db
+
+    from models.pac_operation import PacOperation
+    from utils.serializer import get_encoder, dumps, orjson
+
+    with app.app_context():
+        insert_operations(db, rows)
+
+        def orm_path(to_dict):
+            operations = PacOperation.query.order_by(PacOperation.id).all()
+            body = app.json.dumps([to_dict(operation) for operation in operations])
+            db.session.expunge_all()
+            return body
+
+        def encoder_path():
+            encoder = get_encoder(PacOperation)
+            result = db.session.execute(db.select(*encoder.columns).order_by(PacOperation.id))
+            return dumps(encoder.encode_all(result))
+
+        orm_time, orm_body = timed(lambda: orm_path(original_to_dict))
+        instance_time, instance_body = timed(lambda: orm_path(lambda operation: operation.to_dict(include=())))
+        encoder_time, encoder_body = timed(encoder_path)
+
+    import json
+    expected = json.loads(orm_body)
+    assert json.loads(instance_body) == expected and json.loads(encoder_body) == expected, \
+        'the paths produced different JSON'
+
+    print(f'rows:                     {rows}')
+    print(f'json encoder:             {"orjson" if orjson is not None else "json (install orjson for more)"}')
+    print(f'ORM + original to_dict:   {orm_time:8.3f}s  ({rows / orm_time:10.0f} rows/s)')
+    print(f'ORM + encoder to_dict:    {instance_time:8.3f}s  ({rows / instance_time:10.0f} rows/s)')
+    print(f'column encoders:          {encoder_time:8.3f}s  ({rows / encoder_time:10.0f} rows/s)')
+    print(f'speed-up vs original:     {orm_time / encoder_time:8.1f}x')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
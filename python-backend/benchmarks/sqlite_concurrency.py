@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Concurrent read/write throughput under each SQLite setup.
+
+Reader threads page through the operation list while writer threads create
+operations, for a fixed time, once per setup in a fresh process and
+database: SQLite defaults, the production profile with one shared pool, and
+the production profile with reads routed to the read-only pool. Failed
+requests are mostly "database is locked" errors.
+
+    python benchmarks/sqlite_concurrency.py [seconds] [readers] [writers]
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# (label, SQLITE_PROFILE, SQLITE_READ_ROUTING)
+SETUPS = (
+    ('defaults', 'off', 'false'),
+    ('tuned', 'production', 'false'),
+    ('tuned+routing', 'production', 'true'),
+)
+
+def run_setup(label, profile, routing, seconds, readers, writers):
+    os.environ['SQLITE_PROFILE'] = profile
+    os.environ['SQLITE_READ_ROUTING'] = routing
+    from common import load_app, seed
+
+    app_module = load_app(os.path.join(tempfile.mkdtemp(prefix='fwfps-bench-'), 'concurrency.db'))
+    app, db = app_module.app, app_module.db
+    with app.app_context():
+        seed(db, workplans=50, operations=2000, samples_per_operation=1)
+
+    counts = {'reads': 0, 'writes': 0, 'read_errors': 0, 'write_errors': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def count(key):
+        with lock:
+            counts[key] += 1
+
+    def reader():
+        client = app.test_client()
+        while time.perf_counter() < deadline:
+            response = client.get('/api/pac/operations?limit=50&include=counts')
+            count('reads' if response.status_code == 200 else 'read_errors')
+
+    def writer(n):
+        client = app.test_client()
+        i = 0
+        while time.perf_counter() < deadline:
+            response = client.post('/api/pac/operations', json={
+                'operation_type': 'inspection',
+                'facility_name': f'Writer {n} Facility {i}',
+                'operation_date': '2025-06-01T09:00:00'
+            })
+            count('writes' if response.status_code == 201 else 'write_errors')
+            i += 1
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with app.app_context(), db.engine.connect() as connection:
+        counts['journal_mode'] = connection.exec_driver_sql('PRAGMA journal_mode').scalar()
+    counts['setup'] = label
+    return counts
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--setup':
+        setup = next(setup for setup in SETUPS if setup[0] == sys.argv[2])
+        seconds, readers, writers = float(sys.argv[3]), int(sys.argv[4]), int(sys.argv[5])
+        print(json.dumps(run_setup(*setup, seconds, readers, writers)))
+        return 0
+
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    readers = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    writers = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    print(f'{seconds:.0f}s per setup, {readers} reader and {writers} writer threads')
+    for label, _, _ in SETUPS:
+        output = subprocess.run(
+            [sys.executable, __file__, '--setup', label, str(seconds), str(readers), str(writers)],
+            check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{label:14} ({result['journal_mode']:6})  "
+              f"reads {result['reads'] / seconds:8.1f}/s ({result['read_errors']} failed)  "
+              f"writes {result['writes'] / seconds:8.1f}/s ({result['write_errors']} failed)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
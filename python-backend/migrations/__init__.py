@@ -0,0 +1,68 @@
+"""Versioned schema migrations for the SQLite database.
+
+The schema version is stored in SQLite's PRAGMA user_version. Every pending
+step is run in order, so a brand new database and an existing one (including
+an fwfps.db created by app_simple.py) end up with the same schema. Steps must
+therefore be safe on both.
+
+Each step and its version stamp run in one transaction. pysqlite does not
+begin transactions for DDL, so the engine must be set up with
+utils.sqlite_profile.install_transactions (init_models does this for the
+app's engine); a failing step then leaves the schema and user_version as
+they were.
+"""
+import importlib
+
+from sqlalchemy import inspect, text
+
+# Applied in order; each module exposes VERSION, DESCRIPTION and upgrade(connection)
+MIGRATION_MODULES = [
+    'migrations.v001_baseline',
+    'migrations.v002_filter_sort_indexes',
+    'migrations.v003_fulltext_search',
+    'migrations.v004_table_versions',
+    'migrations.v005_task_rollups',
+    'migrations.v006_sample_rollups',
+    'migrations.v007_calendar_index',
+]
+
+def load_migrations():
+    migrations = [importlib.import_module(name) for name in MIGRATION_MODULES]
+    return sorted(migrations, key=lambda migration: migration.VERSION)
+
+def latest_version():
+    return load_migrations()[-1].VERSION
+
+def current_version(connection):
+    return connection.execute(text('PRAGMA user_version')).scalar()
+
+def _stamp(connection, version):
+    # PRAGMA statements cannot take bound parameters
+    connection.execute(text(f'PRAGMA user_version = {int(version)}'))
+
+def upgrade_database(engine):
+    """Bring the database up to the latest schema version, returning the steps applied"""
+    with engine.connect() as connection:
+        version = current_version(connection)
+    if version > latest_version():
+        raise RuntimeError(f'Database schema version {version} is newer than this code '
+                           f'(latest migration {latest_version()})')
+    applied = []
+    for migration in load_migrations():
+        with engine.begin() as connection:
+            if current_version(connection) >= migration.VERSION:
+                continue
+            migration.upgrade(connection)
+            _stamp(connection, migration.VERSION)
+            applied.append(f'{migration.VERSION:03d} {migration.DESCRIPTION}')
+    return applied
+
+# Helpers that keep individual steps safe to run against any earlier schema
+
+def add_column_if_missing(connection, table, column, ddl):
+    columns = {info['name'] for info in inspect(connection).get_columns(table)}
+    if column not in columns:
+        connection.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} {ddl}'))
+
+def create_index_if_missing(connection, name, table, columns):
+    connection.execute(text(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({", ".join(columns)})'))
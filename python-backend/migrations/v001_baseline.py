@@ -0,0 +1,15 @@
+"""Bring databases created before migrations existed up to the model schema.
+
+Databases created by app_simple.py have no workplan_tasks or pac_samples
+tables and no workplans.created_by column.
+"""
+VERSION = 1
+DESCRIPTION = 'baseline schema'
+
+def upgrade(connection):
+    from models import db
+    from migrations import add_column_if_missing
+
+    # Creates only the tables that are missing (and the dashboard counters)
+    db.metadata.create_all(bind=connection)
+    add_column_if_missing(connection, 'workplans', 'created_by', 'INTEGER REFERENCES users (id)')
@@ -0,0 +1,25 @@
+"""Indexes for the columns the list, child and dashboard queries filter and sort on"""
+VERSION = 2
+DESCRIPTION = 'filter and sort indexes'
+
+INDEXES = [
+    ('ix_pac_operations_operation_date', 'pac_operations', ['operation_date']),
+    ('ix_pac_operations_status_operation_date', 'pac_operations', ['status', 'operation_date']),
+    ('ix_pac_operations_type_operation_date', 'pac_operations', ['operation_type', 'operation_date']),
+    ('ix_pac_operations_priority_operation_date', 'pac_operations', ['priority', 'operation_date']),
+    ('ix_pac_operations_created_at', 'pac_operations', ['created_at']),
+    ('ix_pac_samples_operation_id', 'pac_samples', ['operation_id']),
+    ('ix_workplans_created_at', 'workplans', ['created_at']),
+    ('ix_workplans_status_created_at', 'workplans', ['status', 'created_at']),
+    ('ix_workplans_priority_created_at', 'workplans', ['priority', 'created_at']),
+    ('ix_workplan_tasks_workplan_id', 'workplan_tasks', ['workplan_id']),
+]
+
+def upgrade(connection):
+    from sqlalchemy import text
+    from migrations import create_index_if_missing
+
+    for name, table, columns in INDEXES:
+        create_index_if_missing(connection, name, table, columns)
+    # Refresh planner statistics so the new indexes are chosen
+    connection.execute(text('ANALYZE'))
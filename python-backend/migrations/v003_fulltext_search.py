@@ -0,0 +1,13 @@
+"""FTS5 indexes over the free-text columns, kept in sync by triggers"""
+VERSION = 3
+DESCRIPTION = 'full-text search indexes'
+
+def upgrade(connection):
+    from sqlalchemy import text
+    from utils.search import SEARCH_INDEXES
+
+    for index in SEARCH_INDEXES.values():
+        for statement in index.ddl():
+            connection.execute(text(statement))
+        # Index the rows that existed before the triggers did
+        connection.execute(text(f"INSERT INTO {index.name}({index.name}) VALUES ('rebuild')"))
@@ -0,0 +1,20 @@
+"""Per-table version counters that drive the ETags of the GET endpoints"""
+VERSION = 4
+DESCRIPTION = 'table version counters'
+
+def upgrade(connection):
+    from sqlalchemy import text
+    from models.table_version import VERSIONED_TABLES
+
+    connection.execute(text(
+        'CREATE TABLE IF NOT EXISTS table_versions ('
+        'table_name VARCHAR(50) NOT NULL PRIMARY KEY, version INTEGER NOT NULL)'
+    ))
+    for table in VERSIONED_TABLES:
+        bump = (f"INSERT INTO table_versions (table_name, version) VALUES ('{table}', 1) "
+                f"ON CONFLICT (table_name) DO UPDATE SET version = version + 1;")
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            connection.execute(text(
+                f'CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{event.lower()} '
+                f'AFTER {event} ON {table} BEGIN {bump} END'
+            ))
@@ -0,0 +1,14 @@
+"""Task counts and derived progress stored on workplans, kept current by triggers"""
+VERSION = 5
+DESCRIPTION = 'workplan task rollups'
+
+def upgrade(connection):
+    from sqlalchemy import text
+    from migrations import add_column_if_missing
+    from models.rollups import rollup_columns, rollup_trigger_statements, reconcile_rollups
+
+    for column in rollup_columns('workplan_tasks'):
+        add_column_if_missing(connection, 'workplans', column, 'INTEGER NOT NULL DEFAULT 0')
+    for statement in rollup_trigger_statements('workplan_tasks'):
+        connection.execute(text(statement))
+    reconcile_rollups(connection, ['workplan_tasks'])
@@ -0,0 +1,14 @@
+"""Sample counts per status stored on pac_operations, kept current by triggers"""
+VERSION = 6
+DESCRIPTION = 'operation sample rollups'
+
+def upgrade(connection):
+    from sqlalchemy import text
+    from migrations import add_column_if_missing
+    from models.rollups import rollup_columns, rollup_trigger_statements, reconcile_rollups
+
+    for column in rollup_columns('pac_samples'):
+        add_column_if_missing(connection, 'pac_operations', column, 'INTEGER NOT NULL DEFAULT 0')
+    for statement in rollup_trigger_statements('pac_samples'):
+        connection.execute(text(statement))
+    reconcile_rollups(connection, ['pac_samples'])
@@ -0,0 +1,11 @@
+"""Covering index for the calendar counts, so a date range is counted without reading the table rows"""
+VERSION = 7
+DESCRIPTION = 'calendar covering index'
+
+def upgrade(connection):
+    from sqlalchemy import text
+    from migrations import create_index_if_missing
+
+    create_index_if_missing(connection, 'ix_pac_operations_calendar', 'pac_operations',
+                            ['operation_date', 'status', 'operation_type', 'inspector'])
+    connection.execute(text('ANALYZE'))
@@ -1,18 +1,39 @@
 # Initialize models module
 from flask_sqlalchemy import SQLAlchemy
-from flask_marshmallow import Marshmallow
 
-def init_models(db: SQLAlchemy, ma: Marshmallow):
-    """Initialize all models with database and marshmallow instances"""
-    
-    # Set global db and ma for all model modules
-    import models.user as user_module
-    import models.workplan as workplan_module
-    import models.pac_operation as pac_module
+from models.routing import RoutingSession, create_reader_engine
+
+# Shared extension instance - model modules import it at class definition
+# time, so it must exist before any model module is loaded
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+def init_models(app):
+    """Bind the shared database instance to the Flask app.
+
+    File-backed SQLite databases get the pool settings and per-connection
+    PRAGMAs of the configured SQLITE_PROFILE. With SQLITE_READ_ROUTING the
+    default engine keeps a single writer connection and a separate pool of
+    read-only connections serves the requests marked by route_reads. Writer
+    transactions are begun explicitly, so group commits and migrations are
+    single transactions.
+    """
+    from utils.sqlite_profile import (is_sqlite_file, engine_options, sqlite_profile, install_pragmas,
+                                      install_transactions, DEFAULT_POOL_SIZE, DEFAULT_MAX_OVERFLOW,
+                                      DEFAULT_POOL_TIMEOUT)
     
-    user_module.db = db
-    user_module.ma = ma
-    workplan_module.db = db
-    workplan_module.ma = ma
-    pac_module.db = db
-    pac_module.ma = ma
+    tuned = is_sqlite_file(app.config['SQLALCHEMY_DATABASE_URI'])
+    if tuned:
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+    db.init_app(app)
+    with app.app_context():
+        install_transactions(db.engine)
+    if tuned:
+        pragmas = sqlite_profile(app.config.get('SQLITE_PROFILE', 'production'))
+        with app.app_context():
+            install_pragmas(db.engine, pragmas)
+            if app.config.get('SQLITE_READ_ROUTING'):
+                app.extensions['sqlite_reader'] = create_reader_engine(
+                    db.engine, pragmas,
+                    pool_size=app.config.get('SQLITE_POOL_SIZE', DEFAULT_POOL_SIZE),
+                    max_overflow=app.config.get('SQLITE_MAX_OVERFLOW', DEFAULT_MAX_OVERFLOW),
+                    pool_timeout=app.config.get('SQLITE_POOL_TIMEOUT', DEFAULT_POOL_TIMEOUT))
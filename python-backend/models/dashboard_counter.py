@@ -0,0 +1,87 @@
+from sqlalchemy import event, text
+
+from models import db
+
+# Tables whose rows are counted, mapped to the column stored as the "kind"
+# dimension (workplans have no type, so their kind is always '')
+COUNTED_TABLES = {
+    'pac_operations': 'operation_type',
+    'workplans': None,
+}
+
+class DashboardCounter(db.Model):
+    """Row counts per (status, kind, priority), kept current by SQLite triggers.
+
+    The dashboards read these few rows instead of scanning the operations and
+    workplans tables, so their cost does not grow with the data. Triggers fire
+    for every write path (ORM, bulk executemany, raw SQL) in the same
+    transaction as the change itself.
+    """
+    __tablename__ = 'dashboard_counters'
+    
+    entity = db.Column(db.String(50), primary_key=True)
+    status = db.Column(db.String(50), primary_key=True)
+    kind = db.Column(db.String(50), primary_key=True)
+    priority = db.Column(db.String(20), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    
+    @classmethod
+    def summary(cls, entity):
+        """Return the total plus per status, kind and priority counts for a table"""
+        result = {'total': 0, 'status': {}, 'kind': {}, 'priority': {}}
+        rows = db.session.query(cls.status, cls.kind, cls.priority, cls.count) \
+            .filter(cls.entity == entity) \
+            .all()
+        for status, kind, priority, count in rows:
+            result['total'] += count
+            for dimension, value in (('status', status), ('kind', kind), ('priority', priority)):
+                result[dimension][value] = result[dimension].get(value, 0) + count
+        return result
+
+def _dimensions(table, row):
+    """SQL expressions for the (status, kind, priority) of NEW or OLD in a trigger"""
+    kind_column = COUNTED_TABLES[table]
+    kind = f"COALESCE({row}.{kind_column}, '')" if kind_column else "''"
+    return f"COALESCE({row}.status, ''), {kind}, COALESCE({row}.priority, '')"
+
+def _increment(table, row, delta):
+    return (
+        f"INSERT INTO dashboard_counters (entity, status, kind, priority, count) "
+        f"VALUES ('{table}', {_dimensions(table, row)}, {delta}) "
+        f"ON CONFLICT (entity, status, kind, priority) DO UPDATE SET count = count + {delta};"
+    )
+
+def counter_trigger_statements(table):
+    """CREATE TRIGGER statements that keep the counters for one table current"""
+    kind_column = COUNTED_TABLES[table]
+    watched = ['status', 'priority'] + ([kind_column] if kind_column else [])
+    changed = ' OR '.join(f'OLD.{column} IS NOT NEW.{column}' for column in watched)
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS trg_{table}_counters_insert AFTER INSERT ON {table} "
+        f"BEGIN {_increment(table, 'NEW', 1)} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{table}_counters_delete AFTER DELETE ON {table} "
+        f"BEGIN {_increment(table, 'OLD', -1)} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{table}_counters_update AFTER UPDATE OF {', '.join(watched)} ON {table} "
+        f"WHEN {changed} "
+        f"BEGIN {_increment(table, 'OLD', -1)} {_increment(table, 'NEW', 1)} END",
+    ]
+
+def rebuild_dashboard_counters(connection):
+    """Recount every counted table from scratch"""
+    connection.execute(text('DELETE FROM dashboard_counters'))
+    for table, kind_column in COUNTED_TABLES.items():
+        kind = f"COALESCE({kind_column}, '')" if kind_column else "''"
+        connection.execute(text(
+            f"INSERT INTO dashboard_counters (entity, status, kind, priority, count) "
+            f"SELECT '{table}', COALESCE(status, ''), {kind}, COALESCE(priority, ''), COUNT(*) "
+            f"FROM {table} GROUP BY 2, 3, 4"
+        ))
+
+@event.listens_for(db.metadata, 'after_create')
+def _install_counter_triggers(metadata, connection, tables=(), **kw):
+    """Create the triggers, and seed the counters when their table is new"""
+    for table in COUNTED_TABLES:
+        for statement in counter_trigger_statements(table):
+            connection.execute(text(statement))
+    if any(table.name == DashboardCounter.__tablename__ for table in tables):
+        rebuild_dashboard_counters(connection)
@@ -1,18 +1,21 @@
-from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
-from marshmallow import Schema, fields
 
-# Import db from app context
-db = None
-ma = None
-
-def init_models(database, marshmallow):
-    global db, ma
-    db = database
-    ma = marshmallow
+from models import db
+from utils.serializer import instance_dict
 
 class PacOperation(db.Model):
     __tablename__ = 'pac_operations'
+    # Every index ends with the implicit rowid (id), so each one also serves
+    # the (operation_date, id) keyset ordering of the list endpoint
+    __table_args__ = (
+        db.Index('ix_pac_operations_operation_date', 'operation_date'),
+        db.Index('ix_pac_operations_status_operation_date', 'status', 'operation_date'),
+        db.Index('ix_pac_operations_type_operation_date', 'operation_type', 'operation_date'),
+        db.Index('ix_pac_operations_priority_operation_date', 'priority', 'operation_date'),
+        db.Index('ix_pac_operations_created_at', 'created_at'),
+        # Covers the calendar counts, which read only these columns over a date range
+        db.Index('ix_pac_operations_calendar', 'operation_date', 'status', 'operation_type', 'inspector'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     operation_type = db.Column(db.String(50), nullable=False)  # inspection, sampling, audit, investigation
@@ -31,39 +34,45 @@ class PacOperation(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     completed_at = db.Column(db.DateTime)
+    # Sample rollups, kept current by triggers on pac_samples (models/rollups.py)
+    sample_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    samples_collected = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    samples_in_transit = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    samples_testing = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    samples_completed = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Relationships
     samples = db.relationship('PacSample', backref='operation', lazy=True, cascade='all, delete-orphan')
     
-    def to_dict(self):
-        """Convert to dictionary for JSON serialization"""
-        return {
-            'id': self.id,
-            'operation_type': self.operation_type,
-            'facility_name': self.facility_name,
-            'facility_id': self.facility_id,
-            'facility_address': self.facility_address,
-            'operation_date': self.operation_date.isoformat() if self.operation_date else None,
-            'status': self.status,
-            'priority': self.priority,
-            'inspector': self.inspector,
-            'inspector_id': self.inspector_id,
-            'notes': self.notes,
-            'findings': self.findings,
-            'risk_level': self.risk_level,
-            'compliance_status': self.compliance_status,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
-            'sample_count': len(self.samples),
-            'samples': [sample.to_dict() for sample in self.samples] if self.samples else []
-        }
+    # Columns exposed by to_dict and the encoders
+    serialized_fields = ('id', 'operation_type', 'facility_name', 'facility_id', 'facility_address', 'operation_date',
+                         'status', 'priority', 'inspector', 'inspector_id', 'notes', 'findings', 'risk_level',
+                         'compliance_status', 'created_at', 'updated_at', 'completed_at')
+    # The list endpoint leaves the Text columns out unless fields= asks for them
+    list_fields = tuple(name for name in serialized_fields if name not in ('facility_address', 'notes', 'findings'))
+    # Added by include=counts (or fields=), read from the row like any column
+    rollup_fields = ('sample_count', 'samples_collected', 'samples_in_transit', 'samples_testing',
+                     'samples_completed')
+    
+    def to_dict(self, include=('samples', 'counts')):
+        """Convert to dictionary for JSON serialization.
+
+        include selects the child data to add: 'samples' serializes the
+        sample rows and 'counts' adds the stored sample rollups.
+        """
+        data = instance_dict(self)
+        if 'counts' in include:
+            for name in self.rollup_fields:
+                data[name] = getattr(self, name)
+        if 'samples' in include:
+            data['samples'] = [sample.to_dict() for sample in self.samples]
+        return data
 
 class PacSample(db.Model):
     __tablename__ = 'pac_samples'
     
     id = db.Column(db.Integer, primary_key=True)
-    operation_id = db.Column(db.Integer, db.ForeignKey('pac_operations.id'), nullable=False)
+    operation_id = db.Column(db.Integer, db.ForeignKey('pac_operations.id'), nullable=False, index=True)
     sample_type = db.Column(db.String(100), nullable=False)  # product, environmental, water, etc.
     sample_description = db.Column(db.String(200))
     collection_date = db.Column(db.DateTime, default=datetime.utcnow)
@@ -76,38 +85,4 @@ class PacSample(db.Model):
     
     def to_dict(self):
         """Convert to dictionary for JSON serialization"""
-        return {
-            'id': self.id,
-            'operation_id': self.operation_id,
-            'sample_type': self.sample_type,
-            'sample_description': self.sample_description,
-            'collection_date': self.collection_date.isoformat() if self.collection_date else None,
-            'sample_location': self.sample_location,
-            'test_type': self.test_type,
-            'status': self.status,
-            'results': self.results,
-            'lab_id': self.lab_id,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
-
-class PacOperationSchema(ma.SQLAlchemyAutoSchema):
-    class Meta:
-        model = PacOperation
-        load_instance = True
-        include_relationships = True
-        
-    id = fields.Int(dump_only=True)
-    created_at = fields.DateTime(dump_only=True)
-    updated_at = fields.DateTime(dump_only=True)
-    completed_at = fields.DateTime(dump_only=True)
-    operation_date = fields.DateTime()
-    samples = fields.Nested('PacSampleSchema', many=True, exclude=('operation',))
-
-class PacSampleSchema(ma.SQLAlchemyAutoSchema):
-    class Meta:
-        model = PacSample
-        load_instance = True
-        
-    id = fields.Int(dump_only=True)
-    created_at = fields.DateTime(dump_only=True)
-    collection_date = fields.DateTime()
+        return instance_dict(self)
@@ -0,0 +1,121 @@
+from sqlalchemy import text
+
+# Child table -> the parent table columns its rows are rolled up into.
+# count holds the number of children and statuses maps a child status to the
+# column counting children in that status. derived maps parent columns to SQL
+# computed from the rollups ({row} is the row prefix, '' or 'NEW.'); they are
+# recomputed after every child change, and put back when the parent row is
+# written with another value.
+ROLLUPS = {
+    'workplan_tasks': {
+        'parent': 'workplans',
+        'foreign_key': 'workplan_id',
+        'count': 'task_count',
+        'statuses': {
+            'pending': 'tasks_pending',
+            'in_progress': 'tasks_in_progress',
+            'completed': 'tasks_completed',
+            'cancelled': 'tasks_cancelled',
+        },
+        # The share of the tasks that are not cancelled that are completed;
+        # a workplan without such tasks keeps the progress it was given
+        'derived': {
+            'progress': 'CASE WHEN {row}task_count > {row}tasks_cancelled '
+                        'THEN CAST(ROUND(100.0 * {row}tasks_completed / ({row}task_count - {row}tasks_cancelled)) '
+                        'AS INTEGER) ELSE {row}progress END',
+        },
+    },
+    'pac_samples': {
+        'parent': 'pac_operations',
+        'foreign_key': 'operation_id',
+        'count': 'sample_count',
+        'statuses': {
+            'collected': 'samples_collected',
+            'in_transit': 'samples_in_transit',
+            'testing': 'samples_testing',
+            'completed': 'samples_completed',
+        },
+    },
+}
+
+def rollup_columns(child_table):
+    """The parent columns maintained for a child table, counts first"""
+    rollup = ROLLUPS[child_table]
+    return [rollup['count']] + list(rollup['statuses'].values())
+
+def _adjust(child_table, row, sign):
+    """UPDATE adding (sign '+') or removing (sign '-') the child row NEW or OLD from its parent"""
+    rollup = ROLLUPS[child_table]
+    count = rollup['count']
+    assignments = [f'{count} = {count} {sign} 1'] + [
+        f"{column} = {column} {sign} ({row}.status IS '{status}')"
+        for status, column in rollup['statuses'].items()
+    ]
+    return f"UPDATE {rollup['parent']} SET {', '.join(assignments)} WHERE id = {row}.{rollup['foreign_key']};"
+
+def _derive(child_table, parent_ids):
+    """UPDATEs recomputing the derived columns of the given parent ids"""
+    rollup = ROLLUPS[child_table]
+    statements = []
+    for column, expression in rollup.get('derived', {}).items():
+        value = expression.format(row='')
+        statements.append(f"UPDATE {rollup['parent']} SET {column} = {value} "
+                          f"WHERE id IN ({parent_ids}) AND {column} IS NOT {value};")
+    return ' '.join(statements)
+
+def rollup_trigger_statements(child_table):
+    """CREATE TRIGGER statements that keep the parent rollups of one child table current"""
+    rollup = ROLLUPS[child_table]
+    parent, foreign_key = rollup['parent'], rollup['foreign_key']
+    changed = f'OLD.status IS NOT NEW.status OR OLD.{foreign_key} IS NOT NEW.{foreign_key}'
+    statements = [
+        f"CREATE TRIGGER IF NOT EXISTS trg_{child_table}_rollup_insert AFTER INSERT ON {child_table} "
+        f"BEGIN {_adjust(child_table, 'NEW', '+')} {_derive(child_table, f'NEW.{foreign_key}')} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{child_table}_rollup_delete AFTER DELETE ON {child_table} "
+        f"BEGIN {_adjust(child_table, 'OLD', '-')} {_derive(child_table, f'OLD.{foreign_key}')} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{child_table}_rollup_update "
+        f"AFTER UPDATE OF status, {foreign_key} ON {child_table} WHEN {changed} "
+        f"BEGIN {_adjust(child_table, 'OLD', '-')} {_adjust(child_table, 'NEW', '+')} "
+        f"{_derive(child_table, f'OLD.{foreign_key}, NEW.{foreign_key}')} END",
+    ]
+    for column, expression in rollup.get('derived', {}).items():
+        statements.append(
+            f"CREATE TRIGGER IF NOT EXISTS trg_{parent}_{column}_derived AFTER UPDATE OF {column} ON {parent} "
+            f"WHEN NEW.{column} IS NOT {expression.format(row='NEW.')} "
+            f"BEGIN {_derive(child_table, 'NEW.id')} END"
+        )
+    return statements
+
+def reconcile_rollups(connection, child_tables=None):
+    """Recount the rollups of child_tables (default all) from the child rows and recompute the derived columns.
+
+    Returns how many rows were corrected, keyed by parent table for the
+    counts and by table.column for each derived column.
+    """
+    repaired = {}
+    for child_table in child_tables or ROLLUPS:
+        rollup = ROLLUPS[child_table]
+        parent, foreign_key = rollup['parent'], rollup['foreign_key']
+        columns = rollup_columns(child_table)
+        totals = ['COUNT(*)'] + [f"SUM(status IS '{status}')" for status in rollup['statuses']]
+        aliases = [f'c{position}' for position in range(len(columns))]
+        drifted = ' OR '.join(f'{column} IS NOT totals.{alias}' for column, alias in zip(columns, aliases))
+        with_children = connection.execute(text(
+            f"UPDATE {parent} SET {', '.join(f'{column} = totals.{alias}' for column, alias in zip(columns, aliases))} "
+            f"FROM (SELECT {foreign_key} AS parent_id, "
+            f"{', '.join(f'{total} AS {alias}' for total, alias in zip(totals, aliases))} "
+            f"FROM {child_table} GROUP BY {foreign_key}) AS totals "
+            f"WHERE {parent}.id = totals.parent_id AND ({drifted})"
+        )).rowcount
+        without_children = connection.execute(text(
+            f"UPDATE {parent} SET {', '.join(f'{column} = 0' for column in columns)} "
+            f"WHERE ({' OR '.join(f'{column} != 0' for column in columns)}) "
+            f"AND NOT EXISTS (SELECT 1 FROM {child_table} WHERE {foreign_key} = {parent}.id)"
+        )).rowcount
+        repaired[parent] = with_children + without_children
+        for column, expression in rollup.get('derived', {}).items():
+            value = expression.format(row='')
+            repaired[f'{parent}.{column}'] = connection.execute(text(
+                f'UPDATE {parent} SET {column} = {value} WHERE {column} IS NOT {value}'
+            )).rowcount
+    return repaired
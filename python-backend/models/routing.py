@@ -0,0 +1,70 @@
+from contextlib import contextmanager
+
+from flask import current_app, g, has_app_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine
+
+READ_METHODS = ('GET', 'HEAD')
+
+class RoutingSession(Session):
+    """Session that sends the queries of read-only requests to the reader engine.
+
+    Requests marked by route_reads use the read-only connection pool; all
+    other work (mutations, CLI commands, background flushes) uses the default
+    engine, which holds the single writer connection.
+    """
+    
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context() and g.get('read_only'):
+            reader = current_app.extensions.get('sqlite_reader')
+            if reader is not None:
+                return reader
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+def route_reads(blueprint):
+    """Serve the blueprint's GET and HEAD requests from the read-only pool"""
+    @blueprint.before_request
+    def _mark_read_only():
+        if request.method in READ_METHODS:
+            g.read_only = True
+    return blueprint
+
+@contextmanager
+def read_only_session():
+    """Send the session's queries to the reader inside the block, then release its connections.
+
+    For requests that read a lot before writing (a POST that plans from a
+    large window), so the single writer connection is only taken for the write.
+    """
+    from models import db
+    was_read_only = g.get('read_only', False)
+    g.read_only = True
+    try:
+        yield db.session
+    finally:
+        g.read_only = was_read_only
+        db.session.close()
+
+def create_reader_engine(writer_engine, pragmas, pool_size, max_overflow, pool_timeout):
+    """A pool of read-only (mode=ro, query_only) connections to the writer's database file"""
+    from utils.sqlite_profile import install_pragmas
+
+    path = writer_engine.url.database
+    engine = create_engine(
+        f'sqlite:///file:{path}?mode=ro&uri=true',
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        connect_args={'timeout': pragmas.get('busy_timeout', 5000) / 1000}
+    )
+    # journal_mode is a property of the file and cannot be set read-only
+    read_pragmas = {name: value for name, value in pragmas.items() if name != 'journal_mode'}
+    read_pragmas['query_only'] = 1
+    install_pragmas(engine, read_pragmas)
+    return engine
+
+def routed_engines():
+    """Every engine the session may use: the writer first, then the reader if configured"""
+    from models import db
+    reader = current_app.extensions.get('sqlite_reader')
+    return [db.engine] + ([reader] if reader is not None else [])
@@ -0,0 +1,31 @@
+from models import db
+
+# Tables whose writes bump their version (see migrations/v004_table_versions.py)
+VERSIONED_TABLES = ('workplans', 'workplan_tasks', 'pac_operations', 'pac_samples')
+
+class TableVersion(db.Model):
+    """A counter per table, bumped by SQLite triggers on every insert, update and delete.
+
+    Reading one small row is enough to tell whether anything in a table has
+    changed, which is what the ETags of the GET endpoints are derived from.
+    """
+    __tablename__ = 'table_versions'
+    
+    table_name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    
+    @classmethod
+    def current(cls, tables):
+        """Return the versions of the given tables, in the same order"""
+        return cls.ordered(db.session.execute(cls.statement(tables)), tables)
+    
+    @classmethod
+    def statement(cls, tables):
+        """SELECT of the (table_name, version) rows of the given tables"""
+        return db.select(cls.table_name, cls.version).where(cls.table_name.in_(tables))
+    
+    @staticmethod
+    def ordered(rows, tables):
+        """The versions in rows, in the order of tables; a table without a row is at version 0"""
+        versions = dict(rows.all())
+        return tuple(versions.get(table, 0) for table in tables)
@@ -1,16 +1,7 @@
-from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
-from marshmallow import Schema, fields
 
-# Import db from app context - this will be set up properly
-db = None
-ma = None
-
-def init_models(database, marshmallow):
-    global db, ma
-    db = database
-    ma = marshmallow
+from models import db
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -47,13 +38,3 @@ class User(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'last_login': self.last_login.isoformat() if self.last_login else None
         }
-
-class UserSchema(ma.SQLAlchemyAutoSchema):
-    class Meta:
-        model = User
-        load_instance = True
-        exclude = ('password_hash',)
-        
-    id = fields.Int(dump_only=True)
-    created_at = fields.DateTime(dump_only=True)
-    last_login = fields.DateTime(dump_only=True)
@@ -1,18 +1,17 @@
-from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime, date
-from marshmallow import Schema, fields
+from datetime import datetime
 
-# Import db from app context
-db = None
-ma = None
-
-def init_models(database, marshmallow):
-    global db, ma
-    db = database
-    ma = marshmallow
+from models import db
+from utils.serializer import instance_dict
 
 class Workplan(db.Model):
     __tablename__ = 'workplans'
+    # Every index ends with the implicit rowid (id), so each one also serves
+    # the (created_at, id) keyset ordering of the list endpoint
+    __table_args__ = (
+        db.Index('ix_workplans_created_at', 'created_at'),
+        db.Index('ix_workplans_status_created_at', 'status', 'created_at'),
+        db.Index('ix_workplans_priority_created_at', 'priority', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -26,33 +25,44 @@ class Workplan(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'))
+    # Task rollups, kept current by triggers on workplan_tasks (models/rollups.py);
+    # progress is derived from them once the workplan has tasks
+    task_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    tasks_pending = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    tasks_in_progress = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    tasks_completed = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    tasks_cancelled = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Relationships
     tasks = db.relationship('WorkplanTask', backref='workplan', lazy=True, cascade='all, delete-orphan')
     
-    def to_dict(self):
-        """Convert to dictionary for JSON serialization"""
-        return {
-            'id': self.id,
-            'title': self.title,
-            'description': self.description,
-            'status': self.status,
-            'priority': self.priority,
-            'start_date': self.start_date.isoformat() if self.start_date else None,
-            'end_date': self.end_date.isoformat() if self.end_date else None,
-            'assigned_to': self.assigned_to,
-            'progress': self.progress,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'task_count': len(self.tasks),
-            'tasks': [task.to_dict() for task in self.tasks] if self.tasks else []
-        }
+    # Columns exposed by to_dict and the encoders (created_by is internal)
+    serialized_fields = ('id', 'title', 'description', 'status', 'priority', 'start_date', 'end_date',
+                         'assigned_to', 'progress', 'created_at', 'updated_at')
+    # The list endpoint leaves the Text column out unless fields= asks for it
+    list_fields = tuple(name for name in serialized_fields if name != 'description')
+    # Added by include=counts (or fields=), read from the row like any column
+    rollup_fields = ('task_count', 'tasks_pending', 'tasks_in_progress', 'tasks_completed', 'tasks_cancelled')
+    
+    def to_dict(self, include=('tasks', 'counts')):
+        """Convert to dictionary for JSON serialization.
+
+        include selects the child data to add: 'tasks' serializes the task
+        rows and 'counts' adds the stored task rollups.
+        """
+        data = instance_dict(self)
+        if 'counts' in include:
+            for name in self.rollup_fields:
+                data[name] = getattr(self, name)
+        if 'tasks' in include:
+            data['tasks'] = [task.to_dict() for task in self.tasks]
+        return data
 
 class WorkplanTask(db.Model):
     __tablename__ = 'workplan_tasks'
     
     id = db.Column(db.Integer, primary_key=True)
-    workplan_id = db.Column(db.Integer, db.ForeignKey('workplans.id'), nullable=False)
+    workplan_id = db.Column(db.Integer, db.ForeignKey('workplans.id'), nullable=False, index=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
     status = db.Column(db.String(50), nullable=False, default='pending')  # pending, in_progress, completed, cancelled
@@ -65,41 +75,4 @@ class WorkplanTask(db.Model):
     
     def to_dict(self):
         """Convert to dictionary for JSON serialization"""
-        return {
-            'id': self.id,
-            'workplan_id': self.workplan_id,
-            'title': self.title,
-            'description': self.description,
-            'status': self.status,
-            'priority': self.priority,
-            'due_date': self.due_date.isoformat() if self.due_date else None,
-            'assigned_to': self.assigned_to,
-            'progress': self.progress,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None
-        }
-
-class WorkplanSchema(ma.SQLAlchemyAutoSchema):
-    class Meta:
-        model = Workplan
-        load_instance = True
-        include_relationships = True
-        
-    id = fields.Int(dump_only=True)
-    created_at = fields.DateTime(dump_only=True)
-    updated_at = fields.DateTime(dump_only=True)
-    start_date = fields.Date()
-    end_date = fields.Date()
-    progress = fields.Int(validate=lambda x: 0 <= x <= 100)
-    tasks = fields.Nested('WorkplanTaskSchema', many=True, exclude=('workplan',))
-
-class WorkplanTaskSchema(ma.SQLAlchemyAutoSchema):
-    class Meta:
-        model = WorkplanTask
-        load_instance = True
-        
-    id = fields.Int(dump_only=True)
-    created_at = fields.DateTime(dump_only=True)
-    completed_at = fields.DateTime(dump_only=True)
-    due_date = fields.Date()
-    progress = fields.Int(validate=lambda x: 0 <= x <= 100)
+        return instance_dict(self)
@@ -1,10 +1,14 @@
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, request, jsonify, session, current_app
 from datetime import datetime
-from models.user import User, UserSchema
+from models.user import User
+from models.routing import route_reads
+from utils.login import password_verifier, last_login_buffer, LoginBusy
+from utils.write_queue import run_write
+from utils.auth import issue_token, login_required, current_user, DEFAULT_TOKEN_MAX_AGE
 
 auth_bp = Blueprint('auth', __name__)
-user_schema = UserSchema()
-users_schema = UserSchema(many=True)
+# GET handlers read through the read-only connection pool
+route_reads(auth_bp)
 
 @auth_bp.route('/login', methods=['POST'])
 def login():
@@ -19,26 +23,42 @@ def login():
         
         # Find user by username
         user = User.query.filter_by(username=username).first()
+        # End the read transaction first so it does not hold SQLite locks while the hash runs
+        from models import db
+        db.session.close()
         
-        if user and user.check_password(password):
-            # Update last login
-            user.last_login = datetime.utcnow()
-            from app import db
-            db.session.commit()
+        # The hash check runs on the bounded hashing pool, not inline
+        if user and password_verifier.verify(user.password_hash, password):
+            if not user.is_active:
+                return jsonify({'error': 'Account is deactivated'}), 403
+            
+            # last_login is written behind in batches rather than committed here
+            login_at = datetime.utcnow()
+            last_login_buffer.record(user.id, login_at)
             
             # Store user session (simple session management)
             session['user_id'] = user.id
             session['username'] = user.username
+            session['role'] = user.role
             
+            user_data = user.to_dict()
+            user_data['last_login'] = login_at.isoformat()
             return jsonify({
                 'success': True,
                 'message': 'Login successful',
-                'user': user.to_dict(),
-                'token': f'demo-token-{user.id}'  # Simple token for demo
+                'user': user_data,
+                # Signed and expiring; send as "Authorization: Bearer <token>"
+                'token': issue_token(user),
+                'token_type': 'Bearer',
+                'expires_in': current_app.config.get('AUTH_TOKEN_MAX_AGE', DEFAULT_TOKEN_MAX_AGE)
             }), 200
         else:
             return jsonify({'error': 'Invalid username or password'}), 401
-            
+    
+    except LoginBusy as e:
+        response = jsonify({'error': str(e)})
+        response.headers['Retry-After'] = '1'
+        return response, 503
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -55,20 +75,24 @@ def logout():
         return jsonify({'error': str(e)}), 500
 
 @auth_bp.route('/profile', methods=['GET'])
+@login_required
 def get_profile():
     """Get current user profile"""
     try:
-        user_id = session.get('user_id')
-        if not user_id:
-            return jsonify({'error': 'Not authenticated'}), 401
-        
-        user = User.query.get(user_id)
+        # Served from the principal cache; deactivated users resolve to None
+        user = current_user()
         if not user:
-            return jsonify({'error': 'User not found'}), 404
+            return jsonify({'error': 'User not found or deactivated'}), 401
+        
+        user_data = dict(user)
+        # Show a login that is still waiting in the write-behind buffer
+        pending_login = last_login_buffer.pending(user['id'])
+        if pending_login:
+            user_data['last_login'] = pending_login.isoformat()
         
         return jsonify({
             'success': True,
-            'user': user.to_dict()
+            'user': user_data
         }), 200
         
     except Exception as e:
@@ -103,7 +127,7 @@ def register():
         if existing_email:
             return jsonify({'error': 'Email already exists'}), 400
         
-        # Create new user
+        # Create new user; the slow password hash runs here, not on the writer
         new_user = User(
             username=data.get('username'),
             email=data.get('email'),
@@ -113,17 +137,18 @@ def register():
         )
         new_user.set_password(data.get('password'))
         
-        from app import db
-        db.session.add(new_user)
-        db.session.commit()
+        def create(session):
+            session.add(new_user)
+            session.flush()
+            return new_user.to_dict()
         
         return jsonify({
             'success': True,
             'message': 'User registered successfully',
-            'user': new_user.to_dict()
+            'user': run_write(create)
         }), 201
         
     except Exception as e:
-        from app import db
+        from models import db
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -1,58 +1,191 @@
 from flask import Blueprint, request, jsonify
-from datetime import datetime
-from models.pac_operation import PacOperation, PacSample, PacOperationSchema, PacSampleSchema
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import update, bindparam, select, union_all, func, literal, null
+from models.pac_operation import PacOperation, PacSample
+from models.user import User
+from models.dashboard_counter import DashboardCounter
+from models.routing import route_reads, read_only_session
+from utils.pagination import parse_page_args, keyset_page
+from utils.loading import parse_include, parse_fields, load_children
+from utils.cache import cached_response, mark_changed
+from utils.search import SEARCH_INDEXES, match_expression, combine_expressions, ranked_page
+from utils.bulk import read_bulk_payload, existing_ids, bulk_create, is_id, row_int, row_text
+from utils.export import parse_export_format, stream_export
+from utils.etag import conditional_get
+from utils.query_guard import query_budget
+from utils.serializer import get_encoder, children_by_parent, json_response
+from utils.write_queue import run_write, NotFound
+from utils.scheduler import parse_window, parse_roster, parse_durations, plan_schedule
 
 pac_bp = Blueprint('pac', __name__)
-operation_schema = PacOperationSchema()
-operations_schema = PacOperationSchema(many=True)
-sample_schema = PacSampleSchema()
-samples_schema = PacSampleSchema(many=True)
+# GET handlers read through the read-only connection pool
+route_reads(pac_bp)
+
+OPERATION_INCLUDES = ('samples', 'counts')
+# List pages default to the stored counts, so listing operations never reads pac_samples
+OPERATION_LIST_INCLUDES = ('counts',)
+OPERATION_SEARCH = SEARCH_INDEXES['pac_operations']
+# Date modifiers taking an operation_date to the first day of its calendar bucket; weeks start on Monday
+CALENDAR_BUCKETS = {'day': (), 'week': ('weekday 0', '-6 days')}
+CALENDAR_DIMENSIONS = {
+    'status': PacOperation.status,
+    'type': PacOperation.operation_type,
+    'inspector': PacOperation.inspector,
+}
+CALENDAR_MAX_DAYS = 366
+
+def operation_fields(args, include, default=None):
+    """The operation fields to return; include=counts adds the stored sample rollups"""
+    extra = PacOperation.rollup_fields if 'counts' in include else ()
+    return parse_fields(args, PacOperation, default, extra)
+
+def encode_operation_rows(encoder, rows, include):
+    """Encode operation column rows, adding their samples with one query when included.
+
+    Sample counts need no query; they are rollup columns of the rows themselves.
+    """
+    operations = encoder.encode_all(rows)
+    if 'samples' in include:
+        samples = children_by_parent(get_encoder(PacSample), PacSample.operation_id,
+                                     [operation['id'] for operation in operations])
+        for operation in operations:
+            operation['samples'] = samples[operation['id']]
+    return operations
+
+def parse_date_range(args):
+    """Read the inclusive from/to dates (YYYY-MM-DD) in args; either may be missing"""
+    bounds = []
+    for name in ('from', 'to'):
+        value = args.get(name)
+        try:
+            bounds.append(date.fromisoformat(value) if value else None)
+        except ValueError:
+            raise ValueError(f'{name} must be a date (YYYY-MM-DD)')
+    start, end = bounds
+    if start and end and end < start:
+        raise ValueError('to must not be before from')
+    return start, end
+
+def filter_operations(args):
+    """Build the operations query for the list filters in args.
+
+    Returns the filtered query and, when q= is given, the (unfiltered query,
+    MATCH expression) pair a relevance-ranked search needs. Raises ValueError
+    for search text without any searchable words or an invalid from/to range.
+    """
+    # Get query parameters
+    operation_type = args.get('type')
+    status = args.get('status')
+    priority = args.get('priority')
+    inspector = args.get('inspector')
+    search_text = args.get('q')
+    start, end = parse_date_range(args)
+    
+    search = match_expression(search_text) if search_text is not None else None
+    inspector_search = match_expression(inspector, 'inspector') if inspector else None
+    
+    # Build query
+    query = PacOperation.query
+    
+    if operation_type:
+        query = query.filter(PacOperation.operation_type == operation_type)
+    if status:
+        query = query.filter(PacOperation.status == status)
+    if priority:
+        query = query.filter(PacOperation.priority == priority)
+    # Half-open bounds on the stored timestamp, so the operation_date indexes serve the range
+    if start:
+        query = query.filter(PacOperation.operation_date >= datetime.combine(start, time.min))
+    if end:
+        query = query.filter(PacOperation.operation_date < datetime.combine(end + timedelta(days=1), time.min))
+    
+    # Free-text criteria go through the FTS5 index instead of LIKE scans
+    base_query = query
+    search_expression = combine_expressions(search, inspector_search)
+    if search_expression:
+        query = query.filter(OPERATION_SEARCH.match(PacOperation.id, search_expression))
+    
+    return query, (base_query, search_expression) if search else None
 
 @pac_bp.route('/operations', methods=['GET'])
+@query_budget(4)
+@conditional_get(depends_on=('pac_operations', 'pac_samples'))
 def get_operations():
-    """Get all PAC operations with optional filtering"""
+    """Get a page of PAC operations with optional filtering and full-text search"""
     try:
-        # Get query parameters
-        operation_type = request.args.get('type')
-        status = request.args.get('status')
-        priority = request.args.get('priority')
-        inspector = request.args.get('inspector')
-        
-        # Build query
-        query = PacOperation.query
+        try:
+            limit, after, include_total = parse_page_args(request.args, PacOperation.operation_date)
+            include = parse_include(request.args, OPERATION_INCLUDES, OPERATION_LIST_INCLUDES)
+            fields = operation_fields(request.args, include, PacOperation.list_fields)
+            query, ranked = filter_operations(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Select column tuples only; no ORM instances are built for list pages.
+        # The cursor needs operation_date even when fields= leaves it out
+        encoder = get_encoder(PacOperation, fields)
+        columns = encoder.select_columns(PacOperation.operation_date)
+        if ranked:
+            # q= results are ordered best match first; ranking needs the MATCH as a join
+            base_query, search_expression = ranked
+            rows, next_cursor = ranked_page(base_query.with_entities(*columns), PacOperation,
+                                            OPERATION_SEARCH, search_expression, after, limit)
+        else:
+            rows, next_cursor = keyset_page(query.with_entities(*columns), PacOperation.operation_date,
+                                            PacOperation.id, after, limit)
+        
+        response = {
+            'success': True,
+            'operations': encode_operation_rows(encoder, rows, include),
+            'limit': limit,
+            'next_cursor': next_cursor
+        }
+        # Counting the whole filtered table is expensive, so only do it on request
+        if include_total:
+            response['total'] = query.count()
         
-        if operation_type:
-            query = query.filter(PacOperation.operation_type == operation_type)
-        if status:
-            query = query.filter(PacOperation.status == status)
-        if priority:
-            query = query.filter(PacOperation.priority == priority)
-        if inspector:
-            query = query.filter(PacOperation.inspector.ilike(f'%{inspector}%'))
+        return json_response(response)
         
-        operations = query.order_by(PacOperation.operation_date.desc()).all()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@pac_bp.route('/operations/export', methods=['GET'])
+def export_operations():
+    """Stream every operation matching the list filters as NDJSON or CSV"""
+    try:
+        try:
+            export_format = parse_export_format(request.args)
+            query, _ = filter_operations(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        return jsonify({
-            'success': True,
-            'operations': [operation.to_dict() for operation in operations],
-            'total': len(operations)
-        }), 200
+        query = query.order_by(PacOperation.operation_date.desc(), PacOperation.id.desc())
+        return stream_export(query, PacOperation, export_format, 'pac_operations')
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @pac_bp.route('/operations/<int:operation_id>', methods=['GET'])
+@query_budget(3)
+@conditional_get(depends_on=('pac_operations', 'pac_samples'))
 def get_operation(operation_id):
     """Get specific PAC operation by ID"""
     try:
-        operation = PacOperation.query.get(operation_id)
-        if not operation:
+        try:
+            include = parse_include(request.args, OPERATION_INCLUDES, OPERATION_INCLUDES)
+            fields = operation_fields(request.args, include)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        encoder = get_encoder(PacOperation, fields)
+        row = PacOperation.query.with_entities(*encoder.columns).filter(PacOperation.id == operation_id).first()
+        if row is None:
             return jsonify({'error': 'Operation not found'}), 404
         
-        return jsonify({
+        return json_response({
             'success': True,
-            'operation': operation.to_dict()
-        }), 200
+            'operation': encode_operation_rows(encoder, [row], include)[0]
+        })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -66,31 +199,75 @@ def create_operation():
         # Parse operation date
         operation_date = datetime.fromisoformat(data['operation_date'].replace('Z', '+00:00'))
         
-        operation = PacOperation(
-            operation_type=data.get('operation_type'),
-            facility_name=data.get('facility_name'),
-            facility_id=data.get('facility_id'),
-            facility_address=data.get('facility_address'),
-            operation_date=operation_date,
-            status=data.get('status', 'scheduled'),
-            priority=data.get('priority', 'medium'),
-            inspector=data.get('inspector'),
-            notes=data.get('notes'),
-            risk_level=data.get('risk_level', 'low')
-        )
-        
-        from app import db
-        db.session.add(operation)
-        db.session.commit()
-        
-        return jsonify({
+        def create(session):
+            operation = PacOperation(
+                operation_type=data.get('operation_type'),
+                facility_name=data.get('facility_name'),
+                facility_id=data.get('facility_id'),
+                facility_address=data.get('facility_address'),
+                operation_date=operation_date,
+                status=data.get('status', 'scheduled'),
+                priority=data.get('priority', 'medium'),
+                inspector=data.get('inspector'),
+                notes=data.get('notes'),
+                risk_level=data.get('risk_level', 'low')
+            )
+            session.add(operation)
+            session.flush()
+            return operation.to_dict()
+        
+        return json_response({
             'success': True,
             'message': 'Operation created successfully',
-            'operation': operation.to_dict()
-        }), 201
+            'operation': run_write(create)
+        }, 201)
+        
+    except Exception as e:
+        from models import db
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+def parse_iso_datetime(value, field):
+    if not isinstance(value, str):
+        raise ValueError(f'{field} must be an ISO 8601 datetime string')
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f'{field} must be an ISO 8601 datetime string')
+
+def parse_operation_row(data):
+    """Validate one operation of a bulk request and return its column values"""
+    missing = [field for field in ('operation_type', 'facility_name', 'operation_date') if not data.get(field)]
+    if missing:
+        raise ValueError(f"Missing required field(s): {', '.join(missing)}")
+    
+    return {
+        'operation_type': row_text(data, 'operation_type'),
+        'facility_name': row_text(data, 'facility_name'),
+        'facility_id': row_text(data, 'facility_id'),
+        'facility_address': row_text(data, 'facility_address'),
+        'operation_date': parse_iso_datetime(data['operation_date'], 'operation_date'),
+        'status': row_text(data, 'status', 'scheduled'),
+        'priority': row_text(data, 'priority', 'medium'),
+        'inspector': row_text(data, 'inspector'),
+        'notes': row_text(data, 'notes'),
+        'risk_level': row_text(data, 'risk_level', 'low')
+    }
+
+@pac_bp.route('/operations/bulk', methods=['POST'])
+def create_operations_bulk():
+    """Create many PAC operations in one transaction"""
+    try:
+        try:
+            rows = read_bulk_payload(request.get_json(), 'operations')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        report, status_code = bulk_create(PacOperation, rows, parse_operation_row)
+        return jsonify(report), status_code
         
     except Exception as e:
-        from app import db
+        from models import db
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
@@ -98,53 +275,55 @@ def create_operation():
 def update_operation(operation_id):
     """Update existing PAC operation"""
     try:
-        operation = PacOperation.query.get(operation_id)
-        if not operation:
-            return jsonify({'error': 'Operation not found'}), 404
-        
         data = request.get_json()
         
-        # Update fields
-        if 'operation_type' in data:
-            operation.operation_type = data['operation_type']
-        if 'facility_name' in data:
-            operation.facility_name = data['facility_name']
-        if 'facility_id' in data:
-            operation.facility_id = data['facility_id']
-        if 'facility_address' in data:
-            operation.facility_address = data['facility_address']
-        if 'operation_date' in data:
-            operation.operation_date = datetime.fromisoformat(data['operation_date'].replace('Z', '+00:00'))
-        if 'status' in data:
-            operation.status = data['status']
-            if data['status'] == 'completed':
-                operation.completed_at = datetime.utcnow()
-        if 'priority' in data:
-            operation.priority = data['priority']
-        if 'inspector' in data:
-            operation.inspector = data['inspector']
-        if 'notes' in data:
-            operation.notes = data['notes']
-        if 'findings' in data:
-            operation.findings = data['findings']
-        if 'risk_level' in data:
-            operation.risk_level = data['risk_level']
-        if 'compliance_status' in data:
-            operation.compliance_status = data['compliance_status']
-        
-        operation.updated_at = datetime.utcnow()
-        
-        from app import db
-        db.session.commit()
-        
-        return jsonify({
+        def update(session):
+            operation = session.get(PacOperation, operation_id)
+            if not operation:
+                raise NotFound('Operation not found')
+            
+            # Update fields
+            if 'operation_type' in data:
+                operation.operation_type = data['operation_type']
+            if 'facility_name' in data:
+                operation.facility_name = data['facility_name']
+            if 'facility_id' in data:
+                operation.facility_id = data['facility_id']
+            if 'facility_address' in data:
+                operation.facility_address = data['facility_address']
+            if 'operation_date' in data:
+                operation.operation_date = datetime.fromisoformat(data['operation_date'].replace('Z', '+00:00'))
+            if 'status' in data:
+                operation.status = data['status']
+                if data['status'] == 'completed':
+                    operation.completed_at = datetime.utcnow()
+            if 'priority' in data:
+                operation.priority = data['priority']
+            if 'inspector' in data:
+                operation.inspector = data['inspector']
+            if 'notes' in data:
+                operation.notes = data['notes']
+            if 'findings' in data:
+                operation.findings = data['findings']
+            if 'risk_level' in data:
+                operation.risk_level = data['risk_level']
+            if 'compliance_status' in data:
+                operation.compliance_status = data['compliance_status']
+            
+            operation.updated_at = datetime.utcnow()
+            session.flush()
+            return operation.to_dict()
+        
+        return json_response({
             'success': True,
             'message': 'Operation updated successfully',
-            'operation': operation.to_dict()
-        }), 200
-        
+            'operation': run_write(update)
+        })
+    
+    except NotFound as e:
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
-        from app import db
+        from models import db
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
@@ -152,39 +331,51 @@ def update_operation(operation_id):
 def delete_operation(operation_id):
     """Delete PAC operation"""
     try:
-        operation = PacOperation.query.get(operation_id)
-        if not operation:
-            return jsonify({'error': 'Operation not found'}), 404
+        def delete(session):
+            operation = session.get(PacOperation, operation_id)
+            if not operation:
+                raise NotFound('Operation not found')
+            session.delete(operation)
         
-        from app import db
-        db.session.delete(operation)
-        db.session.commit()
+        run_write(delete)
         
         return jsonify({
             'success': True,
             'message': 'Operation deleted successfully'
         }), 200
-        
+    
+    except NotFound as e:
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
-        from app import db
+        from models import db
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @pac_bp.route('/operations/<int:operation_id>/samples', methods=['GET'])
+@query_budget(3)
+@conditional_get(depends_on=('pac_operations', 'pac_samples'))
 def get_operation_samples(operation_id):
     """Get samples for specific operation"""
     try:
-        operation = PacOperation.query.get(operation_id)
-        if not operation:
+        try:
+            fields = parse_fields(request.args, PacSample)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if PacOperation.query.with_entities(PacOperation.id).filter(PacOperation.id == operation_id).first() is None:
             return jsonify({'error': 'Operation not found'}), 404
         
-        samples = PacSample.query.filter_by(operation_id=operation_id).all()
+        encoder = get_encoder(PacSample, fields)
+        rows = PacSample.query.filter_by(operation_id=operation_id) \
+            .with_entities(*encoder.columns) \
+            .order_by(PacSample.id) \
+            .all()
         
-        return jsonify({
+        return json_response({
             'success': True,
-            'samples': [sample.to_dict() for sample in samples],
-            'total': len(samples)
-        }), 200
+            'samples': encoder.encode_all(rows),
+            'total': len(rows)
+        })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -193,71 +384,290 @@ def get_operation_samples(operation_id):
 def create_sample(operation_id):
     """Create new sample for operation"""
     try:
-        operation = PacOperation.query.get(operation_id)
-        if not operation:
-            return jsonify({'error': 'Operation not found'}), 404
-        
         data = request.get_json()
         
-        sample = PacSample(
-            operation_id=operation_id,
-            sample_type=data.get('sample_type'),
-            sample_description=data.get('sample_description'),
-            sample_location=data.get('sample_location'),
-            test_type=data.get('test_type'),
-            lab_id=data.get('lab_id')
-        )
+        def create(session):
+            if session.get(PacOperation, operation_id) is None:
+                raise NotFound('Operation not found')
+            
+            sample = PacSample(
+                operation_id=operation_id,
+                sample_type=data.get('sample_type'),
+                sample_description=data.get('sample_description'),
+                sample_location=data.get('sample_location'),
+                test_type=data.get('test_type'),
+                lab_id=data.get('lab_id')
+            )
+            session.add(sample)
+            session.flush()
+            return sample.to_dict()
+        
+        return json_response({
+            'success': True,
+            'message': 'Sample created successfully',
+            'sample': run_write(create)
+        }, 201)
+    
+    except NotFound as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        from models import db
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@pac_bp.route('/samples/bulk', methods=['POST'])
+def create_samples_bulk():
+    """Create many samples, for any number of operations, in one transaction"""
+    try:
+        try:
+            rows = read_bulk_payload(request.get_json(), 'samples')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Look up every referenced operation with one query instead of per row
+        referenced = [row.get('operation_id') for row in rows if isinstance(row, dict)]
+        operation_ids = existing_ids(PacOperation.id, [ref for ref in referenced if is_id(ref)])
+        
+        def parse_sample_row(data):
+            if row_int(data, 'operation_id') not in operation_ids:
+                raise ValueError('operation_id must reference an existing operation')
+            if not data.get('sample_type'):
+                raise ValueError('Missing required field(s): sample_type')
+            return {
+                'operation_id': data['operation_id'],
+                'sample_type': row_text(data, 'sample_type'),
+                'sample_description': row_text(data, 'sample_description'),
+                'sample_location': row_text(data, 'sample_location'),
+                'test_type': row_text(data, 'test_type'),
+                'lab_id': row_text(data, 'lab_id')
+            }
         
-        from app import db
-        db.session.add(sample)
-        db.session.commit()
+        report, status_code = bulk_create(PacSample, rows, parse_sample_row)
+        return jsonify(report), status_code
         
-        return jsonify({
+    except Exception as e:
+        from models import db
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@pac_bp.route('/samples/export', methods=['GET'])
+def export_samples():
+    """Stream samples as NDJSON or CSV, optionally for one operation or status"""
+    try:
+        try:
+            export_format = parse_export_format(request.args)
+            operation_id = request.args.get('operation_id')
+            if operation_id is not None:
+                try:
+                    operation_id = int(operation_id)
+                except ValueError:
+                    raise ValueError('operation_id must be an integer')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        status = request.args.get('status')
+        
+        query = PacSample.query
+        if operation_id is not None:
+            query = query.filter(PacSample.operation_id == operation_id)
+        if status:
+            query = query.filter(PacSample.status == status)
+        
+        return stream_export(query.order_by(PacSample.id), PacSample, export_format, 'pac_samples')
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def apply_schedule_changes(session, changes):
+    """Write planned inspector changes, skipping operations that changed since they were planned"""
+    table = PacOperation.__table__
+    statement = update(table).where(
+        table.c.id == bindparam('operation_id'),
+        table.c.status == 'scheduled',
+        table.c.operation_date == bindparam('planned_date'),
+        table.c.inspector.is_not_distinct_from(bindparam('old_inspector')),
+        table.c.inspector_id.is_not_distinct_from(bindparam('old_inspector_id')),
+    ).values(inspector=bindparam('new_inspector'), inspector_id=bindparam('new_inspector_id'),
+             updated_at=datetime.utcnow())
+    result = session.execute(statement, [{
+        'operation_id': change['id'],
+        'planned_date': change['operation_date'],
+        'old_inspector': change['from']['inspector'],
+        'old_inspector_id': change['from']['inspector_id'],
+        'new_inspector': change['to']['inspector'],
+        'new_inspector_id': change['to']['inspector_id'],
+    } for change in changes])
+    # Core updates bypass the ORM flush hooks, so tell the response cache directly
+    mark_changed(session, table.name)
+    return result.rowcount
+
+@pac_bp.route('/schedule/optimize', methods=['POST'])
+def optimize_schedule():
+    """Plan conflict-free inspector assignments for the scheduled operations in a date window.
+
+    Returns the plan as a diff; it is only written when dry_run is false.
+    """
+    try:
+        # Everything up to the write reads from the reader pool, so planning a large
+        # window (and every dry run) leaves the single writer connection free
+        with read_only_session():
+            data = request.get_json(silent=True)
+            try:
+                if not isinstance(data, dict):
+                    raise ValueError('Request body must be a JSON object')
+                start, end = parse_window(data)
+                roster = parse_roster(data.get('inspectors'))
+                durations = parse_durations(data.get('durations'))
+                dry_run = data.get('dry_run', True)
+                keep_assignments = data.get('keep_assignments', True)
+                clear_unplaced = data.get('clear_unplaced', False)
+                if not all(isinstance(flag, bool) for flag in (dry_run, keep_assignments, clear_unplaced)):
+                    raise ValueError('dry_run, keep_assignments and clear_unplaced must be booleans')
+                user_ids = [inspector_id for _, inspector_id, _ in roster if inspector_id is not None]
+                unknown = set(user_ids) - existing_ids(User.id, user_ids)
+                if unknown:
+                    raise ValueError(f"Unknown inspector id(s): {', '.join(map(str, sorted(unknown)))}")
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            
+            rows = PacOperation.query.with_entities(
+                PacOperation.id, PacOperation.operation_type, PacOperation.operation_date, PacOperation.status,
+                PacOperation.priority, PacOperation.risk_level, PacOperation.inspector, PacOperation.inspector_id
+            ).filter(
+                PacOperation.operation_date >= datetime.combine(start, time.min),
+                PacOperation.operation_date < datetime.combine(end + timedelta(days=1), time.min),
+                PacOperation.status != 'cancelled'
+            ).all()
+        plan = plan_schedule(rows, roster, durations, keep_assignments, clear_unplaced)
+        
+        response = {
             'success': True,
-            'message': 'Sample created successfully',
-            'sample': sample.to_dict()
-        }), 201
+            'dry_run': dry_run,
+            'window': {'from': start, 'to': end},
+            **plan
+        }
+        if not dry_run:
+            changes = plan['changes']
+            applied = run_write(lambda session: apply_schedule_changes(session, changes)) if changes else 0
+            response['applied'] = applied
+            response['skipped'] = len(changes) - applied
+        return json_response(response)
         
     except Exception as e:
-        from app import db
+        from models import db
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def parse_calendar_dimensions(args):
+    """Read the comma separated by parameter (default every dimension), raising ValueError on unknown names"""
+    raw = args.get('by')
+    if raw is None:
+        return list(CALENDAR_DIMENSIONS)
+    by = {part.strip() for part in raw.split(',') if part.strip()}
+    unknown = by - set(CALENDAR_DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Unknown by value(s): {', '.join(sorted(unknown))}")
+    return [name for name in CALENDAR_DIMENSIONS if name in by]
+
+def calendar_counts(query, bucket, by):
+    """Count the operations of query per bucket, in total and per value of each dimension in by.
+
+    One statement: the filtered rows are reduced to their bucket and
+    dimension values once, then grouped per dimension in a UNION ALL, so
+    only the counts leave the database.
+    """
+    start = func.date(PacOperation.operation_date, *CALENDAR_BUCKETS[bucket]).label('bucket')
+    rows = query.with_entities(start, *(CALENDAR_DIMENSIONS[name].label(name) for name in by))
+    operations = rows.cte('calendar_operations')
+    groups = [select(operations.c.bucket, literal('total'), null(), func.count()).group_by(operations.c.bucket)]
+    for name in by:
+        column = operations.c[name]
+        groups.append(select(operations.c.bucket, literal(name), column, func.count())
+                      .group_by(operations.c.bucket, column))
+    
+    buckets = {}
+    for day, dimension, value, count in query.session.execute(union_all(*groups)):
+        entry = buckets.get(day)
+        if entry is None:
+            entry = buckets[day] = {'start': day, 'total': 0, **{name: {} for name in by}}
+            if 'inspector' in by:
+                entry['unassigned'] = 0
+        if dimension == 'total':
+            entry['total'] = count
+        elif value is None:
+            # Only inspector can be empty
+            entry['unassigned'] = count
+        else:
+            entry[dimension][value] = count
+    return [buckets[day] for day in sorted(buckets)]
+
+@pac_bp.route('/calendar', methods=['GET'])
+@query_budget(2)
+@conditional_get(depends_on=('pac_operations',))
+def get_operation_calendar():
+    """Get operation counts per day or week of a date range, by status, type and inspector"""
+    try:
+        try:
+            start, end = parse_date_range(request.args)
+            if not start or not end:
+                raise ValueError('from and to are required')
+            if (end - start).days >= CALENDAR_MAX_DAYS:
+                raise ValueError(f'The range can span at most {CALENDAR_MAX_DAYS} days')
+            bucket = request.args.get('bucket', 'day')
+            if bucket not in CALENDAR_BUCKETS:
+                raise ValueError(f"bucket must be one of: {', '.join(CALENDAR_BUCKETS)}")
+            by = parse_calendar_dimensions(request.args)
+            query, _ = filter_operations(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        buckets = calendar_counts(query, bucket, by)
+        return json_response({
+            'success': True,
+            'bucket': bucket,
+            'from': start,
+            'to': end,
+            'total': sum(entry['total'] for entry in buckets),
+            'buckets': buckets
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @pac_bp.route('/dashboard', methods=['GET'])
+@query_budget(3)
+@cached_response(depends_on=('pac_operations', 'pac_samples'))
 def get_pac_dashboard():
     """Get PAC operations dashboard statistics"""
     try:
-        # Get counts by status
-        total_operations = PacOperation.query.count()
-        scheduled_operations = PacOperation.query.filter_by(status='scheduled').count()
-        in_progress_operations = PacOperation.query.filter_by(status='in_progress').count()
-        completed_operations = PacOperation.query.filter_by(status='completed').count()
-        
-        # Get counts by type
-        inspections = PacOperation.query.filter_by(operation_type='inspection').count()
-        samplings = PacOperation.query.filter_by(operation_type='sampling').count()
-        audits = PacOperation.query.filter_by(operation_type='audit').count()
+        try:
+            include = parse_include(request.args, OPERATION_INCLUDES, OPERATION_INCLUDES)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Get high priority operations
-        high_priority = PacOperation.query.filter_by(priority='high').count()
+        # Get counts by status, type and priority from the maintained counters
+        counts = DashboardCounter.summary('pac_operations')
+        by_status = counts['status']
+        by_type = counts['kind']
         
         # Get recent operations
-        recent_operations = PacOperation.query.order_by(PacOperation.created_at.desc()).limit(5).all()
+        recent_query = load_children(PacOperation.query, PacOperation.samples, 'samples' in include)
+        recent_operations = recent_query.order_by(PacOperation.created_at.desc()).limit(5).all()
         
-        return jsonify({
+        return json_response({
             'success': True,
             'dashboard': {
-                'total_operations': total_operations,
-                'scheduled_operations': scheduled_operations,
-                'in_progress_operations': in_progress_operations,
-                'completed_operations': completed_operations,
-                'inspections': inspections,
-                'samplings': samplings,
-                'audits': audits,
-                'high_priority': high_priority,
-                'recent_operations': [operation.to_dict() for operation in recent_operations]
+                'total_operations': counts['total'],
+                'scheduled_operations': by_status.get('scheduled', 0),
+                'in_progress_operations': by_status.get('in_progress', 0),
+                'completed_operations': by_status.get('completed', 0),
+                'inspections': by_type.get('inspection', 0),
+                'samplings': by_type.get('sampling', 0),
+                'audits': by_type.get('audit', 0),
+                'high_priority': counts['priority'].get('high', 0),
+                'recent_operations': [operation.to_dict(include) for operation in recent_operations]
             }
-        }), 200
+        })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
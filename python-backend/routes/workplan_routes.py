@@ -1,55 +1,157 @@
 from flask import Blueprint, request, jsonify
-from datetime import datetime, date
-from models.workplan import Workplan, WorkplanTask, WorkplanSchema, WorkplanTaskSchema
+from datetime import datetime
+from models.workplan import Workplan, WorkplanTask
+from models.dashboard_counter import DashboardCounter
+from models.routing import route_reads
+from utils.pagination import parse_page_args, keyset_page
+from utils.loading import parse_include, parse_fields, load_children
+from utils.cache import cached_response
+from utils.search import SEARCH_INDEXES, match_expression, combine_expressions, ranked_page
+from utils.bulk import read_bulk_payload, existing_ids, bulk_create, is_id, row_int, row_text
+from utils.export import parse_export_format, stream_export
+from utils.etag import conditional_get
+from utils.query_guard import query_budget
+from utils.serializer import get_encoder, children_by_parent, json_response
+from utils.write_queue import run_write, NotFound
 
 workplan_bp = Blueprint('workplan', __name__)
-workplan_schema = WorkplanSchema()
-workplans_schema = WorkplanSchema(many=True)
-task_schema = WorkplanTaskSchema()
-tasks_schema = WorkplanTaskSchema(many=True)
+# GET handlers read through the read-only connection pool
+route_reads(workplan_bp)
+
+WORKPLAN_INCLUDES = ('tasks', 'counts')
+# List pages default to the stored counts, so listing workplans never reads workplan_tasks
+WORKPLAN_LIST_INCLUDES = ('counts',)
+WORKPLAN_SEARCH = SEARCH_INDEXES['workplans']
+
+def workplan_fields(args, include, default=None):
+    """The workplan fields to return; include=counts adds the stored task rollups"""
+    extra = Workplan.rollup_fields if 'counts' in include else ()
+    return parse_fields(args, Workplan, default, extra)
+
+def encode_workplan_rows(encoder, rows, include):
+    """Encode workplan column rows, adding their tasks with one query when included.
+
+    Task counts need no query; they are rollup columns of the rows themselves.
+    """
+    workplans = encoder.encode_all(rows)
+    if 'tasks' in include:
+        tasks = children_by_parent(get_encoder(WorkplanTask), WorkplanTask.workplan_id,
+                                   [workplan['id'] for workplan in workplans])
+        for workplan in workplans:
+            workplan['tasks'] = tasks[workplan['id']]
+    return workplans
+
+def filter_workplans(args):
+    """Build the workplans query for the list filters in args.
+
+    Returns the filtered query and, when q= is given, the (unfiltered query,
+    MATCH expression) pair a relevance-ranked search needs. Raises ValueError
+    for search text without any searchable words.
+    """
+    # Get query parameters
+    status = args.get('status')
+    priority = args.get('priority')
+    assigned_to = args.get('assigned_to')
+    search_text = args.get('q')
+    
+    search = match_expression(search_text) if search_text is not None else None
+    assigned_search = match_expression(assigned_to, 'assigned_to') if assigned_to else None
+    
+    # Build query
+    query = Workplan.query
+    
+    if status:
+        query = query.filter(Workplan.status == status)
+    if priority:
+        query = query.filter(Workplan.priority == priority)
+    
+    # Free-text criteria go through the FTS5 index instead of LIKE scans
+    base_query = query
+    search_expression = combine_expressions(search, assigned_search)
+    if search_expression:
+        query = query.filter(WORKPLAN_SEARCH.match(Workplan.id, search_expression))
+    
+    return query, (base_query, search_expression) if search else None
 
 @workplan_bp.route('/', methods=['GET'])
+@query_budget(4)
+@conditional_get(depends_on=('workplans', 'workplan_tasks'))
 def get_workplans():
-    """Get all workplans with optional filtering"""
+    """Get a page of workplans with optional filtering and full-text search"""
     try:
-        # Get query parameters
-        status = request.args.get('status')
-        priority = request.args.get('priority')
-        assigned_to = request.args.get('assigned_to')
-        
-        # Build query
-        query = Workplan.query
+        try:
+            limit, after, include_total = parse_page_args(request.args, Workplan.created_at)
+            include = parse_include(request.args, WORKPLAN_INCLUDES, WORKPLAN_LIST_INCLUDES)
+            fields = workplan_fields(request.args, include, Workplan.list_fields)
+            query, ranked = filter_workplans(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Select column tuples only; no ORM instances are built for list pages.
+        # The cursor needs created_at even when fields= leaves it out
+        encoder = get_encoder(Workplan, fields)
+        columns = encoder.select_columns(Workplan.created_at)
+        if ranked:
+            # q= results are ordered best match first; ranking needs the MATCH as a join
+            base_query, search_expression = ranked
+            rows, next_cursor = ranked_page(base_query.with_entities(*columns), Workplan,
+                                            WORKPLAN_SEARCH, search_expression, after, limit)
+        else:
+            rows, next_cursor = keyset_page(query.with_entities(*columns), Workplan.created_at,
+                                            Workplan.id, after, limit)
+        
+        response = {
+            'success': True,
+            'workplans': encode_workplan_rows(encoder, rows, include),
+            'limit': limit,
+            'next_cursor': next_cursor
+        }
+        # Counting the whole filtered table is expensive, so only do it on request
+        if include_total:
+            response['total'] = query.count()
         
-        if status:
-            query = query.filter(Workplan.status == status)
-        if priority:
-            query = query.filter(Workplan.priority == priority)
-        if assigned_to:
-            query = query.filter(Workplan.assigned_to.ilike(f'%{assigned_to}%'))
+        return json_response(response)
         
-        workplans = query.order_by(Workplan.created_at.desc()).all()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@workplan_bp.route('/export', methods=['GET'])
+def export_workplans():
+    """Stream every workplan matching the list filters as NDJSON or CSV"""
+    try:
+        try:
+            export_format = parse_export_format(request.args)
+            query, _ = filter_workplans(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        return jsonify({
-            'success': True,
-            'workplans': [workplan.to_dict() for workplan in workplans],
-            'total': len(workplans)
-        }), 200
+        query = query.order_by(Workplan.created_at.desc(), Workplan.id.desc())
+        return stream_export(query, Workplan, export_format, 'workplans')
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @workplan_bp.route('/<int:workplan_id>', methods=['GET'])
+@query_budget(3)
+@conditional_get(depends_on=('workplans', 'workplan_tasks'))
 def get_workplan(workplan_id):
     """Get specific workplan by ID"""
     try:
-        workplan = Workplan.query.get(workplan_id)
-        if not workplan:
+        try:
+            include = parse_include(request.args, WORKPLAN_INCLUDES, WORKPLAN_INCLUDES)
+            fields = workplan_fields(request.args, include)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        encoder = get_encoder(Workplan, fields)
+        row = Workplan.query.with_entities(*encoder.columns).filter(Workplan.id == workplan_id).first()
+        if row is None:
             return jsonify({'error': 'Workplan not found'}), 404
         
-        return jsonify({
+        return json_response({
             'success': True,
-            'workplan': workplan.to_dict()
-        }), 200
+            'workplan': encode_workplan_rows(encoder, [row], include)[0]
+        })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -68,29 +170,29 @@ def create_workplan():
         if data.get('end_date'):
             end_date = datetime.strptime(data['end_date'], '%Y-%m-%d').date()
         
-        workplan = Workplan(
-            title=data.get('title'),
-            description=data.get('description'),
-            status=data.get('status', 'planned'),
-            priority=data.get('priority', 'medium'),
-            start_date=start_date,
-            end_date=end_date,
-            assigned_to=data.get('assigned_to'),
-            progress=data.get('progress', 0)
-        )
-        
-        from app import db
-        db.session.add(workplan)
-        db.session.commit()
-        
-        return jsonify({
+        def create(session):
+            workplan = Workplan(
+                title=data.get('title'),
+                description=data.get('description'),
+                status=data.get('status', 'planned'),
+                priority=data.get('priority', 'medium'),
+                start_date=start_date,
+                end_date=end_date,
+                assigned_to=data.get('assigned_to'),
+                progress=data.get('progress', 0)
+            )
+            session.add(workplan)
+            session.flush()
+            return workplan.to_dict()
+        
+        return json_response({
             'success': True,
             'message': 'Workplan created successfully',
-            'workplan': workplan.to_dict()
-        }), 201
+            'workplan': run_write(create)
+        }, 201)
         
     except Exception as e:
-        from app import db
+        from models import db
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
@@ -98,43 +200,48 @@ def create_workplan():
 def update_workplan(workplan_id):
     """Update existing workplan"""
     try:
-        workplan = Workplan.query.get(workplan_id)
-        if not workplan:
-            return jsonify({'error': 'Workplan not found'}), 404
-        
         data = request.get_json()
         
-        # Update fields
-        if 'title' in data:
-            workplan.title = data['title']
-        if 'description' in data:
-            workplan.description = data['description']
-        if 'status' in data:
-            workplan.status = data['status']
-        if 'priority' in data:
-            workplan.priority = data['priority']
-        if 'start_date' in data:
-            workplan.start_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date() if data['start_date'] else None
-        if 'end_date' in data:
-            workplan.end_date = datetime.strptime(data['end_date'], '%Y-%m-%d').date() if data['end_date'] else None
-        if 'assigned_to' in data:
-            workplan.assigned_to = data['assigned_to']
-        if 'progress' in data:
-            workplan.progress = data['progress']
-        
-        workplan.updated_at = datetime.utcnow()
-        
-        from app import db
-        db.session.commit()
-        
-        return jsonify({
+        def update(session):
+            workplan = session.get(Workplan, workplan_id)
+            if not workplan:
+                raise NotFound('Workplan not found')
+            
+            # Update fields
+            if 'title' in data:
+                workplan.title = data['title']
+            if 'description' in data:
+                workplan.description = data['description']
+            if 'status' in data:
+                workplan.status = data['status']
+            if 'priority' in data:
+                workplan.priority = data['priority']
+            if 'start_date' in data:
+                workplan.start_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date() if data['start_date'] else None
+            if 'end_date' in data:
+                workplan.end_date = datetime.strptime(data['end_date'], '%Y-%m-%d').date() if data['end_date'] else None
+            if 'assigned_to' in data:
+                workplan.assigned_to = data['assigned_to']
+            if 'progress' in data:
+                workplan.progress = data['progress']
+            
+            workplan.updated_at = datetime.utcnow()
+            session.flush()
+            if 'progress' in data:
+                # A workplan with tasks keeps the progress derived from them (models/rollups.py)
+                session.refresh(workplan, ['progress'])
+            return workplan.to_dict()
+        
+        return json_response({
             'success': True,
             'message': 'Workplan updated successfully',
-            'workplan': workplan.to_dict()
-        }), 200
-        
+            'workplan': run_write(update)
+        })
+    
+    except NotFound as e:
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
-        from app import db
+        from models import db
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
@@ -142,39 +249,51 @@ def update_workplan(workplan_id):
 def delete_workplan(workplan_id):
     """Delete workplan"""
     try:
-        workplan = Workplan.query.get(workplan_id)
-        if not workplan:
-            return jsonify({'error': 'Workplan not found'}), 404
+        def delete(session):
+            workplan = session.get(Workplan, workplan_id)
+            if not workplan:
+                raise NotFound('Workplan not found')
+            session.delete(workplan)
         
-        from app import db
-        db.session.delete(workplan)
-        db.session.commit()
+        run_write(delete)
         
         return jsonify({
             'success': True,
             'message': 'Workplan deleted successfully'
         }), 200
-        
+    
+    except NotFound as e:
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
-        from app import db
+        from models import db
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @workplan_bp.route('/<int:workplan_id>/tasks', methods=['GET'])
+@query_budget(3)
+@conditional_get(depends_on=('workplans', 'workplan_tasks'))
 def get_workplan_tasks(workplan_id):
     """Get tasks for specific workplan"""
     try:
-        workplan = Workplan.query.get(workplan_id)
-        if not workplan:
+        try:
+            fields = parse_fields(request.args, WorkplanTask)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if Workplan.query.with_entities(Workplan.id).filter(Workplan.id == workplan_id).first() is None:
             return jsonify({'error': 'Workplan not found'}), 404
         
-        tasks = WorkplanTask.query.filter_by(workplan_id=workplan_id).all()
+        encoder = get_encoder(WorkplanTask, fields)
+        rows = WorkplanTask.query.filter_by(workplan_id=workplan_id) \
+            .with_entities(*encoder.columns) \
+            .order_by(WorkplanTask.id) \
+            .all()
         
-        return jsonify({
+        return json_response({
             'success': True,
-            'tasks': [task.to_dict() for task in tasks],
-            'total': len(tasks)
-        }), 200
+            'tasks': encoder.encode_all(rows),
+            'total': len(rows)
+        })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -183,10 +302,6 @@ def get_workplan_tasks(workplan_id):
 def create_workplan_task(workplan_id):
     """Create new task for workplan"""
     try:
-        workplan = Workplan.query.get(workplan_id)
-        if not workplan:
-            return jsonify({'error': 'Workplan not found'}), 404
-        
         data = request.get_json()
         
         # Parse due date
@@ -194,59 +309,113 @@ def create_workplan_task(workplan_id):
         if data.get('due_date'):
             due_date = datetime.strptime(data['due_date'], '%Y-%m-%d').date()
         
-        task = WorkplanTask(
-            workplan_id=workplan_id,
-            title=data.get('title'),
-            description=data.get('description'),
-            status=data.get('status', 'pending'),
-            priority=data.get('priority', 'medium'),
-            due_date=due_date,
-            assigned_to=data.get('assigned_to'),
-            progress=data.get('progress', 0)
-        )
-        
-        from app import db
-        db.session.add(task)
-        db.session.commit()
-        
-        return jsonify({
+        def create(session):
+            if session.get(Workplan, workplan_id) is None:
+                raise NotFound('Workplan not found')
+            
+            task = WorkplanTask(
+                workplan_id=workplan_id,
+                title=data.get('title'),
+                description=data.get('description'),
+                status=data.get('status', 'pending'),
+                priority=data.get('priority', 'medium'),
+                due_date=due_date,
+                assigned_to=data.get('assigned_to'),
+                progress=data.get('progress', 0)
+            )
+            session.add(task)
+            session.flush()
+            return task.to_dict()
+        
+        return json_response({
             'success': True,
             'message': 'Task created successfully',
-            'task': task.to_dict()
-        }), 201
+            'task': run_write(create)
+        }, 201)
+    
+    except NotFound as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        from models import db
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@workplan_bp.route('/tasks/bulk', methods=['POST'])
+def create_workplan_tasks_bulk():
+    """Create many tasks, for any number of workplans, in one transaction"""
+    try:
+        try:
+            rows = read_bulk_payload(request.get_json(), 'tasks')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Look up every referenced workplan with one query instead of per row
+        referenced = [row.get('workplan_id') for row in rows if isinstance(row, dict)]
+        workplan_ids = existing_ids(Workplan.id, [ref for ref in referenced if is_id(ref)])
+        
+        def parse_task_row(data):
+            if row_int(data, 'workplan_id') not in workplan_ids:
+                raise ValueError('workplan_id must reference an existing workplan')
+            if not data.get('title'):
+                raise ValueError('Missing required field(s): title')
+            due_date = None
+            if data.get('due_date'):
+                try:
+                    due_date = datetime.strptime(data['due_date'], '%Y-%m-%d').date()
+                except (TypeError, ValueError):
+                    raise ValueError('due_date must be a YYYY-MM-DD date')
+            progress = row_int(data, 'progress', 0)
+            if not 0 <= progress <= 100:
+                raise ValueError('progress must be between 0 and 100')
+            return {
+                'workplan_id': data['workplan_id'],
+                'title': row_text(data, 'title'),
+                'description': row_text(data, 'description'),
+                'status': row_text(data, 'status', 'pending'),
+                'priority': row_text(data, 'priority', 'medium'),
+                'due_date': due_date,
+                'assigned_to': row_text(data, 'assigned_to'),
+                'progress': progress
+            }
+        
+        report, status_code = bulk_create(WorkplanTask, rows, parse_task_row)
+        return jsonify(report), status_code
         
     except Exception as e:
-        from app import db
+        from models import db
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @workplan_bp.route('/dashboard', methods=['GET'])
+@query_budget(3)
+@cached_response(depends_on=('workplans', 'workplan_tasks'))
 def get_dashboard_data():
     """Get workplan dashboard statistics"""
     try:
-        # Get counts by status
-        total_workplans = Workplan.query.count()
-        active_workplans = Workplan.query.filter_by(status='active').count()
-        completed_workplans = Workplan.query.filter_by(status='completed').count()
-        planned_workplans = Workplan.query.filter_by(status='planned').count()
+        try:
+            include = parse_include(request.args, WORKPLAN_INCLUDES, WORKPLAN_INCLUDES)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Get high priority workplans
-        high_priority = Workplan.query.filter_by(priority='high').count()
+        # Get counts by status and priority from the maintained counters
+        counts = DashboardCounter.summary('workplans')
+        by_status = counts['status']
         
         # Get recent workplans
-        recent_workplans = Workplan.query.order_by(Workplan.created_at.desc()).limit(5).all()
+        recent_query = load_children(Workplan.query, Workplan.tasks, 'tasks' in include)
+        recent_workplans = recent_query.order_by(Workplan.created_at.desc()).limit(5).all()
         
-        return jsonify({
+        return json_response({
             'success': True,
             'dashboard': {
-                'total_workplans': total_workplans,
-                'active_workplans': active_workplans,
-                'completed_workplans': completed_workplans,
-                'planned_workplans': planned_workplans,
-                'high_priority': high_priority,
-                'recent_workplans': [workplan.to_dict() for workplan in recent_workplans]
+                'total_workplans': counts['total'],
+                'active_workplans': by_status.get('active', 0),
+                'completed_workplans': by_status.get('completed', 0),
+                'planned_workplans': by_status.get('planned', 0),
+                'high_priority': counts['priority'].get('high', 0),
+                'recent_workplans': [workplan.to_dict(include) for workplan in recent_workplans]
             }
-        }), 200
+        })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
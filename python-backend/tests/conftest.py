@@ -0,0 +1,54 @@
+"""Shared fixtures: the app bound to a throwaway database with a small dataset"""
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+# The benchmark scripts import their helpers as `common`; tests reuse their route tables
+for path in (BACKEND_DIR, os.path.join(BACKEND_DIR, 'benchmarks')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from common import load_app, seed
+
+@pytest.fixture(scope='session')
+def app_module():
+    app_module = load_app()
+    with app_module.app.app_context():
+        seed(app_module.db, workplans=20, operations=20)
+    return app_module
+
+@pytest.fixture
+def app(app_module):
+    """The app, with any config a test changes put back afterwards"""
+    app = app_module.app
+    saved = dict(app.config)
+    yield app
+    app.config.clear()
+    app.config.update(saved)
+
+@pytest.fixture
+def client(app):
+    from utils.cache import response_cache
+    response_cache.clear()
+    return app.test_client()
+
+@pytest.fixture
+def sql_trace(app):
+    """Every statement SQLite runs on the writer engine's connections, including BEGIN and COMMIT"""
+    from sqlalchemy import event
+    from models import db
+
+    statements = []
+
+    def trace(dbapi_connection, connection_record):
+        dbapi_connection.set_trace_callback(statements.append)
+
+    with app.app_context():
+        engine = db.engine
+    engine.dispose()
+    event.listen(engine, 'connect', trace)
+    yield statements
+    event.remove(engine, 'connect', trace)
+    engine.dispose()
@@ -0,0 +1,95 @@
+import pytest
+from itsdangerous import URLSafeTimedSerializer
+
+from models import db
+from models.user import User
+from utils.auth import TOKEN_SALT, current_user, principal_cache
+
+PASSWORD = 'field-check-1'
+
+@pytest.fixture
+def user(app):
+    """An active user, deleted afterwards"""
+    principal_cache.clear()
+    with app.app_context():
+        account = User(username='auth-check', email='auth-check@example.com', full_name='Auth Check', role='user')
+        account.set_password(PASSWORD)
+        db.session.add(account)
+        db.session.commit()
+        user_id = account.id
+        db.session.remove()
+    yield user_id
+    with app.app_context():
+        User.query.filter_by(id=user_id).delete()
+        db.session.commit()
+    principal_cache.clear()
+
+def login(client, password=PASSWORD):
+    return client.post('/api/auth/login', json={'username': 'auth-check', 'password': password})
+
+def profile(app, token):
+    # A fresh client, so the session cookie set by login does not authenticate it
+    return app.test_client().get('/api/auth/profile', headers={'Authorization': f'Bearer {token}'})
+
+def deactivate(app, user_id):
+    with app.app_context():
+        db.session.get(User, user_id).is_active = False
+        db.session.commit()
+        db.session.remove()
+
+def test_valid_token_authenticates(app, client, user):
+    response = login(client)
+    token = response.get_json()['token']
+
+    assert response.status_code == 200
+    result = profile(app, token)
+    assert result.status_code == 200
+    assert result.get_json()['user']['id'] == user
+
+def test_expired_token_is_rejected(app, client, user):
+    token = login(client).get_json()['token']
+    app.config['AUTH_TOKEN_MAX_AGE'] = -1
+
+    assert profile(app, token).status_code == 401
+
+def test_tampered_token_is_rejected(app, client, user):
+    token = login(client).get_json()['token']
+    payload, _, signature = token.partition('.')
+    tampered = ('B' if payload[0] != 'B' else 'C') + payload[1:] + '.' + signature
+
+    assert profile(app, tampered).status_code == 401
+
+def test_token_signed_with_another_key_is_rejected(app, user):
+    forged = URLSafeTimedSerializer('not-the-secret', salt=TOKEN_SALT).dumps(
+        {'uid': user, 'usr': 'auth-check', 'role': 'admin'})
+
+    assert profile(app, forged).status_code == 401
+
+def test_without_a_secret_key_no_token_is_issued_or_accepted(app, client, user):
+    token = login(client).get_json()['token']
+    app.config['SECRET_KEY'] = None
+
+    assert login(client).status_code == 500
+    assert profile(app, token).status_code == 500
+
+def test_wrong_password_is_rejected(client, user):
+    assert login(client, 'not-the-password').status_code == 401
+
+def test_deactivated_user_resolves_to_none(app, client, user):
+    token = login(client).get_json()['token']
+    # Fill the principal cache
+    assert profile(app, token).status_code == 200
+
+    deactivate(app, user)
+
+    with app.test_request_context(headers={'Authorization': f'Bearer {token}'}):
+        assert current_user() is None
+    assert profile(app, token).status_code == 401
+
+def test_deactivated_user_cannot_log_in(app, client, user):
+    deactivate(app, user)
+
+    response = login(client)
+
+    assert response.status_code == 403
+    assert response.get_json()['error'] == 'Account is deactivated'
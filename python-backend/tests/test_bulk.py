@@ -0,0 +1,110 @@
+import pytest
+
+from models import db
+from models.pac_operation import PacOperation, PacSample
+from models.workplan import WorkplanTask
+
+MARKER = 'Bulk report check'
+
+@pytest.fixture(autouse=True)
+def cleanup(app):
+    yield
+    with app.app_context():
+        PacSample.query.filter_by(sample_type=MARKER).delete()
+        PacOperation.query.filter_by(facility_name=MARKER).delete()
+        WorkplanTask.query.filter_by(title=MARKER).delete()
+        db.session.commit()
+
+def operation(**fields):
+    return {'operation_type': 'audit', 'facility_name': MARKER, 'operation_date': '2030-07-01T09:00:00', **fields}
+
+def errors(report):
+    return {result['index']: result['error'] for result in report['results'] if not result['success']}
+
+def created(app, model, **filters):
+    with app.app_context():
+        count = model.query.filter_by(**filters).count()
+        db.session.remove()
+    return count
+
+def test_all_valid_rows_are_created(app, client):
+    response = client.post('/api/pac/operations/bulk', json={'operations': [operation(), operation()]})
+
+    assert response.status_code == 201
+    report = response.get_json()
+    assert (report['success'], report['created'], report['failed']) == (True, 2, 0)
+    assert all(result['success'] and result['id'] for result in report['results'])
+    assert created(app, PacOperation, facility_name=MARKER) == 2
+
+@pytest.mark.parametrize('bad_row, error', [
+    (operation(facility_name={'bad': 1}), 'facility_name must be a string'),
+    (operation(notes=['a', 'b']), 'notes must be a string'),
+    (operation(status=7), 'status must be a string'),
+    (operation(operation_date=20300701), 'operation_date must be an ISO 8601 datetime string'),
+    ({'operation_type': 'audit'}, 'Missing required field(s): facility_name, operation_date'),
+    ('not an object', 'Row must be a JSON object'),
+])
+def test_invalid_rows_are_reported_and_the_rest_created(app, client, bad_row, error):
+    response = client.post('/api/pac/operations/bulk', json={'operations': [operation(), bad_row, operation()]})
+
+    assert response.status_code == 207
+    report = response.get_json()
+    assert (report['success'], report['created'], report['failed']) == (False, 2, 1)
+    assert errors(report) == {1: error}
+    assert created(app, PacOperation, facility_name=MARKER) == 2
+
+def test_null_uses_the_column_default(app, client):
+    response = client.post('/api/pac/operations/bulk', json={'operations': [operation(status=None)]})
+
+    assert response.status_code == 201
+    with app.app_context():
+        assert PacOperation.query.filter_by(facility_name=MARKER).one().status == 'scheduled'
+        db.session.remove()
+
+def test_no_valid_rows_is_a_bad_request(app, client):
+    response = client.post('/api/pac/operations/bulk', json=[operation(facility_name=1)])
+
+    assert response.status_code == 400
+    assert errors(response.get_json()) == {0: 'facility_name must be a string'}
+    assert created(app, PacOperation, facility_name=MARKER) == 0
+
+@pytest.mark.parametrize('body', [{}, {'operations': []}, {'operations': {'facility_name': MARKER}}])
+def test_malformed_body_is_a_bad_request(client, body):
+    response = client.post('/api/pac/operations/bulk', json=body)
+
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+def test_sample_references_must_be_integer_ids(app, client):
+    rows = [{'operation_id': 1, 'sample_type': MARKER},
+            {'operation_id': True, 'sample_type': MARKER},
+            {'operation_id': '1', 'sample_type': MARKER},
+            {'operation_id': 1, 'sample_type': MARKER, 'lab_id': 42}]
+
+    response = client.post('/api/pac/samples/bulk', json={'samples': rows})
+
+    assert response.status_code == 207
+    assert errors(response.get_json()) == {
+        1: 'operation_id must be an integer',
+        2: 'operation_id must be an integer',
+        3: 'lab_id must be a string',
+    }
+    assert created(app, PacSample, sample_type=MARKER) == 1
+
+def test_task_rows_are_type_checked(app, client):
+    rows = [{'workplan_id': 1, 'title': MARKER, 'progress': 40},
+            {'workplan_id': False, 'title': MARKER},
+            {'workplan_id': 1, 'title': MARKER, 'progress': '40'},
+            {'workplan_id': 1, 'title': MARKER, 'progress': 140},
+            {'workplan_id': 1, 'title': MARKER, 'assigned_to': {'team': 'a'}}]
+
+    response = client.post('/api/workplans/tasks/bulk', json={'tasks': rows})
+
+    assert response.status_code == 207
+    assert errors(response.get_json()) == {
+        1: 'workplan_id must be an integer',
+        2: 'progress must be an integer',
+        3: 'progress must be between 0 and 100',
+        4: 'assigned_to must be a string',
+    }
+    assert created(app, WorkplanTask, title=MARKER) == 1
@@ -0,0 +1,138 @@
+import itertools
+
+import pytest
+from sqlalchemy import update
+
+import utils.cache
+from models import db
+from models.pac_operation import PacOperation, PacSample
+from models.workplan import Workplan, WorkplanTask
+from utils.cache import ResponseCache, mark_changed
+
+# Dashboard -> its tagged tables, each with the model and a text column a test may rewrite
+DASHBOARDS = {
+    '/api/workplans/dashboard': {'workplans': (Workplan, 'description'),
+                                 'workplan_tasks': (WorkplanTask, 'description')},
+    '/api/pac/dashboard': {'pac_operations': (PacOperation, 'notes'),
+                           'pac_samples': (PacSample, 'results')},
+}
+TAGGED = [(url, table) for url, tables in DASHBOARDS.items() for table in tables]
+revisions = itertools.count()
+
+def cache_status(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    return response.headers['X-Cache']
+
+def write_with_orm(app, model, column):
+    with app.app_context():
+        row = model.query.order_by(model.id).first()
+        setattr(row, column, f'cache check {next(revisions)}')
+        db.session.commit()
+        db.session.remove()
+
+def write_with_core(app, model, column, mark=True):
+    with app.app_context():
+        db.session.execute(update(model).where(model.id == 1).values({column: f'cache check {next(revisions)}'}))
+        if mark:
+            mark_changed(db.session, model.__tablename__)
+        db.session.commit()
+        db.session.remove()
+
+def test_repeated_dashboard_is_a_hit(client):
+    for url in DASHBOARDS:
+        assert cache_status(client, url) == 'MISS'
+        assert cache_status(client, url) == 'HIT'
+
+@pytest.mark.parametrize('url, table', TAGGED)
+def test_orm_commit_to_a_tagged_table_drops_the_entry(app, client, url, table):
+    cache_status(client, url)
+
+    write_with_orm(app, *DASHBOARDS[url][table])
+
+    assert cache_status(client, url) == 'MISS'
+
+@pytest.mark.parametrize('url, table', TAGGED)
+def test_marked_core_write_drops_the_entry(app, client, url, table):
+    cache_status(client, url)
+
+    write_with_core(app, *DASHBOARDS[url][table])
+
+    assert cache_status(client, url) == 'MISS'
+
+def test_unmarked_core_write_is_not_seen(app, client):
+    # Why Core writers must call mark_changed: the commit hooks only see ORM changes
+    cache_status(client, '/api/pac/dashboard')
+
+    write_with_core(app, PacOperation, 'notes', mark=False)
+
+    assert cache_status(client, '/api/pac/dashboard') == 'HIT'
+
+def test_untagged_table_leaves_the_entry(app, client):
+    cache_status(client, '/api/pac/dashboard')
+
+    write_with_orm(app, Workplan, 'description')
+
+    assert cache_status(client, '/api/pac/dashboard') == 'HIT'
+
+def test_rolled_back_changes_leave_the_entry(app, client):
+    cache_status(client, '/api/pac/dashboard')
+    with app.app_context():
+        PacOperation.query.order_by(PacOperation.id).first().notes = 'never committed'
+        db.session.flush()
+        db.session.rollback()
+        db.session.remove()
+
+    assert cache_status(client, '/api/pac/dashboard') == 'HIT'
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+def test_entries_expire_after_their_ttl(app, client, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(utils.cache, 'time', clock)
+    app.config['RESPONSE_CACHE_TTL'] = 30
+    cache_status(client, '/api/pac/dashboard')
+
+    clock.now += 29
+    assert cache_status(client, '/api/pac/dashboard') == 'HIT'
+    clock.now += 2
+    assert cache_status(client, '/api/pac/dashboard') == 'MISS'
+
+def test_value_computed_before_an_invalidation_is_not_stored():
+    cache = ResponseCache()
+    generation = cache.generation(['pac_operations'])
+    # A commit lands while the value is being computed
+    cache.invalidate(['pac_operations'])
+
+    cache.set('dashboard', 'stale', ['pac_operations'], 30, generation)
+
+    assert cache.get('dashboard') is None
+    cache.set('dashboard', 'fresh', ['pac_operations'], 30, cache.generation(['pac_operations']))
+    assert cache.get('dashboard') == 'fresh'
+
+def test_dashboard_computed_during_a_commit_is_not_stored(app, client, monkeypatch):
+    from models.dashboard_counter import DashboardCounter
+    summary = DashboardCounter.summary
+
+    def summary_then_write(table):
+        counts = summary(table)
+        write_with_orm(app, PacOperation, 'notes')
+        return counts
+
+    monkeypatch.setattr(DashboardCounter, 'summary', staticmethod(summary_then_write))
+    assert cache_status(client, '/api/pac/dashboard') == 'MISS'
+    monkeypatch.undo()
+
+    assert cache_status(client, '/api/pac/dashboard') == 'MISS'
+
+def test_full_cache_evicts_the_oldest_entry():
+    cache = ResponseCache(max_entries=2)
+    for key in ('a', 'b', 'c'):
+        cache.set(key, key.upper(), ['t'], 30, cache.generation(['t']))
+
+    assert [cache.get(key) for key in ('a', 'b', 'c')] == [None, 'B', 'C']
@@ -0,0 +1,148 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from models import db
+from models.pac_operation import PacOperation
+
+# (operation_date, type, status, inspector); 2031-03-03 and 2031-03-10 are Mondays
+OPERATIONS = [
+    (datetime(2031, 3, 2, 10, 0), 'audit', 'scheduled', 'Ann Lee'),
+    (datetime(2031, 3, 3, 8, 0), 'inspection', 'scheduled', 'Ann Lee'),
+    (datetime(2031, 3, 5, 0, 0), 'inspection', 'scheduled', 'Ann Lee'),
+    (datetime(2031, 3, 5, 17, 30), 'audit', 'completed', None),
+    (datetime(2031, 3, 9, 23, 59), 'sampling', 'scheduled', 'Ben Ode'),
+    (datetime(2031, 3, 10, 0, 0), 'inspection', 'in_progress', 'Ben Ode'),
+    (datetime(2031, 3, 11, 12, 0), 'audit', 'scheduled', None),
+    (datetime(2031, 3, 12, 9, 0), 'audit', 'scheduled', 'Ann Lee'),
+]
+
+@pytest.fixture
+def operations(app):
+    """The operations above, keyed by their date; no other test schedules anything in 2031"""
+    with app.app_context():
+        rows = [PacOperation(operation_date=when, operation_type=kind, status=status, inspector=inspector,
+                             facility_name='Calendar check') for when, kind, status, inspector in OPERATIONS]
+        db.session.add_all(rows)
+        db.session.commit()
+        ids = {row.operation_date: row.id for row in rows}
+        db.session.remove()
+    yield ids
+    with app.app_context():
+        PacOperation.query.filter(PacOperation.id.in_(ids.values())).delete()
+        db.session.commit()
+
+def calendar(client, query):
+    response = client.get(f'/api/pac/calendar?{query}')
+    assert response.status_code == 200
+    return response.get_json()
+
+def ids_between(operations, first, last):
+    """The ids of the operations from the first to the last listed date, newest first"""
+    dates = [when for when, *_ in OPERATIONS]
+    return [operations[when] for when in reversed(dates[dates.index(first):dates.index(last) + 1])]
+
+def test_day_buckets(client, operations):
+    body = calendar(client, 'from=2031-03-05&to=2031-03-11')
+
+    assert (body['bucket'], body['from'], body['to'], body['total']) == ('day', '2031-03-05', '2031-03-11', 5)
+    assert body['buckets'] == [
+        {'start': '2031-03-05', 'total': 2, 'status': {'scheduled': 1, 'completed': 1},
+         'type': {'inspection': 1, 'audit': 1}, 'inspector': {'Ann Lee': 1}, 'unassigned': 1},
+        {'start': '2031-03-09', 'total': 1, 'status': {'scheduled': 1},
+         'type': {'sampling': 1}, 'inspector': {'Ben Ode': 1}, 'unassigned': 0},
+        {'start': '2031-03-10', 'total': 1, 'status': {'in_progress': 1},
+         'type': {'inspection': 1}, 'inspector': {'Ben Ode': 1}, 'unassigned': 0},
+        {'start': '2031-03-11', 'total': 1, 'status': {'scheduled': 1},
+         'type': {'audit': 1}, 'inspector': {}, 'unassigned': 1},
+    ]
+
+def test_weeks_start_on_monday(client, operations):
+    body = calendar(client, 'from=2031-03-01&to=2031-03-14&bucket=week')
+
+    assert body['total'] == 8
+    assert [(entry['start'], entry['total']) for entry in body['buckets']] == [
+        ('2031-02-24', 1), ('2031-03-03', 4), ('2031-03-10', 3)
+    ]
+    assert body['buckets'][1]['status'] == {'scheduled': 3, 'completed': 1}
+    assert body['buckets'][2]['inspector'] == {'Ben Ode': 1, 'Ann Lee': 1}
+
+def test_partial_weeks_only_count_days_in_the_range(client, operations):
+    body = calendar(client, 'from=2031-03-05&to=2031-03-11&bucket=week')
+
+    # Monday 3rd and Wednesday 12th fall in the two weeks but outside the range
+    assert [(entry['start'], entry['total']) for entry in body['buckets']] == [('2031-03-03', 3), ('2031-03-10', 2)]
+    assert body['buckets'][0]['unassigned'] == 1
+
+@pytest.mark.parametrize('by, keys', [
+    ('status', {'status'}),
+    ('type,status', {'status', 'type'}),
+    ('inspector', {'inspector', 'unassigned'}),
+    ('', set()),
+])
+def test_by_chooses_the_dimensions(client, operations, by, keys):
+    body = calendar(client, f'from=2031-03-05&to=2031-03-11&by={by}')
+
+    assert [set(entry) - {'start', 'total'} for entry in body['buckets']] == [keys] * 4
+    assert [entry['total'] for entry in body['buckets']] == [2, 1, 1, 1]
+
+def test_list_filters_narrow_the_counts(client, operations):
+    body = calendar(client, 'from=2031-03-01&to=2031-03-14&bucket=week&status=scheduled&by=inspector')
+
+    assert body['buckets'] == [
+        {'start': '2031-02-24', 'total': 1, 'inspector': {'Ann Lee': 1}, 'unassigned': 0},
+        {'start': '2031-03-03', 'total': 3, 'inspector': {'Ann Lee': 2, 'Ben Ode': 1}, 'unassigned': 0},
+        {'start': '2031-03-10', 'total': 2, 'inspector': {'Ann Lee': 1}, 'unassigned': 1},
+    ]
+
+def test_a_range_without_operations_has_no_buckets(client, operations):
+    assert calendar(client, 'from=2031-06-01&to=2031-06-30') == {
+        'success': True, 'bucket': 'day', 'from': '2031-06-01', 'to': '2031-06-30', 'total': 0, 'buckets': []
+    }
+
+def test_the_range_may_span_366_days(client, operations):
+    body = calendar(client, 'from=2031-01-01&to=2032-01-01&bucket=week&by=')
+
+    assert body['total'] == len(OPERATIONS)
+
+@pytest.mark.parametrize('query, error', [
+    ('from=2031-01-01&to=2032-01-02', 'The range can span at most 366 days'),
+    ('from=2031-03-11&to=2031-03-05', 'to must not be before from'),
+    ('from=2031-03-05', 'from and to are required'),
+    ('to=2031-03-05', 'from and to are required'),
+    ('from=2031-03-05&to=11/03/2031', 'to must be a date (YYYY-MM-DD)'),
+    ('from=2031-03-05&to=2031-03-11&bucket=month', 'bucket must be one of: day, week'),
+    ('from=2031-03-05&to=2031-03-11&by=status,colour', 'Unknown by value(s): colour'),
+])
+def test_bad_calendar_requests(client, query, error):
+    response = client.get(f'/api/pac/calendar?{query}')
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': error}
+
+def test_from_and_to_limit_the_operation_list(client, operations):
+    response = client.get('/api/pac/operations?from=2031-03-05&to=2031-03-11&fields=id')
+
+    assert response.status_code == 200
+    assert [row['id'] for row in response.get_json()['operations']] == \
+        ids_between(operations, datetime(2031, 3, 5, 0, 0), datetime(2031, 3, 11, 12, 0))
+
+def test_from_and_to_limit_the_export(client, operations):
+    response = client.get('/api/pac/operations/export?from=2031-03-09&to=2031-03-10')
+
+    assert response.status_code == 200
+    assert [json.loads(line)['id'] for line in response.get_data(as_text=True).splitlines()] == \
+        ids_between(operations, datetime(2031, 3, 9, 23, 59), datetime(2031, 3, 10, 0, 0))
+
+def test_an_open_ended_range_limits_one_side(client, operations):
+    response = client.get('/api/pac/operations?from=2031-03-11&fields=id')
+
+    assert [row['id'] for row in response.get_json()['operations']] == \
+        ids_between(operations, datetime(2031, 3, 11, 12, 0), datetime(2031, 3, 12, 9, 0))
+
+def test_a_bad_range_is_a_bad_request_on_the_list(client):
+    response = client.get('/api/pac/operations?from=2031-03-11&to=2031-03-05')
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'to must not be before from'}
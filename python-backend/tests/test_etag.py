@@ -0,0 +1,124 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+
+from models import db
+from models.pac_operation import PacOperation, PacSample
+from models.table_version import VERSIONED_TABLES, TableVersion
+from models.workplan import Workplan, WorkplanTask
+from utils.etag import conditional_get
+
+CONDITIONAL_URLS = [
+    '/api/workplans/?limit=5',
+    '/api/workplans/1',
+    '/api/workplans/1/tasks',
+    '/api/pac/operations?limit=5',
+    '/api/pac/operations/1',
+    '/api/pac/operations/1/samples',
+    '/api/pac/calendar?from=2025-01-01&to=2025-12-31',
+]
+
+# A new row for each versioned table (children hang off the seeded workplan 1 and operation 1)
+NEW_ROWS = {
+    'workplans': lambda: Workplan(title='ETag check'),
+    'workplan_tasks': lambda: WorkplanTask(workplan_id=1, title='ETag check'),
+    'pac_operations': lambda: PacOperation(operation_type='audit', facility_name='ETag check',
+                                           operation_date=datetime(2030, 9, 1, 9, 0)),
+    'pac_samples': lambda: PacSample(operation_id=1, sample_type='ETag check'),
+}
+
+def etag_tables(app, url):
+    adapter = app.url_map.bind('localhost')
+    endpoint, _ = adapter.match(url.split('?')[0])
+    return app.view_functions[endpoint].etag_tables
+
+def touch(app, table):
+    """Update one row of table without changing it, which still fires its version trigger"""
+    with app.app_context():
+        db.session.execute(text(f'UPDATE {table} SET id = id WHERE id = (SELECT MIN(id) FROM {table})'))
+        db.session.commit()
+        db.session.remove()
+
+def versions(app):
+    with app.app_context():
+        current = dict(zip(VERSIONED_TABLES, TableVersion.current(VERSIONED_TABLES)))
+        db.session.remove()
+    return current
+
+@pytest.mark.parametrize('url', CONDITIONAL_URLS)
+def test_matching_etag_gets_304(client, url):
+    response = client.get(url)
+    etag = response.headers['ETag']
+
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'no-cache'
+    revalidated = client.get(url, headers={'If-None-Match': etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers['ETag'] == etag
+    assert revalidated.data == b''
+
+def test_304_skips_the_view(app):
+    calls = []
+
+    @conditional_get(depends_on=('workplans',))
+    def view():
+        calls.append(1)
+        return {'ok': True}
+
+    with app.test_request_context('/etag-check'):
+        etag = view().headers['ETag'].strip('"')
+    with app.test_request_context('/etag-check', headers={'If-None-Match': f'"{etag}"'}):
+        response = view()
+
+    assert response.status_code == 304
+    assert len(calls) == 1
+
+@pytest.mark.parametrize('url', CONDITIONAL_URLS)
+def test_write_to_each_dependency_changes_the_etag(app, client, url):
+    for table in etag_tables(app, url):
+        etag = client.get(url).headers['ETag']
+        touch(app, table)
+
+        response = client.get(url, headers={'If-None-Match': etag})
+
+        assert response.status_code == 200, table
+        assert response.headers['ETag'] != etag, table
+
+def test_other_tables_leave_the_etag_alone(app, client):
+    url = '/api/pac/operations?limit=5'
+    etag = client.get(url).headers['ETag']
+
+    touch(app, 'workplans')
+
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+@pytest.mark.parametrize('table', VERSIONED_TABLES)
+def test_every_write_bumps_the_table_version(app, table):
+    before = versions(app)
+    with app.app_context():
+        row = NEW_ROWS[table]()
+        db.session.add(row)
+        db.session.commit()
+        inserted = versions(app)
+        db.session.execute(text(f'UPDATE {table} SET id = id WHERE id = :id'), {'id': row.id})
+        db.session.commit()
+        updated = versions(app)
+        db.session.delete(row)
+        db.session.commit()
+        deleted = versions(app)
+        db.session.remove()
+
+    assert [inserted[table], updated[table], deleted[table]] == [before[table] + step for step in (1, 2, 3)]
+
+@pytest.mark.parametrize('url, status', [
+    ('/api/workplans/999999', 404),
+    ('/api/pac/operations/999999', 404),
+    ('/api/pac/operations?limit=abc', 400),
+    ('/api/pac/calendar?from=2025-01-01', 400),
+])
+def test_errors_carry_no_etag(client, url, status):
+    response = client.get(url)
+
+    assert response.status_code == status
+    assert 'ETag' not in response.headers
@@ -0,0 +1,121 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+from models import db
+from models.pac_operation import PacOperation, PacSample
+from models.workplan import Workplan
+
+OPERATION_COLUMNS = list(PacOperation.serialized_fields)
+SAMPLE_COLUMNS = [column.name for column in PacSample.__table__.columns]
+
+@pytest.fixture
+def exported(app):
+    """An operation with three samples and a workplan that only q=Exportcheck finds"""
+    with app.app_context():
+        operation = PacOperation(operation_type='audit', facility_name='Exportcheck Facility',
+                                 operation_date=datetime(2030, 8, 1, 9, 0), notes='line one\nline "two", three')
+        operation.samples = [PacSample(sample_type='product', status=status)
+                             for status in ('collected', 'collected', 'testing')]
+        workplan = Workplan(title='Exportcheck workplan')
+        db.session.add_all([operation, workplan])
+        db.session.commit()
+        ids = {'operation': operation.id, 'workplan': workplan.id,
+               'samples': [sample.id for sample in operation.samples]}
+        db.session.remove()
+    yield ids
+    with app.app_context():
+        PacSample.query.filter(PacSample.operation_id == ids['operation']).delete()
+        PacOperation.query.filter_by(id=ids['operation']).delete()
+        Workplan.query.filter_by(id=ids['workplan']).delete()
+        db.session.commit()
+
+def ndjson(response):
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+def csv_rows(response):
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    return list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+
+def test_ndjson_has_one_object_per_row(client, exported):
+    response = client.get('/api/pac/operations/export?q=Exportcheck')
+
+    rows = ndjson(response)
+    assert response.headers['Content-Disposition'] == 'attachment; filename=pac_operations.ndjson'
+    assert [row['id'] for row in rows] == [exported['operation']]
+    assert list(rows[0]) == OPERATION_COLUMNS
+    assert rows[0]['operation_date'] == '2030-08-01T09:00:00'
+    assert rows[0]['notes'] == 'line one\nline "two", three'
+
+def test_csv_has_a_header_and_quotes_values(client, exported):
+    response = client.get('/api/pac/operations/export?q=Exportcheck&format=csv')
+
+    header, *rows = csv_rows(response)
+    assert response.headers['Content-Disposition'] == 'attachment; filename=pac_operations.csv'
+    assert header == OPERATION_COLUMNS
+    assert len(rows) == 1
+    row = dict(zip(header, rows[0]))
+    assert row['id'] == str(exported['operation'])
+    assert row['notes'] == 'line one\nline "two", three'
+
+def test_workplan_export_takes_the_list_filters(client, exported):
+    rows = ndjson(client.get('/api/workplans/export?q=Exportcheck'))
+
+    assert [row['id'] for row in rows] == [exported['workplan']]
+    assert list(rows[0]) == list(Workplan.serialized_fields)
+    assert ndjson(client.get('/api/workplans/export?q=Exportcheck&status=cancelled')) == []
+
+@pytest.mark.parametrize('query, statuses', [
+    ('', ['collected', 'collected', 'testing']),
+    ('&status=collected', ['collected', 'collected']),
+    ('&status=completed', []),
+])
+def test_sample_export_filters_by_operation_and_status(client, exported, query, statuses):
+    rows = ndjson(client.get(f"/api/pac/samples/export?operation_id={exported['operation']}{query}"))
+
+    assert [row['status'] for row in rows] == statuses
+    assert [row['id'] for row in rows] == exported['samples'][:len(statuses)]
+    assert all(list(row) == SAMPLE_COLUMNS for row in rows)
+
+def test_sample_export_as_csv(client, exported):
+    header, *rows = csv_rows(client.get(f"/api/pac/samples/export?operation_id={exported['operation']}&format=csv"))
+
+    assert header == SAMPLE_COLUMNS
+    assert [row[0] for row in rows] == [str(sample_id) for sample_id in exported['samples']]
+
+def test_operation_id_zero_is_a_filter(client, exported):
+    assert ndjson(client.get('/api/pac/samples/export?operation_id=0')) == []
+
+@pytest.mark.parametrize('value', ['abc', '1.5', ''])
+def test_bad_operation_id_is_a_bad_request(client, value):
+    response = client.get(f'/api/pac/samples/export?operation_id={value}')
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'operation_id must be an integer'}
+
+@pytest.mark.parametrize('url', ['/api/pac/operations/export', '/api/pac/samples/export', '/api/workplans/export'])
+def test_unknown_format_is_a_bad_request(client, url):
+    response = client.get(f'{url}?format=xml')
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'format must be one of: ndjson, csv'}
+
+@pytest.mark.parametrize('url, internal', [
+    ('/api/pac/operations/export?q=Exportcheck', PacOperation.rollup_fields),
+    ('/api/workplans/export?q=Exportcheck', Workplan.rollup_fields + ('created_by',)),
+])
+def test_internal_columns_are_not_exported(client, exported, url, internal):
+    rows = ndjson(client.get(url))
+    header = csv_rows(client.get(f'{url}&format=csv'))[0]
+
+    assert rows and not set(internal) & set(rows[0])
+    assert not set(internal) & set(header)
+
+def test_bad_search_is_a_bad_request(client):
+    assert client.get('/api/pac/operations/export?q=%20').status_code == 400
@@ -0,0 +1,107 @@
+import pytest
+
+from models.pac_operation import PacOperation, PacSample
+from models.workplan import Workplan, WorkplanTask
+
+# URL -> (key of the row or rows in the response, model)
+LISTS = {
+    '/api/workplans/': ('workplans', Workplan),
+    '/api/pac/operations': ('operations', PacOperation),
+}
+DETAILS = {
+    '/api/workplans/1': ('workplan', Workplan),
+    '/api/pac/operations/1': ('operation', PacOperation),
+}
+CHILDREN = {
+    '/api/workplans/1/tasks': ('tasks', WorkplanTask),
+    '/api/pac/operations/1/samples': ('samples', PacSample),
+}
+TEXT_COLUMNS = {Workplan: {'description'}, PacOperation: {'facility_address', 'notes', 'findings'}}
+
+def get(client, url, query):
+    response = client.get(f'{url}?{query}')
+    assert response.status_code == 200
+    return response.get_json()
+
+def rows(client, url, query):
+    key = {**LISTS, **CHILDREN}[url][0]
+    return get(client, url, query)[key]
+
+@pytest.mark.parametrize('url', [*LISTS, *DETAILS, *CHILDREN])
+def test_unknown_field_is_a_bad_request(client, url):
+    response = client.get(f'{url}?fields=id,colour,weight')
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Unknown field(s): colour, weight'}
+
+@pytest.mark.parametrize('url', LISTS)
+def test_default_list_leaves_out_the_text_columns(client, url):
+    model = LISTS[url][1]
+
+    listed = rows(client, url, 'limit=5&include=')
+
+    assert [set(row) for row in listed] == [set(model.list_fields)] * 5
+    assert not TEXT_COLUMNS[model] & set(model.list_fields)
+    assert set(model.serialized_fields) - set(model.list_fields) == TEXT_COLUMNS[model]
+
+@pytest.mark.parametrize('url', DETAILS)
+def test_detail_returns_the_text_columns(client, url):
+    key, model = DETAILS[url]
+
+    row = get(client, url, 'include=')[key]
+
+    assert set(row) == set(model.serialized_fields)
+    assert TEXT_COLUMNS[model] <= set(row)
+
+@pytest.mark.parametrize('url', LISTS)
+def test_fields_can_ask_a_list_for_a_text_column(client, url):
+    model = LISTS[url][1]
+    text_column = sorted(TEXT_COLUMNS[model])[0]
+
+    listed = rows(client, url, f'limit=3&include=&fields=status,{text_column}')
+
+    assert [set(row) for row in listed] == [{'id', 'status', text_column}] * 3
+
+@pytest.mark.parametrize('url', [*LISTS, *CHILDREN])
+def test_id_is_always_returned(client, url):
+    assert all(set(row) == {'id', 'created_at'} for row in rows(client, url, 'fields=created_at&include='))
+
+@pytest.mark.parametrize('url', DETAILS)
+def test_fields_on_a_detail_route(client, url):
+    key = DETAILS[url][0]
+    everything = get(client, url, 'include=')[key]
+
+    chosen = get(client, url, 'fields=priority,status&include=')[key]
+
+    assert chosen == {name: everything[name] for name in ('id', 'status', 'priority')}
+
+@pytest.mark.parametrize('url', CHILDREN)
+def test_fields_on_a_child_list(client, url):
+    model = CHILDREN[url][1]
+    everything = rows(client, url, '')
+
+    chosen = rows(client, url, 'fields=status')
+
+    assert everything
+    assert all(set(row) == {column.name for column in model.__table__.columns} for row in everything)
+    assert chosen == [{'id': row['id'], 'status': row['status']} for row in everything]
+
+@pytest.mark.parametrize('url', [*LISTS, *DETAILS])
+def test_include_adds_to_the_chosen_fields(client, url):
+    key, model = {**LISTS, **DETAILS}[url]
+    children = 'tasks' if model is Workplan else 'samples'
+
+    body = get(client, url, f'fields=status&include=counts,{children}&limit=2')[key]
+
+    for row in body if isinstance(body, list) else [body]:
+        assert set(row) == {'id', 'status', children, *model.rollup_fields}
+
+@pytest.mark.parametrize('url', [*LISTS, *DETAILS])
+def test_rollups_can_be_asked_for_as_fields(client, url):
+    key, model = {**LISTS, **DETAILS}[url]
+    rollup = model.rollup_fields[0]
+
+    body = get(client, url, f'fields={rollup}&include=&limit=2')[key]
+
+    for row in body if isinstance(body, list) else [body]:
+        assert set(row) == {'id', rollup}
@@ -0,0 +1,159 @@
+import threading
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+import routes.auth_routes
+import utils.login
+from models import db
+from models.user import User
+from utils.auth import principal_cache
+from utils.login import LastLoginBuffer, PasswordVerifier
+
+PASSWORD = 'login-check-1'
+
+@pytest.fixture
+def user(app):
+    """An active user who has never logged in, deleted afterwards"""
+    principal_cache.clear()
+    with app.app_context():
+        # Logins of earlier tests' users are still buffered, and SQLite reuses their ids
+        utils.login.last_login_buffer.flush()
+        account = User(username='login-check', email='login-check@example.com', full_name='Login Check', role='user')
+        account.set_password(PASSWORD)
+        db.session.add(account)
+        db.session.commit()
+        user_id = account.id
+        db.session.remove()
+    yield user_id
+    with app.app_context():
+        User.query.filter_by(id=user_id).delete()
+        db.session.commit()
+    principal_cache.clear()
+
+@pytest.fixture
+def buffer(app, monkeypatch):
+    """A fresh write-behind buffer in place of the app-wide one, flushing only when told to"""
+    app.config['LAST_LOGIN_FLUSH_INTERVAL'] = 3600
+    fresh = LastLoginBuffer()
+    monkeypatch.setattr(routes.auth_routes, 'last_login_buffer', fresh)
+    return fresh
+
+@pytest.fixture
+def slow_hash(app, monkeypatch):
+    """A one-worker verifier with no queue whose hash checks start, then wait for release"""
+    app.config.update(LOGIN_HASH_WORKERS=1, LOGIN_HASH_QUEUE=0)
+    started, release = threading.Event(), threading.Event()
+    check = utils.login.check_password_hash
+
+    def held_check(*args):
+        started.set()
+        release.wait(5)
+        return check(*args)
+
+    monkeypatch.setattr(utils.login, 'check_password_hash', held_check)
+    verifier = PasswordVerifier()
+    monkeypatch.setattr(routes.auth_routes, 'password_verifier', verifier)
+    yield started, release
+    release.set()
+    if verifier._executor is not None:
+        verifier._executor.shutdown(wait=True)
+
+def login(client):
+    return client.post('/api/auth/login', json={'username': 'login-check', 'password': PASSWORD})
+
+def stored_last_login(app, user_id):
+    with app.app_context():
+        value = db.session.get(User, user_id).last_login
+        db.session.remove()
+    return value
+
+def test_full_hash_queue_is_a_503(app, user, slow_hash):
+    started, release = slow_hash
+    first = threading.Thread(target=login, args=(app.test_client(),))
+    first.start()
+    try:
+        # The first login now holds the only slot
+        assert started.wait(5)
+
+        response = login(app.test_client())
+
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '1'
+        assert response.get_json() == {'error': 'Too many logins in progress, please retry'}
+    finally:
+        release.set()
+        first.join()
+
+def test_hash_timeout_is_a_503(app, client, user, slow_hash):
+    app.config['LOGIN_HASH_TIMEOUT'] = 0.05
+
+    response = login(client)
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert response.get_json() == {'error': 'Login timed out waiting for a password check, please retry'}
+
+def test_login_leaves_last_login_to_the_buffer(app, client, user, buffer):
+    response = login(client)
+    login_at = response.get_json()['user']['last_login']
+
+    assert response.status_code == 200
+    assert stored_last_login(app, user) is None
+    assert buffer.pending(user).isoformat() == login_at
+
+    with app.app_context():
+        assert buffer.flush() == 1
+
+    assert stored_last_login(app, user).isoformat() == login_at
+    assert buffer.pending(user) is None
+    assert (buffer.flushes, buffer.written) == (1, 1)
+
+def test_zero_interval_writes_at_login(app, client, user, buffer):
+    app.config['LAST_LOGIN_FLUSH_INTERVAL'] = 0
+
+    login_at = login(client).get_json()['user']['last_login']
+
+    assert stored_last_login(app, user).isoformat() == login_at
+    assert buffer.pending(user) is None
+    assert buffer._thread is None
+
+@pytest.fixture
+def locked_last_login(app):
+    """A trigger failing every write to users.last_login, dropped afterwards"""
+    with app.app_context():
+        db.session.execute(text("CREATE TRIGGER trg_lock_last_login BEFORE UPDATE OF last_login ON users "
+                                "BEGIN SELECT RAISE(ABORT, 'last_login is locked'); END"))
+        db.session.commit()
+        db.session.remove()
+    yield
+    unlock(app)
+
+def unlock(app):
+    with app.app_context():
+        db.session.execute(text('DROP TRIGGER IF EXISTS trg_lock_last_login'))
+        db.session.commit()
+        db.session.remove()
+
+def test_failed_flush_keeps_the_pending_logins(app, client, user, buffer, locked_last_login):
+    login_at = login(client).get_json()['user']['last_login']
+
+    with app.app_context(), pytest.raises(IntegrityError, match='last_login is locked'):
+        buffer.flush()
+
+    assert buffer.pending(user).isoformat() == login_at
+    assert stored_last_login(app, user) is None
+    unlock(app)
+    with app.app_context():
+        assert buffer.flush() == 1
+    assert stored_last_login(app, user).isoformat() == login_at
+
+def test_profile_shows_an_unflushed_login(app, client, user, buffer):
+    body = login(client).get_json()
+
+    response = app.test_client().get('/api/auth/profile', headers={'Authorization': f"Bearer {body['token']}"})
+
+    assert response.status_code == 200
+    assert response.get_json()['user']['last_login'] == body['user']['last_login']
+    assert stored_last_login(app, user) is None
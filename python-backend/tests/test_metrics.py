@@ -0,0 +1,129 @@
+import re
+
+import pytest
+
+from utils.metrics import Histogram, request_metrics
+
+DETAIL = '/api/pac/operations/<int:operation_id>'
+SAMPLE = re.compile(r'^(\w+)(?:\{(.*)\})? (\S+)$')
+
+@pytest.fixture
+def metrics(client):
+    """Reads /api/metrics as {(name, labels): value}, starting from empty histograms"""
+    request_metrics.clear()
+
+    def read():
+        response = client.get('/api/metrics')
+        assert response.status_code == 200
+        assert response.mimetype == 'text/plain'
+        samples = {}
+        for line in response.get_data(as_text=True).splitlines():
+            if line.startswith('#'):
+                continue
+            name, labels, value = SAMPLE.match(line).groups()
+            samples[name, labels or ''] = float(value)
+        return samples
+
+    yield read
+    request_metrics.clear()
+
+def route_labels(route, method='GET', **extra):
+    pairs = [('method', method), ('route', route), *extra.items()]
+    return ','.join(f'{name}="{value}"' for name, value in pairs)
+
+def test_histogram_text_format():
+    histogram = Histogram('demo_seconds', 'A demo histogram', (0.1, 1.0), ('route',))
+    histogram.observe(0.05, '/a')
+    histogram.observe(0.5, '/a')
+    histogram.observe(3.0, '/a')
+    histogram.observe(1.0, '/b"\\\n')
+
+    assert histogram.render().splitlines() == [
+        '# HELP demo_seconds A demo histogram',
+        '# TYPE demo_seconds histogram',
+        'demo_seconds_bucket{route="/a",le="0.1"} 1',
+        'demo_seconds_bucket{route="/a",le="1.0"} 2',
+        'demo_seconds_bucket{route="/a",le="+Inf"} 3',
+        'demo_seconds_sum{route="/a"} 3.55',
+        'demo_seconds_count{route="/a"} 3',
+        'demo_seconds_bucket{route="/b\\"\\\\\\n",le="0.1"} 0',
+        'demo_seconds_bucket{route="/b\\"\\\\\\n",le="1.0"} 1',
+        'demo_seconds_bucket{route="/b\\"\\\\\\n",le="+Inf"} 1',
+        'demo_seconds_sum{route="/b\\"\\\\\\n"} 1.0',
+        'demo_seconds_count{route="/b\\"\\\\\\n"} 1',
+    ]
+
+def test_unlabelled_histogram():
+    histogram = Histogram('plain_total', 'No labels', (1,), ())
+    histogram.observe(2)
+
+    assert histogram.render().splitlines()[2:] == [
+        'plain_total_bucket{le="1"} 0',
+        'plain_total_bucket{le="+Inf"} 1',
+        'plain_total_sum 2.0',
+        'plain_total_count 1',
+    ]
+
+def test_requests_are_labelled_by_method_rule_and_status(client, metrics):
+    client.get('/api/pac/operations/1')
+    client.get('/api/pac/operations/2')
+    client.get('/api/pac/operations/999999')
+    client.post('/api/pac/operations/bulk', json={})
+    client.get('/api/no-such-route')
+
+    samples = metrics()
+
+    count = 'fwfps_request_duration_seconds_count'
+    assert samples[count, route_labels(DETAIL, status=200)] == 2
+    assert samples[count, route_labels(DETAIL, status=404)] == 1
+    assert samples[count, route_labels('/api/pac/operations/bulk', 'POST', status=400)] == 1
+    assert samples[count, route_labels('unmatched', status=404)] == 1
+    assert samples['fwfps_request_duration_seconds_bucket', route_labels(DETAIL, status=200, le='+Inf')] == 2
+    assert samples['fwfps_request_duration_seconds_sum', route_labels(DETAIL, status=200)] > 0
+    # Paths are never labels, only the rule they matched
+    assert not any('/api/pac/operations/1"' in labels for _, labels in samples)
+
+def test_every_histogram_has_buckets_sum_and_count(client, metrics):
+    client.get('/api/pac/operations/1')
+
+    samples = metrics()
+
+    labels = route_labels(DETAIL)
+    for name in ('fwfps_request_sql_queries', 'fwfps_request_sql_duration_seconds',
+                 'fwfps_response_serialization_seconds', 'fwfps_response_size_bytes'):
+        buckets = [value for (sample, sample_labels), value in samples.items()
+                   if sample == f'{name}_bucket' and sample_labels.startswith(labels + ',le=')]
+        assert buckets == sorted(buckets), name
+        assert buckets[-1] == samples[f'{name}_count', labels] == 1, name
+        assert (f'{name}_sum', labels) in samples, name
+
+def test_statement_count_is_recorded_per_route(app, client, metrics):
+    app.config['SERVER_TIMING'] = True
+    timing = client.get('/api/pac/operations/1').headers['Server-Timing']
+    queries = int(re.search(r'desc="(\d+) queries"', timing).group(1))
+    client.get('/api/pac/operations/2')
+    client.get('/api/pac/types')
+
+    samples = metrics()
+
+    assert queries > 0
+    assert samples['fwfps_request_sql_queries_sum', route_labels(DETAIL)] == 2 * queries
+    assert samples['fwfps_request_sql_queries_count', route_labels(DETAIL)] == 2
+    assert samples['fwfps_request_sql_duration_seconds_sum', route_labels(DETAIL)] > 0
+    assert samples['fwfps_request_sql_queries_sum', route_labels('/api/pac/types')] == 0
+    assert samples['fwfps_request_sql_queries_bucket', route_labels('/api/pac/types', le=0)] == 1
+
+def test_serialization_time_and_size_are_recorded_per_route(client, metrics):
+    body = client.get('/api/pac/operations?limit=20').data
+    client.get('/api/pac/operations/export')
+
+    samples = metrics()
+
+    operations = route_labels('/api/pac/operations')
+    assert samples['fwfps_response_serialization_seconds_sum', operations] > 0
+    assert samples['fwfps_response_serialization_seconds_count', operations] == 1
+    assert samples['fwfps_response_size_bytes_sum', operations] == len(body)
+    # Streamed exports have no known length, so only their time is recorded
+    export = route_labels('/api/pac/operations/export')
+    assert samples['fwfps_request_duration_seconds_count', route_labels('/api/pac/operations/export', status=200)] == 1
+    assert ('fwfps_response_size_bytes_count', export) not in samples
@@ -0,0 +1,52 @@
+import types
+
+import pytest
+from sqlalchemy import create_engine, inspect
+
+import migrations
+from migrations import current_version, latest_version, upgrade_database
+from utils.sqlite_profile import install_transactions
+
+@pytest.fixture
+def engine(app, tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path / "migrate.db"}')
+    install_transactions(engine)
+    # The baseline step creates the tables from the app's models
+    with app.app_context():
+        yield engine
+    engine.dispose()
+
+def version(engine):
+    with engine.connect() as connection:
+        return current_version(connection)
+
+def failing_step(connection):
+    connection.exec_driver_sql('CREATE TABLE half_done (id INTEGER PRIMARY KEY)')
+    raise RuntimeError('step failed')
+
+def test_new_database_reaches_the_latest_version(engine):
+    applied = upgrade_database(engine)
+
+    assert len(applied) == latest_version()
+    assert version(engine) == latest_version()
+    assert upgrade_database(engine) == []
+
+def test_failing_step_leaves_schema_and_version_unchanged(engine, monkeypatch):
+    upgrade_database(engine)
+    step = types.SimpleNamespace(VERSION=latest_version() + 1, DESCRIPTION='fails', upgrade=failing_step)
+    real_migrations = migrations.load_migrations()
+    monkeypatch.setattr(migrations, 'load_migrations', lambda: real_migrations + [step])
+
+    with pytest.raises(RuntimeError, match='step failed'):
+        upgrade_database(engine)
+
+    assert 'half_done' not in inspect(engine).get_table_names()
+    assert version(engine) == real_migrations[-1].VERSION
+
+def test_newer_database_is_refused(engine):
+    upgrade_database(engine)
+    with engine.begin() as connection:
+        connection.exec_driver_sql(f'PRAGMA user_version = {latest_version() + 1}')
+
+    with pytest.raises(RuntimeError, match='newer than this code'):
+        upgrade_database(engine)
@@ -0,0 +1,184 @@
+import base64
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+
+from models import db
+from models.pac_operation import PacOperation
+from models.workplan import Workplan
+from utils.pagination import MAX_LIMIT, RANK_CURSOR, decode_cursor, encode_cursor
+
+TIED = datetime(2024, 6, 1, 12, 0)
+
+# List URL -> (response key, model, sort column)
+LISTS = {
+    '/api/workplans/': ('workplans', Workplan, 'created_at'),
+    '/api/pac/operations': ('operations', PacOperation, 'operation_date'),
+}
+
+@pytest.fixture
+def tied(app):
+    """Seven workplans and seven operations sharing one sort value"""
+    with app.app_context():
+        rows = [Workplan(title='Cursor check', created_at=TIED) for _ in range(7)] + \
+            [PacOperation(operation_type='audit', facility_name='Cursor check', operation_date=TIED)
+             for _ in range(7)]
+        db.session.add_all(rows)
+        db.session.commit()
+        db.session.remove()
+    yield
+    with app.app_context():
+        Workplan.query.filter_by(title='Cursor check').delete()
+        PacOperation.query.filter_by(facility_name='Cursor check').delete()
+        db.session.commit()
+
+def expected_ids(app, model, sort_column):
+    with app.app_context():
+        column = getattr(model, sort_column)
+        ids = [row.id for row in model.query.with_entities(model.id).order_by(column.desc(), model.id.desc())]
+        db.session.remove()
+    return ids
+
+def walk(client, url, query=''):
+    """Every page of a list, followed by next_cursor until it runs out"""
+    key = LISTS[url][0]
+    pages = []
+    cursor = None
+    while True:
+        page_url = f'{url}?{query}' + (f'&cursor={cursor}' if cursor else '')
+        response = client.get(page_url)
+        assert response.status_code == 200
+        body = response.get_json()
+        pages.append(body[key])
+        cursor = body['next_cursor']
+        if cursor is None:
+            return pages
+
+@pytest.mark.parametrize('url', LISTS)
+def test_walking_every_page_sees_each_row_once(app, client, tied, url):
+    _, model, sort_column = LISTS[url]
+
+    pages = walk(client, url, 'limit=4&include=')
+
+    assert all(len(page) == 4 for page in pages[:-1])
+    assert 1 <= len(pages[-1]) <= 4
+    assert [row['id'] for page in pages for row in page] == expected_ids(app, model, sort_column)
+
+@pytest.mark.parametrize('url', LISTS)
+def test_fields_without_the_sort_column_still_page(app, client, tied, url):
+    _, model, sort_column = LISTS[url]
+
+    pages = walk(client, url, 'limit=3&include=&fields=status')
+
+    assert all(set(row) == {'id', 'status'} for page in pages for row in page)
+    assert [row['id'] for page in pages for row in page] == expected_ids(app, model, sort_column)
+
+@pytest.mark.parametrize('url', LISTS)
+def test_a_page_holding_the_last_row_has_no_cursor(app, client, url):
+    key, model, sort_column = LISTS[url]
+    count = len(expected_ids(app, model, sort_column))
+
+    exact = client.get(f'{url}?limit={count}').get_json()
+    larger = client.get(f'{url}?limit={count + 1}').get_json()
+
+    assert (len(exact[key]), exact['next_cursor']) == (count, None)
+    assert (len(larger[key]), larger['next_cursor']) == (count, None)
+    assert client.get(f'{url}?limit={count - 1}').get_json()['next_cursor'] is not None
+
+@pytest.mark.parametrize('url, query, filters', [
+    ('/api/workplans/', '', {}),
+    ('/api/workplans/', '&status=planned', {'status': 'planned'}),
+    ('/api/pac/operations', '', {}),
+    ('/api/pac/operations', '&status=completed', {'status': 'completed'}),
+])
+def test_include_total_counts_every_matching_row(app, client, url, query, filters):
+    key, model, _ = LISTS[url]
+    with app.app_context():
+        count = model.query.filter_by(**filters).count()
+        db.session.remove()
+
+    body = client.get(f'{url}?limit=2&include_total=true{query}').get_json()
+
+    assert body['total'] == count
+    assert len(body[key]) == 2
+    assert 'total' not in client.get(f'{url}?limit=2{query}').get_json()
+
+@pytest.mark.parametrize('url', LISTS)
+def test_limit_bounds(client, url):
+    key = LISTS[url][0]
+
+    assert len(client.get(f'{url}?limit=1').get_json()[key]) == 1
+    assert client.get(f'{url}?limit={MAX_LIMIT}').status_code == 200
+    for limit in (0, -1, MAX_LIMIT + 1):
+        response = client.get(f'{url}?limit={limit}')
+        assert response.status_code == 400
+        assert response.get_json() == {'error': f'limit must be between 1 and {MAX_LIMIT}'}
+    assert client.get(f'{url}?limit=ten').get_json() == {'error': 'limit must be an integer'}
+
+@pytest.mark.parametrize('cursor', [
+    'not a cursor',
+    '%%%',
+    encode_cursor(RANK_CURSOR, '2025-01-01T09:00:00', 1),
+    encode_cursor(RANK_CURSOR, True, 1),
+    encode_cursor('created_at', '2025-13-45T00:00:00', 1),
+    encode_cursor('created_at', [2025], 1),
+    encode_cursor('created_at', '2025-01-01T09:00:00', 1)[:-3],
+    encode_cursor('created_at', '2025-01-01T09:00:00', 'one'),
+    # The format before cursors named their ordering
+    base64.urlsafe_b64encode(b'["2025-01-01T09:00:00",1]').decode('ascii'),
+])
+@pytest.mark.parametrize('url', LISTS)
+def test_bad_cursor_is_a_bad_request(client, url, cursor):
+    response = client.get(url, query_string={'cursor': cursor})
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Invalid cursor'}
+
+def first_cursor(client, url):
+    cursor = client.get(url).get_json()['next_cursor']
+    assert cursor is not None
+    return cursor
+
+@pytest.mark.parametrize('cursor_url, url', [
+    ('/api/pac/operations?q=facility&limit=1', '/api/pac/operations?limit=1'),
+    ('/api/pac/operations?limit=1', '/api/pac/operations?q=facility&limit=1'),
+    ('/api/workplans/?q=workplan&limit=1', '/api/workplans/?limit=1'),
+    ('/api/workplans/?limit=1', '/api/pac/operations?limit=1'),
+    ('/api/pac/operations?limit=1', '/api/workplans/?limit=1'),
+])
+def test_cursor_from_another_ordering_is_a_bad_request(client, cursor_url, url):
+    cursor = first_cursor(client, cursor_url)
+
+    response = client.get(f'{url}&cursor={cursor}')
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Cursor belongs to a different ordering; start again without it'}
+
+@pytest.fixture
+def undated(app):
+    """Five workplans whose created_at is NULL, as rows written past the ORM can be"""
+    with app.app_context():
+        rows = [Workplan(title='Undated check') for _ in range(5)]
+        db.session.add_all(rows)
+        db.session.commit()
+        db.session.execute(text("UPDATE workplans SET created_at = NULL WHERE title = 'Undated check'"))
+        db.session.commit()
+        db.session.remove()
+    yield
+    with app.app_context():
+        Workplan.query.filter_by(title='Undated check').delete()
+        db.session.commit()
+
+def test_rows_without_a_sort_value_come_last(app, client, undated):
+    pages = walk(client, '/api/workplans/', 'limit=2&include=')
+
+    listed = [row['id'] for page in pages for row in page]
+    assert listed == expected_ids(app, Workplan, 'created_at')
+    assert [row['created_at'] for page in pages for row in page][-5:] == [None] * 5
+    assert all(len(page) == 2 for page in pages[:-1])
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor('operation_date', TIED, 42), 'operation_date') == (TIED, 42)
+    assert decode_cursor(encode_cursor('created_at', None, 9), 'created_at') == (None, 9)
+    assert decode_cursor(encode_cursor(RANK_CURSOR, -3.5, 7), RANK_CURSOR) == (-3.5, 7)
@@ -0,0 +1,21 @@
+import pytest
+
+from common import count_queries
+from query_counts import QUERY_BUDGETS
+
+@pytest.fixture
+def engines(app):
+    from models.routing import routed_engines
+    with app.app_context():
+        return routed_engines()
+
+@pytest.mark.parametrize('url, budget', QUERY_BUDGETS.items())
+def test_endpoint_runs_its_query_budget(app, client, engines, url, budget):
+    # Requests over the @query_budget declared on their view fail as well
+    app.config['QUERY_BUDGET_ENFORCE'] = True
+
+    with count_queries(*engines) as statements:
+        response = client.get(url)
+
+    assert response.status_code == 200, response.get_data(as_text=True)
+    assert len(statements) == budget, '\n'.join(statements)
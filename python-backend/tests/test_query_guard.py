@@ -0,0 +1,105 @@
+import logging
+
+import pytest
+
+from models import db
+from models.pac_operation import PacOperation
+from utils.bulk import BULK_CHUNK_SIZE
+
+# Enough rows for the bulk routes to run six chunks, over the default repeat threshold of 5
+BULK_ROWS = BULK_CHUNK_SIZE * 6
+
+@pytest.fixture
+def bulk_operations(app):
+    """The facility name of the operations a test creates in bulk, deleted afterwards"""
+    name = 'Bulk guard check'
+    yield name
+    with app.app_context():
+        PacOperation.query.filter_by(facility_name=name).delete()
+        db.session.commit()
+
+def warnings(caplog, text):
+    return [record for record in caplog.records if text in record.getMessage()]
+
+def test_budget_fails_the_request_when_enforced(app, client, monkeypatch):
+    view = app.view_functions['pac.get_operations']
+    monkeypatch.setattr(view, 'query_budget', 1)
+    app.config['QUERY_BUDGET_ENFORCE'] = True
+
+    response = client.get('/api/pac/operations?include=counts')
+
+    assert response.status_code == 500
+
+def test_budget_only_logs_when_not_enforced(app, client, monkeypatch, caplog):
+    view = app.view_functions['pac.get_operations']
+    monkeypatch.setattr(view, 'query_budget', 1)
+    app.config['QUERY_BUDGET_ENFORCE'] = False
+
+    with caplog.at_level(logging.WARNING):
+        response = client.get('/api/pac/operations?include=counts')
+
+    assert response.status_code == 200
+    assert warnings(caplog, 'over its budget of 1')
+
+def test_bulk_insert_chunks_are_not_n_plus_one(client, bulk_operations, caplog):
+    rows = [{'operation_type': 'inspection', 'facility_name': bulk_operations,
+             'operation_date': '2030-06-01T09:00:00'}] * BULK_ROWS
+
+    with caplog.at_level(logging.WARNING):
+        response = client.post('/api/pac/operations/bulk', json={'operations': rows})
+
+    assert response.status_code == 201
+    assert not warnings(caplog, 'Possible N+1')
+
+def test_chunked_lookups_are_not_n_plus_one(client, caplog):
+    # Each sample names a different operation, so existing_ids looks them up in chunks
+    rows = [{'operation_id': operation_id, 'sample_type': 'swab'} for operation_id in range(1, BULK_ROWS + 1)]
+
+    with caplog.at_level(logging.WARNING):
+        client.post('/api/pac/samples/bulk', json={'samples': rows})
+
+    assert not warnings(caplog, 'Possible N+1')
+
+def test_repeated_statements_in_a_request_are_reported(app, client, caplog):
+    app.config['QUERY_REPEAT_THRESHOLD'] = 0
+
+    with caplog.at_level(logging.WARNING):
+        client.get('/api/pac/operations/1')
+
+    assert warnings(caplog, 'Possible N+1')
+
+def test_statements_outside_requests_are_not_checked(app, caplog):
+    app.config['SLOW_QUERY_MS'] = 0
+
+    with caplog.at_level(logging.WARNING), app.app_context():
+        PacOperation.query.count()
+        db.session.remove()
+
+    assert not warnings(caplog, 'Slow query')
+
+def test_slow_query_is_reported_with_the_view_stack(app, client, caplog):
+    app.config['SLOW_QUERY_MS'] = 0
+
+    with caplog.at_level(logging.WARNING):
+        client.get('/api/pac/operations/1')
+
+    reports = [record.getMessage() for record in warnings(caplog, 'Slow query')]
+    assert reports
+    assert all('GET /api/pac/operations/<int:operation_id>' in report for report in reports)
+    assert any('routes/pac_routes.py' in report for report in reports)
+    # The frames of the statement timer and the guard itself are left out
+    assert not any('utils/metrics.py' in report or 'utils/query_guard.py' in report for report in reports)
+
+def test_metrics_and_guard_count_the_same_statements(app, client, monkeypatch):
+    # One timer feeds both: the Server-Timing count is what the budget was checked against
+    view = app.view_functions['pac.get_operation']
+    app.config['SERVER_TIMING'] = True
+    app.config['QUERY_BUDGET_ENFORCE'] = True
+    monkeypatch.setattr(view, 'query_budget', 3)
+
+    response = client.get('/api/pac/operations/1')
+
+    assert response.status_code == 200
+    assert 'desc="3 queries"' in response.headers['Server-Timing']
+    monkeypatch.setattr(view, 'query_budget', 2)
+    assert client.get('/api/pac/operations/1').status_code == 500
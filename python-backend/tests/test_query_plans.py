@@ -0,0 +1,10 @@
+import pytest
+
+from query_plans import ROUTES, check_route
+
+@pytest.mark.parametrize('url, expected_index', ROUTES)
+def test_route_queries_use_an_index(app_module, client, url, expected_index):
+    failures = [f"{' '.join(statement.split())[:160]}\n  " + '\n  '.join(plan + problems)
+                for statement, plan, problems in check_route(app_module, url, expected_index) if problems]
+
+    assert not failures, '\n'.join(failures)
@@ -0,0 +1,316 @@
+import importlib
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+
+from common import count_queries
+from models import db
+from models.pac_operation import PacOperation, PacSample
+from models.rollups import reconcile_rollups, rollup_columns
+from models.routing import routed_engines
+from models.workplan import Workplan, WorkplanTask
+
+TASK_ROLLUP = rollup_columns('workplan_tasks') + ['progress']
+SAMPLE_ROLLUP = rollup_columns('pac_samples')
+
+@pytest.fixture
+def workplans(app):
+    """Two workplans without tasks, both with a manual progress of 10"""
+    with app.app_context():
+        plans = [Workplan(title=f'Rollup check {number}', progress=10) for number in range(2)]
+        db.session.add_all(plans)
+        db.session.commit()
+        ids = [plan.id for plan in plans]
+        db.session.remove()
+    yield ids
+    with app.app_context():
+        WorkplanTask.query.filter(WorkplanTask.workplan_id.in_(ids)).delete()
+        Workplan.query.filter(Workplan.id.in_(ids)).delete()
+        db.session.commit()
+
+def stored(app, table, row_id, columns):
+    """The columns of one row as stored, read past the ORM"""
+    with app.app_context():
+        row = db.session.execute(text(f"SELECT {', '.join(columns)} FROM {table} WHERE id = :id"),
+                                 {'id': row_id}).one()
+        db.session.remove()
+    return dict(zip(columns, row))
+
+def task_rollup(app, workplan_id):
+    return stored(app, 'workplans', workplan_id, TASK_ROLLUP)
+
+def rollup(count=0, pending=0, in_progress=0, completed=0, cancelled=0, progress=10):
+    return dict(zip(TASK_ROLLUP, (count, pending, in_progress, completed, cancelled, progress)))
+
+def add_task(client, workplan_id, status='pending'):
+    response = client.post(f'/api/workplans/{workplan_id}/tasks', json={'title': 'Rollup task', 'status': status})
+    assert response.status_code == 201
+    return response.get_json()['task']['id']
+
+def change(app, model, row_id, **values):
+    with app.app_context():
+        row = db.session.get(model, row_id)
+        for name, value in values.items():
+            setattr(row, name, value)
+        db.session.commit()
+        db.session.remove()
+
+def delete(app, model, row_id):
+    with app.app_context():
+        db.session.delete(db.session.get(model, row_id))
+        db.session.commit()
+        db.session.remove()
+
+def test_insert_counts_the_task_and_derives_progress(app, client, workplans):
+    add_task(client, workplans[0], 'pending')
+    add_task(client, workplans[0], 'completed')
+
+    assert task_rollup(app, workplans[0]) == rollup(count=2, pending=1, completed=1, progress=50)
+    assert task_rollup(app, workplans[1]) == rollup()
+
+def test_bulk_insert_counts_every_task(app, client, workplans):
+    rows = [{'workplan_id': workplans[0], 'title': 'Rollup task', 'status': 'completed'},
+            {'workplan_id': workplans[1], 'title': 'Rollup task', 'status': 'in_progress'},
+            {'workplan_id': workplans[1], 'title': 'Rollup task'}]
+
+    assert client.post('/api/workplans/tasks/bulk', json={'tasks': rows}).status_code == 201
+
+    assert task_rollup(app, workplans[0]) == rollup(count=1, completed=1, progress=100)
+    assert task_rollup(app, workplans[1]) == rollup(count=2, pending=1, in_progress=1, progress=0)
+
+def test_status_change_moves_the_count(app, client, workplans):
+    task_id = add_task(client, workplans[0], 'pending')
+    add_task(client, workplans[0], 'pending')
+
+    change(app, WorkplanTask, task_id, status='completed')
+
+    assert task_rollup(app, workplans[0]) == rollup(count=2, pending=1, completed=1, progress=50)
+
+def test_delete_uncounts_the_task(app, client, workplans):
+    task_id = add_task(client, workplans[0], 'completed')
+    add_task(client, workplans[0], 'pending')
+
+    delete(app, WorkplanTask, task_id)
+
+    assert task_rollup(app, workplans[0]) == rollup(count=1, pending=1, progress=0)
+
+def test_move_to_another_workplan_updates_both(app, client, workplans):
+    task_id = add_task(client, workplans[0], 'completed')
+    add_task(client, workplans[0], 'pending')
+
+    change(app, WorkplanTask, task_id, workplan_id=workplans[1])
+
+    assert task_rollup(app, workplans[0]) == rollup(count=1, pending=1, progress=0)
+    assert task_rollup(app, workplans[1]) == rollup(count=1, completed=1, progress=100)
+
+def test_all_cancelled_tasks_keep_the_given_progress(app, client, workplans):
+    add_task(client, workplans[0], 'cancelled')
+    add_task(client, workplans[0], 'cancelled')
+
+    assert task_rollup(app, workplans[0]) == rollup(count=2, cancelled=2, progress=10)
+    # and with no counted tasks a manual progress is kept
+    response = client.put(f'/api/workplans/{workplans[0]}', json={'progress': 35})
+    assert response.get_json()['workplan']['progress'] == 35
+
+def test_manual_progress_is_put_back_when_derived(app, client, workplans):
+    add_task(client, workplans[0], 'completed')
+    add_task(client, workplans[0], 'pending')
+    add_task(client, workplans[0], 'pending')
+    add_task(client, workplans[0], 'pending')
+
+    response = client.put(f'/api/workplans/{workplans[0]}', json={'progress': 90})
+
+    assert response.status_code == 200
+    assert response.get_json()['workplan']['progress'] == 25
+    assert task_rollup(app, workplans[0])['progress'] == 25
+
+def test_workplan_without_tasks_takes_manual_progress(app, client, workplans):
+    response = client.put(f'/api/workplans/{workplans[0]}', json={'progress': 90})
+
+    assert response.get_json()['workplan']['progress'] == 90
+
+def test_workplan_list_never_reads_the_tasks(app, client, workplans):
+    add_task(client, workplans[0], 'completed')
+    with app.app_context():
+        engines = routed_engines()
+
+    with count_queries(*engines) as statements:
+        response = client.get('/api/workplans/?limit=500')
+
+    assert response.status_code == 200
+    listed = {row['id']: row for row in response.get_json()['workplans']}
+    assert 'tasks' not in listed[workplans[0]]
+    assert {name: listed[workplans[0]][name] for name in TASK_ROLLUP} == rollup(count=1, completed=1, progress=100)
+    assert statements and not any('workplan_tasks' in statement for statement in statements)
+    # Tasks are still embedded on request
+    embedded = client.get('/api/workplans/?limit=500&include=tasks').get_json()['workplans']
+    assert [len(row['tasks']) for row in embedded if row['id'] == workplans[0]] == [1]
+
+def corrupt(app, workplan_id, **values):
+    """Write rollup columns directly, past the triggers, as drift would"""
+    assignments = ', '.join(f'{name} = :{name}' for name in values)
+    with app.app_context():
+        db.session.execute(text(f'UPDATE workplans SET {assignments} WHERE id = :id'), {**values, 'id': workplan_id})
+        db.session.commit()
+        db.session.remove()
+
+def reconcile(app, child_tables=None):
+    with app.app_context():
+        with db.engine.begin() as connection:
+            return reconcile_rollups(connection, child_tables)
+
+def test_reconcile_repairs_drifted_counts(app, client, workplans):
+    add_task(client, workplans[0], 'completed')
+    add_task(client, workplans[0], 'pending')
+    corrupt(app, workplans[0], task_count=7, tasks_pending=0, tasks_completed=5)
+    corrupt(app, workplans[1], task_count=3, tasks_in_progress=3)
+
+    repaired = reconcile(app, ['workplan_tasks'])
+
+    assert repaired['workplans'] == 2
+    assert task_rollup(app, workplans[0]) == rollup(count=2, pending=1, completed=1, progress=50)
+    assert task_rollup(app, workplans[1]) == rollup()
+    assert reconcile(app, ['workplan_tasks']) == {'workplans': 0, 'workplans.progress': 0}
+
+def test_reconcile_repairs_drifted_progress(app, client, workplans):
+    add_task(client, workplans[0], 'completed')
+    with app.app_context():
+        # Without the trigger, as in a database written before it existed
+        db.session.execute(text('DROP TRIGGER trg_workplans_progress_derived'))
+        db.session.execute(text('UPDATE workplans SET progress = 3 WHERE id = :id'), {'id': workplans[0]})
+        db.session.commit()
+        db.session.remove()
+    try:
+        assert reconcile(app, ['workplan_tasks'])['workplans.progress'] == 1
+        assert task_rollup(app, workplans[0])['progress'] == 100
+    finally:
+        rerun_migration(app, 'migrations.v005_task_rollups')
+
+def rerun_migration(app, name):
+    with app.app_context():
+        with db.engine.begin() as connection:
+            importlib.import_module(name).upgrade(connection)
+
+def test_migration_can_be_rerun_and_backfills(app, client, workplans):
+    add_task(client, workplans[0], 'in_progress')
+    corrupt(app, workplans[0], task_count=0, tasks_in_progress=0)
+
+    rerun_migration(app, 'migrations.v005_task_rollups')
+
+    assert task_rollup(app, workplans[0]) == rollup(count=1, in_progress=1, progress=0)
+
+@pytest.fixture
+def operations(app):
+    """Two operations without samples"""
+    with app.app_context():
+        rows = [PacOperation(operation_type='sampling', facility_name=f'Rollup check {number}',
+                             operation_date=datetime(2030, 8, 1, 9, 0)) for number in range(2)]
+        db.session.add_all(rows)
+        db.session.commit()
+        ids = [row.id for row in rows]
+        db.session.remove()
+    yield ids
+    with app.app_context():
+        PacSample.query.filter(PacSample.operation_id.in_(ids)).delete()
+        PacOperation.query.filter(PacOperation.id.in_(ids)).delete()
+        db.session.commit()
+
+def sample_rollup(app, operation_id):
+    return stored(app, 'pac_operations', operation_id, SAMPLE_ROLLUP)
+
+def samples(count=0, collected=0, in_transit=0, testing=0, completed=0):
+    return dict(zip(SAMPLE_ROLLUP, (count, collected, in_transit, testing, completed)))
+
+def add_sample(client, operation_id):
+    response = client.post(f'/api/pac/operations/{operation_id}/samples', json={'sample_type': 'water'})
+    assert response.status_code == 201
+    return response.get_json()['sample']['id']
+
+def test_operation_list_never_reads_the_samples(app, client, operations):
+    add_sample(client, operations[0])
+    with app.app_context():
+        engines = routed_engines()
+
+    with count_queries(*engines) as statements:
+        response = client.get('/api/pac/operations?limit=500')
+
+    assert response.status_code == 200
+    listed = {row['id']: row for row in response.get_json()['operations']}
+    assert 'samples' not in listed[operations[0]]
+    assert {name: listed[operations[0]][name] for name in SAMPLE_ROLLUP} == samples(count=1, collected=1)
+    assert statements and not any('pac_samples' in statement for statement in statements)
+    # Samples are still embedded on request, and on the detail route by default
+    embedded = client.get('/api/pac/operations?limit=500&include=samples').get_json()['operations']
+    assert [len(row['samples']) for row in embedded if row['id'] == operations[0]] == [1]
+    detail = client.get(f'/api/pac/operations/{operations[0]}').get_json()['operation']
+    assert len(detail['samples']) == 1
+
+def test_created_sample_is_counted(app, client, operations):
+    add_sample(client, operations[0])
+    add_sample(client, operations[0])
+
+    assert sample_rollup(app, operations[0]) == samples(count=2, collected=2)
+    assert sample_rollup(app, operations[1]) == samples()
+
+def test_bulk_samples_are_counted(app, client, operations):
+    rows = [{'operation_id': operations[0], 'sample_type': 'water'},
+            {'operation_id': operations[1], 'sample_type': 'water'},
+            {'operation_id': operations[1], 'sample_type': 'swab'}]
+
+    assert client.post('/api/pac/samples/bulk', json={'samples': rows}).status_code == 201
+
+    assert sample_rollup(app, operations[0]) == samples(count=1, collected=1)
+    assert sample_rollup(app, operations[1]) == samples(count=2, collected=2)
+
+def test_sample_status_change_moves_the_count(app, client, operations):
+    first = add_sample(client, operations[0])
+    second = add_sample(client, operations[0])
+
+    change(app, PacSample, first, status='testing')
+    change(app, PacSample, second, status='in_transit')
+    change(app, PacSample, second, status='completed')
+
+    assert sample_rollup(app, operations[0]) == samples(count=2, testing=1, completed=1)
+
+def test_deleted_sample_is_uncounted(app, client, operations):
+    sample_id = add_sample(client, operations[0])
+    add_sample(client, operations[0])
+
+    delete(app, PacSample, sample_id)
+
+    assert sample_rollup(app, operations[0]) == samples(count=1, collected=1)
+
+def test_sample_moved_to_another_operation_updates_both(app, client, operations):
+    sample_id = add_sample(client, operations[0])
+    change(app, PacSample, sample_id, status='testing')
+
+    change(app, PacSample, sample_id, operation_id=operations[1])
+
+    assert sample_rollup(app, operations[0]) == samples()
+    assert sample_rollup(app, operations[1]) == samples(count=1, testing=1)
+
+def test_reconcile_repairs_drifted_sample_counts(app, client, operations):
+    add_sample(client, operations[0])
+    with app.app_context():
+        db.session.execute(text('UPDATE pac_operations SET sample_count = 4, samples_completed = 4 '
+                                'WHERE id IN (:first, :second)'),
+                           {'first': operations[0], 'second': operations[1]})
+        db.session.commit()
+        db.session.remove()
+
+    assert reconcile(app, ['pac_samples']) == {'pac_operations': 2}
+    assert sample_rollup(app, operations[0]) == samples(count=1, collected=1)
+    assert sample_rollup(app, operations[1]) == samples()
+
+def test_sample_migration_can_be_rerun_and_backfills(app, client, operations):
+    add_sample(client, operations[0])
+    with app.app_context():
+        db.session.execute(text('UPDATE pac_operations SET sample_count = 0, samples_collected = 0 WHERE id = :id'),
+                           {'id': operations[0]})
+        db.session.commit()
+        db.session.remove()
+
+    rerun_migration(app, 'migrations.v006_sample_rollups')
+
+    assert sample_rollup(app, operations[0]) == samples(count=1, collected=1)
@@ -0,0 +1,157 @@
+import threading
+from datetime import datetime
+
+import pytest
+
+import routes.pac_routes
+from models import db
+from models.pac_operation import PacOperation
+
+WINDOW = {'from': '2030-05-06', 'to': '2030-05-06'}
+ROSTER = [{'name': 'Planner A', 'capacity': 2}, {'name': 'Planner B', 'capacity': 2}]
+
+@pytest.fixture
+def clashing_visits(app):
+    """Four unassigned inspections at the same time, more than the roster can cover"""
+    with app.app_context():
+        operations = [PacOperation(operation_type='inspection', facility_name=f'Clash {number}',
+                                   operation_date=datetime(2030, 5, 6, 9, 0), status='scheduled',
+                                   priority=priority)
+                      for number, priority in enumerate(('low', 'critical', 'medium', 'high'))]
+        db.session.add_all(operations)
+        db.session.commit()
+        ids = [operation.id for operation in operations]
+    yield ids
+    with app.app_context():
+        PacOperation.query.filter(PacOperation.id.in_(ids)).delete()
+        db.session.commit()
+
+def inspectors(app, ids):
+    with app.app_context():
+        rows = PacOperation.query.filter(PacOperation.id.in_(ids)).with_entities(
+            PacOperation.id, PacOperation.inspector).all()
+        db.session.remove()
+    return dict(rows)
+
+def test_dry_run_plans_without_writing(app, client, clashing_visits):
+    response = client.post('/api/pac/schedule/optimize', json={**WINDOW, 'inspectors': ROSTER})
+
+    assert response.status_code == 200
+    plan = response.get_json()
+    assert plan['dry_run'] is True
+    assert plan['summary']['changed'] == 2
+    # Highest priority first; the two left over clash with both inspectors
+    assert {change['id'] for change in plan['changes']} == set(clashing_visits[1::2])
+    assert {visit['id'] for visit in plan['unassigned']} == set(clashing_visits[0::2])
+    assert set(inspectors(app, clashing_visits).values()) == {None}
+
+@pytest.fixture
+def concurrent_write(app):
+    """POST an operation from another thread, returning its status code (None if it did not finish)"""
+    name = 'Written while planning'
+    
+    def write():
+        result = {}
+        thread = threading.Thread(target=lambda: result.update(status=app.test_client().post(
+            '/api/pac/operations', json={'operation_type': 'audit', 'facility_name': name,
+                                         'operation_date': '2030-05-07T09:00:00'}).status_code))
+        thread.start()
+        thread.join(timeout=5)
+        return result.get('status')
+    
+    yield write
+    with app.app_context():
+        PacOperation.query.filter_by(facility_name=name).delete()
+        db.session.commit()
+
+def test_planning_leaves_the_writer_free(client, clashing_visits, concurrent_write, monkeypatch):
+    plan_schedule = routes.pac_routes.plan_schedule
+    statuses = []
+    
+    def plan_while_writing(*args):
+        statuses.append(concurrent_write())
+        return plan_schedule(*args)
+    
+    monkeypatch.setattr(routes.pac_routes, 'plan_schedule', plan_while_writing)
+    response = client.post('/api/pac/schedule/optimize', json={**WINDOW, 'inspectors': ROSTER})
+
+    assert response.status_code == 200
+    assert statuses == [201]
+
+@pytest.mark.parametrize('group_commit', [False, True])
+def test_applies_the_plan(app, client, clashing_visits, group_commit):
+    app.config['GROUP_COMMIT'] = group_commit
+    response = client.post('/api/pac/schedule/optimize',
+                           json={**WINDOW, 'inspectors': ROSTER, 'dry_run': False})
+
+    assert response.status_code == 200
+    plan = response.get_json()
+    assert (plan['applied'], plan['skipped']) == (2, 0)
+    assigned = {change['id']: change['to']['inspector'] for change in plan['changes']}
+    assert inspectors(app, assigned) == assigned
+    # Planning again finds nothing to change
+    again = client.post('/api/pac/schedule/optimize', json={**WINDOW, 'inspectors': ROSTER})
+    assert again.get_json()['summary']['changed'] == 0
+
+@pytest.mark.parametrize('body', [
+    {'inspectors': ROSTER},
+    {**WINDOW, 'inspectors': []},
+    {**WINDOW, 'inspectors': ROSTER, 'dry_run': 'no'},
+    {**WINDOW, 'inspectors': ROSTER, 'clear_unplaced': 1},
+    {**WINDOW, 'inspectors': [{'name': 'Planner A', 'id': 999999, 'capacity': 2}]},
+])
+def test_rejects_invalid_requests(client, body):
+    assert client.post('/api/pac/schedule/optimize', json=body).status_code == 400
+
+@pytest.fixture
+def assigned_visits(app):
+    """Three inspections at the same time assigned to Planner A, and three to an inspector off the roster"""
+    with app.app_context():
+        operations = [PacOperation(operation_type='inspection', facility_name=f'Assigned {number}',
+                                   operation_date=datetime(2030, 5, 6, 9, 0), status='scheduled',
+                                   priority='medium', inspector=inspector)
+                      for inspector in ('Planner A', 'Retired Inspector') for number in range(3)]
+        db.session.add_all(operations)
+        db.session.commit()
+        ids = {operation.id: operation.inspector for operation in operations}
+    yield ids
+    with app.app_context():
+        PacOperation.query.filter(PacOperation.id.in_(ids)).delete()
+        db.session.commit()
+
+def test_a_partial_roster_clears_no_assignment(app, client, assigned_visits):
+    response = client.post('/api/pac/schedule/optimize',
+                           json={**WINDOW, 'inspectors': ROSTER[:1], 'dry_run': False})
+
+    plan = response.get_json()
+    assert response.status_code == 200
+    assert (plan['changes'], plan['applied']) == ([], 0)
+    assert plan['summary']['unchanged'] == 1
+    # Planner A can only make one of the clashing visits; the others keep that inspector
+    assert len(plan['unassigned']) == 2
+    assert {visit['id'] for visit in plan['outside_roster']} == \
+        {operation_id for operation_id, name in assigned_visits.items() if name == 'Retired Inspector'}
+    assert {visit['inspector'] for visit in plan['outside_roster']} == {'Retired Inspector'}
+    assert inspectors(app, assigned_visits) == assigned_visits
+
+def test_unplaced_visits_are_cleared_on_request(app, client, assigned_visits):
+    response = client.post('/api/pac/schedule/optimize',
+                           json={**WINDOW, 'inspectors': ROSTER[:1], 'dry_run': False, 'clear_unplaced': True})
+
+    plan = response.get_json()
+    assert (plan['applied'], plan['summary']['outside_roster']) == (2, 3)
+    assert all(change['to'] == {'inspector': None, 'inspector_id': None} for change in plan['changes'])
+    stored = inspectors(app, assigned_visits)
+    assert sorted(stored.values(), key=str) == [None, None, 'Planner A', *['Retired Inspector'] * 3]
+
+def test_without_keep_assignments_visits_off_the_roster_are_moved_onto_it(app, client, assigned_visits):
+    response = client.post('/api/pac/schedule/optimize',
+                           json={**WINDOW, 'inspectors': ROSTER, 'dry_run': False, 'keep_assignments': False})
+
+    plan = response.get_json()
+    assert plan['outside_roster'] == []
+    # Two inspectors take two of the six; the other four keep who they had
+    assert plan['summary']['unassigned'] == 4
+    assert all(change['to']['inspector'] in ('Planner A', 'Planner B') for change in plan['changes'])
+    stored = inspectors(app, assigned_visits)
+    assert None not in stored.values()
@@ -0,0 +1,159 @@
+from datetime import datetime
+
+import pytest
+
+from models import db
+from models.pac_operation import PacOperation
+from models.workplan import Workplan
+
+WHEN = datetime(2030, 10, 1, 9, 0)
+
+@pytest.fixture
+def operations(app):
+    """Operations with made-up words no seeded row contains, keyed by a short name"""
+    rows = {
+        'dairy': PacOperation(facility_name='Quorvane Dairy', notes='Cold storage checked', inspector='Ulric Fenwold'),
+        'bakery': PacOperation(facility_name='Quorvane Bakery', findings='Flour dust', inspector='Tamsin Quorvane'),
+        'plant': PacOperation(facility_name='Zephyrine Zephyrine Plant', notes='Zephyrine'),
+        'depot': PacOperation(facility_name='Holloway Depot', facility_address='12 Zephyrine Road',
+                              notes='Routine visit to the depot with a long list of unrelated notes'),
+    }
+    with app.app_context():
+        for row in rows.values():
+            row.operation_type = 'audit'
+            row.operation_date = WHEN
+        db.session.add_all(rows.values())
+        db.session.commit()
+        ids = {name: row.id for name, row in rows.items()}
+        db.session.remove()
+    yield ids
+    with app.app_context():
+        PacOperation.query.filter(PacOperation.operation_date == WHEN).delete()
+        db.session.commit()
+
+@pytest.fixture
+def workplans(app):
+    with app.app_context():
+        rows = {
+            'survey': Workplan(title='Brackenfold survey', description='Coastal sites', assigned_to='Team Vellacott'),
+            'audit': Workplan(title='Harvest audit', description='Brackenfold farms', assigned_to='Orrin Sable'),
+        }
+        db.session.add_all(rows.values())
+        db.session.commit()
+        ids = {name: row.id for name, row in rows.items()}
+        db.session.remove()
+    yield ids
+    with app.app_context():
+        Workplan.query.filter(Workplan.id.in_(ids.values())).delete()
+        db.session.commit()
+
+def found(client, url, query):
+    response = client.get(f'{url}?{query}')
+    assert response.status_code == 200
+    body = response.get_json()
+    return [row['id'] for row in body['operations' if 'pac' in url else 'workplans']]
+
+def operation_ids(client, query):
+    return found(client, '/api/pac/operations', query)
+
+def test_every_word_must_match(client, operations):
+    assert set(operation_ids(client, 'q=quorvane')) == {operations['dairy'], operations['bakery']}
+    assert operation_ids(client, 'q=quorvane dairy') == [operations['dairy']]
+    assert operation_ids(client, 'q=dairy quorvane') == [operations['dairy']]
+    assert operation_ids(client, 'q=quorvane brewery') == []
+
+def test_words_match_by_prefix(client, operations, workplans):
+    assert set(operation_ids(client, 'q=quor')) == {operations['dairy'], operations['bakery']}
+    assert operation_ids(client, 'q=quor flo') == [operations['bakery']]
+    assert operation_ids(client, 'q=orvane') == []
+    assert set(found(client, '/api/workplans/', 'q=bracken')) == set(workplans.values())
+
+def test_search_covers_every_indexed_column(client, operations):
+    assert operation_ids(client, 'q=storage') == [operations['dairy']]
+    assert operation_ids(client, 'q=flour') == [operations['bakery']]
+    assert operation_ids(client, 'q=fenwold') == [operations['dairy']]
+    assert operation_ids(client, 'q=holloway road') == [operations['depot']]
+
+def test_punctuation_is_not_query_syntax(client, operations):
+    assert operation_ids(client, 'q="quorvane" (dairy* -:^') == [operations['dairy']]
+
+def test_best_match_comes_first(client, operations, workplans):
+    assert operation_ids(client, 'q=zephyrine') == [operations['plant'], operations['depot']]
+    # a title match in a short workplan outranks a description match
+    assert found(client, '/api/workplans/', 'q=brackenfold') == [workplans['survey'], workplans['audit']]
+
+def test_rank_cursors_page_through_the_matches(client, operations):
+    everything = operation_ids(client, 'q=zephyrine&limit=50')
+    pages = []
+    cursor = ''
+    while True:
+        body = client.get(f'/api/pac/operations?q=zephyrine&limit=1{cursor}').get_json()
+        pages.append([row['id'] for row in body['operations']])
+        if body['next_cursor'] is None:
+            break
+        cursor = f"&cursor={body['next_cursor']}"
+
+    assert pages == [[operation_id] for operation_id in everything]
+
+def test_search_combines_with_filters(client, operations):
+    assert operation_ids(client, 'q=quorvane&status=completed') == []
+    assert set(operation_ids(client, 'q=quorvane&type=audit')) == {operations['dairy'], operations['bakery']}
+    body = client.get('/api/pac/operations?q=quorvane&include_total=true').get_json()
+    assert body['total'] == 2
+
+@pytest.mark.parametrize('url', ['/api/pac/operations', '/api/workplans/',
+                                 '/api/pac/operations/export', '/api/workplans/export'])
+@pytest.mark.parametrize('q', ['', '%20%20', '*%22()'])
+def test_search_without_words_is_a_bad_request(client, url, q):
+    response = client.get(f'{url}?q={q}')
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Search text must contain at least one letter or digit'}
+
+def test_put_reindexes_the_row(client, operations, workplans):
+    response = client.put(f"/api/pac/operations/{operations['dairy']}", json={'facility_name': 'Marrowick Creamery'})
+    assert response.status_code == 200
+
+    assert operation_ids(client, 'q=quorvane') == [operations['bakery']]
+    assert operation_ids(client, 'q=marrowick') == [operations['dairy']]
+    # the other indexed columns of the row are still found
+    assert operation_ids(client, 'q=storage') == [operations['dairy']]
+
+    client.put(f"/api/workplans/{workplans['survey']}", json={'assigned_to': 'Team Pellworth'})
+    assert found(client, '/api/workplans/', 'q=vellacott') == []
+    assert found(client, '/api/workplans/', 'q=pellworth') == [workplans['survey']]
+
+def test_delete_removes_the_row_from_the_index(client, operations, workplans):
+    assert client.delete(f"/api/pac/operations/{operations['bakery']}").status_code == 200
+    assert client.delete(f"/api/workplans/{workplans['audit']}").status_code == 200
+
+    assert operation_ids(client, 'q=quorvane') == [operations['dairy']]
+    assert operation_ids(client, 'q=flour') == []
+    assert found(client, '/api/workplans/', 'q=brackenfold') == [workplans['survey']]
+
+def test_bulk_inserted_rows_are_indexed(client, operations):
+    rows = [{'operation_type': 'audit', 'facility_name': f'Quorvane Annex {number}',
+             'operation_date': WHEN.isoformat(), 'inspector': 'Ulric Brandt'} for number in range(3)]
+
+    report = client.post('/api/pac/operations/bulk', json={'operations': rows}).get_json()
+
+    annexes = [result['id'] for result in report['results']]
+    assert set(operation_ids(client, 'q=quorvane annex')) == set(annexes)
+    assert set(operation_ids(client, 'inspector=ulric')) == {operations['dairy'], *annexes}
+
+def test_inspector_matches_a_word_prefix_of_the_inspector_only(client, operations):
+    assert operation_ids(client, 'inspector=fenw') == [operations['dairy']]
+    assert operation_ids(client, 'inspector=Ulric Fenwold') == [operations['dairy']]
+    assert operation_ids(client, 'inspector=tamsin') == [operations['bakery']]
+    # Quorvane is a facility name everywhere but the bakery's inspector
+    assert operation_ids(client, 'inspector=quorvane') == [operations['bakery']]
+    assert operation_ids(client, 'inspector=wold') == []
+
+def test_assigned_to_matches_a_word_prefix_of_the_assignee_only(client, workplans):
+    assert found(client, '/api/workplans/', 'assigned_to=vella') == [workplans['survey']]
+    assert found(client, '/api/workplans/', 'assigned_to=orrin sab') == [workplans['audit']]
+    assert found(client, '/api/workplans/', 'assigned_to=brackenfold') == []
+
+def test_inspector_and_q_together(client, operations):
+    assert operation_ids(client, 'q=quorvane&inspector=tamsin') == [operations['bakery']]
+    assert operation_ids(client, 'q=dairy&inspector=tamsin') == []
@@ -0,0 +1,120 @@
+from collections import Counter
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine
+
+from migrations import upgrade_database
+from models.dashboard_counter import COUNTED_TABLES
+from models.rollups import reconcile_rollups
+from models.table_version import VERSIONED_TABLES
+from utils.search import SEARCH_INDEXES
+from utils.seeder import FTS_DEFAULT_HASH_SIZE, SEEDED_TABLES, Seeder
+from utils.sqlite_profile import install_transactions
+
+TODAY = date(2031, 3, 12)
+
+@pytest.fixture
+def engine(app, tmp_path):
+    """A migrated database of its own, so the seed leaves the shared one alone"""
+    engine = create_engine(f'sqlite:///{tmp_path / "seed.db"}')
+    install_transactions(engine)
+    with app.app_context():
+        upgrade_database(engine)
+        yield engine
+    engine.dispose()
+
+@pytest.fixture
+def seeded(engine):
+    """Seeds in chunks smaller than every table; the counts, and the schema and versions from before"""
+    with engine.connect() as connection:
+        schema, versions = deferrable(connection), table_versions(connection)
+    counts = Seeder(engine, seed=7, chunk_size=50, today=TODAY, log=lambda message: None).run(
+        users=30, workplans=40, tasks_per_workplan=3, operations=300, samples_per_operation=2)
+    return counts, schema, versions
+
+def deferrable(connection):
+    """The indexes and triggers the seeder drops and recreates"""
+    placeholders = ', '.join('?' for _ in SEEDED_TABLES)
+    return connection.exec_driver_sql(
+        f"SELECT type, name, tbl_name, sql FROM sqlite_master WHERE type IN ('index', 'trigger') "
+        f"AND tbl_name IN ({placeholders}) AND sql IS NOT NULL ORDER BY name",
+        SEEDED_TABLES
+    ).all()
+
+def table_versions(connection):
+    return dict(connection.exec_driver_sql('SELECT table_name, version FROM table_versions').all())
+
+def test_counts_are_the_rows_inserted(engine, seeded):
+    counts = seeded[0]
+
+    with engine.connect() as connection:
+        stored = {table: connection.exec_driver_sql(f'SELECT COUNT(*) FROM {table}').scalar()
+                  for table in SEEDED_TABLES}
+
+    assert counts == stored
+    assert (counts['users'], counts['workplans'], counts['pac_operations']) == (30, 40, 300)
+    assert counts['workplan_tasks'] > 50 and counts['pac_samples'] > 50
+
+def test_indexes_and_triggers_are_recreated(engine, seeded):
+    schema = seeded[1]
+
+    with engine.connect() as connection:
+        after = deferrable(connection)
+
+    assert after == schema
+    kinds = Counter(kind for kind, *_ in schema)
+    assert kinds['index'] and kinds['trigger']
+
+def test_rollups_need_no_repair(engine, seeded):
+    with engine.connect() as connection, connection.begin():
+        repaired = reconcile_rollups(connection)
+        samples = connection.exec_driver_sql(
+            'SELECT SUM(sample_count), SUM(samples_collected + samples_in_transit + samples_testing '
+            '+ samples_completed) FROM pac_operations').one()
+        tasks = connection.exec_driver_sql('SELECT SUM(task_count) FROM workplans').scalar()
+
+    assert set(repaired.values()) == {0}
+    assert tuple(samples) == (seeded[0]['pac_samples'],) * 2
+    assert tasks == seeded[0]['workplan_tasks']
+
+def test_dashboard_counters_match_a_recount(engine, seeded):
+    with engine.connect() as connection:
+        stored = Counter({tuple(row[:4]): row[4] for row in connection.exec_driver_sql(
+            'SELECT entity, status, kind, priority, count FROM dashboard_counters WHERE count != 0')})
+        recount = Counter()
+        for table, kind_column in COUNTED_TABLES.items():
+            for status, kind, priority in connection.exec_driver_sql(
+                    f"SELECT status, {kind_column or 'NULL'}, priority FROM {table}"):
+                recount[table, status or '', kind or '', priority or ''] += 1
+
+    assert stored == recount
+    assert sum(count for (entity, *_), count in stored.items() if entity == 'pac_operations') == 300
+
+@pytest.mark.parametrize('source', SEARCH_INDEXES)
+def test_search_indexes_match_their_tables(engine, seeded, source):
+    name = SEARCH_INDEXES[source].name
+
+    with engine.connect() as connection, connection.begin():
+        # rank 1 compares the index with the rows of its content table
+        connection.exec_driver_sql(f"INSERT INTO {name}({name}, rank) VALUES ('integrity-check', 1)")
+        hash_size = connection.exec_driver_sql(f"SELECT v FROM {name}_config WHERE k = 'hashsize'").scalar()
+
+    assert hash_size == FTS_DEFAULT_HASH_SIZE
+
+def test_search_finds_every_seeded_match(engine, seeded):
+    with engine.connect() as connection:
+        matched = connection.exec_driver_sql(
+            "SELECT COUNT(*) FROM pac_operations_fts WHERE pac_operations_fts MATCH 'facility_name : golden'").scalar()
+        scanned = connection.exec_driver_sql(
+            "SELECT COUNT(*) FROM pac_operations WHERE facility_name LIKE 'Golden %'").scalar()
+
+    assert matched == scanned > 0
+
+def test_versions_of_the_seeded_tables_are_bumped(engine, seeded):
+    versions = seeded[2]
+
+    with engine.connect() as connection:
+        after = table_versions(connection)
+
+    assert all(after[table] > versions.get(table, 0) for table in VERSIONED_TABLES)
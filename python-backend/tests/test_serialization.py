@@ -0,0 +1,50 @@
+import pytest
+
+from models import db
+from models.pac_operation import PacOperation
+from models.workplan import Workplan
+
+# Detail URL -> (model, response key, include values)
+DETAILS = {
+    '/api/pac/operations/{id}?include=samples,counts': (PacOperation, 'operation', ('samples', 'counts')),
+    '/api/pac/operations/{id}?include=': (PacOperation, 'operation', ()),
+    '/api/workplans/{id}?include=tasks,counts': (Workplan, 'workplan', ('tasks', 'counts')),
+    '/api/workplans/{id}?include=': (Workplan, 'workplan', ()),
+}
+
+@pytest.mark.parametrize('url', DETAILS)
+def test_to_dict_matches_the_encoded_detail(app, client, url):
+    model, key, include = DETAILS[url]
+    with app.app_context():
+        instance = model.query.order_by(model.id).first()
+        expected = instance.to_dict(include)
+        row_id = instance.id
+        db.session.remove()
+
+    encoded = client.get(url.format(id=row_id)).get_json()[key]
+
+    assert encoded == expected
+
+@pytest.mark.parametrize('url, key, body', [
+    ('/api/pac/operations', 'operation', {'operation_type': 'audit', 'facility_name': 'Serializer check',
+                                          'operation_date': '2030-10-01T09:30:00'}),
+    ('/api/workplans/', 'workplan', {'title': 'Serializer check', 'start_date': '2030-10-01'}),
+])
+def test_created_row_reads_back_the_same(app, client, url, key, body):
+    created = client.post(url, json=body)
+
+    assert created.status_code == 201
+    row = created.get_json()[key]
+    try:
+        detail = client.get(f"{url.rstrip('/')}/{row['id']}").get_json()[key]
+        assert row == detail
+    finally:
+        client.delete(f"{url.rstrip('/')}/{row['id']}")
+
+def test_dates_are_written_in_iso_format(client):
+    response = client.post('/api/workplans/', json={'title': 'Serializer check', 'start_date': '2030-10-01'})
+    workplan = response.get_json()['workplan']
+    client.delete(f"/api/workplans/{workplan['id']}")
+
+    assert workplan['start_date'] == '2030-10-01'
+    assert workplan['created_at'].startswith('20') and 'T' in workplan['created_at']
@@ -0,0 +1,33 @@
+import pytest
+
+from models.routing import routed_engines
+from utils.sqlite_profile import SQLITE_PROFILES, connection_pragmas
+
+# The production profile as SQLite reports it back (NORMAL is 1, MEMORY is 2)
+PRODUCTION = {
+    'busy_timeout': 5000,
+    'journal_mode': 'wal',
+    'synchronous': 1,
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64000,
+    'temp_store': 2,
+}
+
+@pytest.fixture
+def engines(app):
+    with app.app_context():
+        writer, reader = routed_engines()
+    return {'writer': writer, 'reader': reader}
+
+def test_expected_values_cover_the_production_profile():
+    assert PRODUCTION.keys() == SQLITE_PROFILES['production'].keys()
+
+@pytest.mark.parametrize('role', ['writer', 'reader'])
+def test_connections_use_the_production_profile(engines, role):
+    with engines[role].connect() as connection:
+        assert connection_pragmas(connection) == PRODUCTION
+
+@pytest.mark.parametrize('role, query_only', [('writer', 0), ('reader', 1)])
+def test_only_the_reader_is_read_only(engines, role, query_only):
+    with engines[role].connect() as connection:
+        assert connection_pragmas(connection, ['query_only']) == {'query_only': query_only}
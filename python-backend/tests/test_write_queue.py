@@ -0,0 +1,162 @@
+import threading
+from datetime import datetime
+
+import pytest
+
+from models import db
+from models.pac_operation import PacOperation, PacSample
+from models.user import User
+from models.workplan import WorkplanTask
+from utils.write_queue import WriteQueue, run_write, write_queue
+
+def create_operation(name):
+    def work(session):
+        operation = PacOperation(operation_type='inspection', facility_name=name,
+                                 operation_date=datetime(2025, 3, 1, 9, 0))
+        session.add(operation)
+        session.flush()
+        return operation.id
+    return work
+
+def fail(session):
+    session.add(PacOperation(operation_type='inspection', facility_name='Failing write',
+                             operation_date=datetime(2025, 3, 1, 9, 0)))
+    session.flush()
+    raise ValueError('rejected')
+
+def submit_together(app, queue, works):
+    """Submit every write from its own thread at once, returning results (or exceptions) in order"""
+    outcomes = [None] * len(works)
+
+    def submit(position, work):
+        with app.app_context():
+            try:
+                outcomes[position] = queue.submit(work)
+            except Exception as e:
+                outcomes[position] = e
+
+    threads = [threading.Thread(target=submit, args=(position, work)) for position, work in enumerate(works)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+def test_group_commits_once(app, sql_trace):
+    app.config['GROUP_COMMIT_WINDOW'] = 0.2
+    queue = WriteQueue()
+    names = [f'Grouped write {number}' for number in range(5)]
+    outcomes = submit_together(app, queue, [create_operation(name) for name in names])
+
+    assert queue.groups == 1
+    assert all(isinstance(outcome, int) for outcome in outcomes)
+    assert sql_trace.count('BEGIN') == 1
+    assert sql_trace.count('COMMIT') == 1
+    assert sum(statement.startswith('SAVEPOINT') for statement in sql_trace) == len(names)
+    with app.app_context():
+        saved = PacOperation.query.filter(PacOperation.facility_name.in_(names)).count()
+        db.session.remove()
+    assert saved == len(names)
+
+def test_failed_write_rolls_back_alone(app, sql_trace):
+    app.config['GROUP_COMMIT_WINDOW'] = 0.2
+    queue = WriteQueue()
+    outcomes = submit_together(app, queue, [create_operation('Kept write'), fail,
+                                            create_operation('Kept write')])
+
+    assert queue.groups == 1
+    assert isinstance(outcomes[1], ValueError)
+    assert isinstance(outcomes[0], int) and isinstance(outcomes[2], int)
+    assert sql_trace.count('COMMIT') == 1
+    assert sum(statement.startswith('ROLLBACK TO SAVEPOINT') for statement in sql_trace) == 1
+    with app.app_context():
+        assert PacOperation.query.filter_by(facility_name='Failing write').count() == 0
+        assert PacOperation.query.filter_by(facility_name='Kept write').count() == 2
+        db.session.remove()
+
+def run_in_request(app, view, timeout=10):
+    """Call view() in a POST request context on another thread, failing if it is still blocked after timeout"""
+    outcome = {}
+
+    def call():
+        with app.test_request_context(method='POST'):
+            try:
+                outcome['result'] = view()
+            except Exception as e:
+                outcome['error'] = e
+
+    thread = threading.Thread(target=call, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), 'the request is blocked waiting for the writer connection'
+    return outcome
+
+def test_run_write_releases_the_request_session(app):
+    app.config['GROUP_COMMIT'] = True
+
+    def view():
+        # A read on the request session takes the writer connection (one, with read routing)
+        PacOperation.query.first()
+        return run_write(create_operation('Written after a read'))
+
+    outcome = run_in_request(app, view)
+    assert isinstance(outcome.get('result'), int)
+
+def test_run_write_rejects_changes_on_the_request_session(app):
+    app.config['GROUP_COMMIT'] = True
+
+    def view():
+        db.session.add(PacOperation(operation_type='audit', facility_name='Outside run_write',
+                                    operation_date=datetime(2025, 3, 1, 9, 0)))
+        return run_write(create_operation('Never queued'))
+
+    outcome = run_in_request(app, view)
+    assert isinstance(outcome.get('error'), RuntimeError)
+
+def test_register_goes_through_the_group_commit(app, client):
+    app.config['GROUP_COMMIT'] = True
+    writes = write_queue.writes
+    account = {'username': 'queued-user', 'email': 'queued-user@example.com', 'password': 'queued-pass-1'}
+    try:
+        response = client.post('/api/auth/register', json={**account, 'full_name': 'Queued User'})
+        duplicate = client.post('/api/auth/register', json={**account, 'email': 'other@example.com'})
+
+        assert response.status_code == 201
+        assert response.get_json()['user']['username'] == 'queued-user'
+        assert write_queue.writes == writes + 1
+        assert duplicate.status_code == 400
+        with app.app_context():
+            assert User.query.filter_by(username='queued-user').one().check_password('queued-pass-1')
+            db.session.remove()
+    finally:
+        with app.app_context():
+            User.query.filter_by(username='queued-user').delete()
+            db.session.commit()
+
+@pytest.mark.parametrize('url, model, row', [
+    ('/api/pac/operations/bulk', PacOperation,
+     {'operation_type': 'audit', 'facility_name': 'Queued bulk', 'operation_date': '2025-03-01T09:00:00'}),
+    ('/api/pac/samples/bulk', PacSample, {'operation_id': 1, 'sample_type': 'swab'}),
+    ('/api/workplans/tasks/bulk', WorkplanTask, {'workplan_id': 1, 'title': 'Queued bulk'}),
+])
+def test_bulk_inserts_go_through_the_group_commit(app, client, url, model, row):
+    app.config['GROUP_COMMIT'] = True
+    writes = write_queue.writes
+
+    response = client.post(url, json=[row, row, {}])
+
+    report = response.get_json()
+    ids = [result['id'] for result in report['results'] if result['success']]
+    try:
+        assert response.status_code == 207
+        assert len(ids) == 2
+        # All the valid rows are one write
+        assert write_queue.writes == writes + 1
+        with app.app_context():
+            assert model.query.filter(model.id.in_(ids)).count() == 2
+            db.session.remove()
+    finally:
+        with app.app_context():
+            model.query.filter(model.id.in_(ids)).delete()
+            db.session.commit()
+
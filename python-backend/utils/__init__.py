@@ -0,0 +1 @@
+# Shared helpers for the API routes
@@ -0,0 +1,138 @@
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g, jsonify, request, session
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+TOKEN_SALT = 'fwfps-auth-token'
+DEFAULT_TOKEN_MAX_AGE = 8 * 3600
+DEFAULT_PRINCIPAL_TTL = 60
+MAX_PRINCIPALS = 1024
+
+def _serializer():
+    secret_key = current_app.config.get('SECRET_KEY')
+    if not secret_key:
+        # Never sign with a default: a known key lets anyone mint a token for any user
+        raise RuntimeError('SECRET_KEY is not set, so tokens can be neither issued nor checked')
+    return URLSafeTimedSerializer(secret_key, salt=TOKEN_SALT)
+
+def issue_token(user):
+    """A signed bearer token naming the user; valid for AUTH_TOKEN_MAX_AGE seconds"""
+    return _serializer().dumps({'uid': user.id, 'usr': user.username, 'role': user.role})
+
+def verify_token(token):
+    """The principal a token was issued for, or None if it is forged or expired.
+
+    Only the signature and age are checked, so this never touches the database.
+    """
+    max_age = current_app.config.get('AUTH_TOKEN_MAX_AGE', DEFAULT_TOKEN_MAX_AGE)
+    try:
+        payload = _serializer().loads(token, max_age=max_age)
+    except (SignatureExpired, BadSignature):
+        return None
+    return {'user_id': payload['uid'], 'username': payload['usr'], 'role': payload['role']}
+
+def current_principal():
+    """The authenticated principal of this request, from a bearer token or the session cookie"""
+    if 'principal' not in g:
+        principal = None
+        scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() == 'bearer' and token:
+            principal = verify_token(token.strip())
+        elif session.get('user_id'):
+            principal = {'user_id': session['user_id'], 'username': session.get('username'),
+                         'role': session.get('role')}
+        g.principal = principal
+    return g.principal
+
+def login_required(view):
+    """Reject the request with 401 unless it carries a valid token or session"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if current_principal() is None:
+            return jsonify({'error': 'Not authenticated'}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+class PrincipalCache:
+    """Per-process cache of serialized users for routes that need the full row.
+
+    Entries expire after PRINCIPAL_CACHE_TTL seconds and are dropped as soon
+    as a commit in this process changes or deletes the user (for example
+    deactivating it). The TTL bounds staleness for changes made by other
+    worker processes.
+    """
+    
+    def __init__(self, max_entries=MAX_PRINCIPALS):
+        self.max_entries = max_entries
+        self._entries = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get_user(self, user_id):
+        """The user's to_dict(), or None when it does not exist or is deactivated"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry['expires'] > time.monotonic():
+                self.hits += 1
+                return entry['user']
+            self.misses += 1
+            generation = self._generations.get(user_id, 0)
+
+        from models.user import User
+        from models import db
+        user = db.session.get(User, user_id)
+        data = user.to_dict() if user is not None and user.is_active else None
+
+        with self._lock:
+            # Skip storing a row read before a concurrent invalidation
+            if self._generations.get(user_id, 0) == generation:
+                if len(self._entries) >= self.max_entries and user_id not in self._entries:
+                    self._entries.pop(next(iter(self._entries)))
+                ttl = current_app.config.get('PRINCIPAL_CACHE_TTL', DEFAULT_PRINCIPAL_TTL)
+                self._entries[user_id] = {'user': data, 'expires': time.monotonic() + ttl}
+        return data
+    
+    def invalidate(self, *user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._generations[user_id] = self._generations.get(user_id, 0) + 1
+                self._entries.pop(user_id, None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+principal_cache = PrincipalCache()
+
+def current_user():
+    """The cached user row of the authenticated principal, or None"""
+    principal = current_principal()
+    if principal is None:
+        return None
+    return principal_cache.get_user(principal['user_id'])
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changed_users(session, flush_context):
+    from models.user import User
+    changed = session.info.setdefault('changed_users', set())
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            changed.add(obj.id)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_users_on_commit(session):
+    principal_cache.invalidate(*session.info.pop('changed_users', ()))
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_users_on_rollback(session):
+    session.info.pop('changed_users', None)
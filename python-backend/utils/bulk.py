@@ -0,0 +1,112 @@
+from sqlalchemy import insert, select
+
+from models import db
+from utils.cache import mark_changed
+from utils.query_guard import BATCH_OPTION
+from utils.write_queue import run_write
+
+BULK_CHUNK_SIZE = 500
+MAX_BULK_ROWS = 10000
+
+def read_bulk_payload(data, key):
+    """Return the list of rows from a bulk request body.
+
+    The body may be a bare JSON array or an object holding the array under
+    key. Raises ValueError when it is neither or holds too many rows.
+    """
+    rows = data.get(key) if isinstance(data, dict) else data
+    if not isinstance(rows, list) or not rows:
+        raise ValueError(f'Request body must be a non-empty array or an object with a "{key}" array')
+    if len(rows) > MAX_BULK_ROWS:
+        raise ValueError(f'At most {MAX_BULK_ROWS} rows can be created per request')
+    return rows
+
+def is_id(value):
+    """Whether value can be a row id (bool is an int subclass, but not an id)"""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def row_text(data, field, default=None):
+    """The string in data[field], or default when it is missing or null; raises ValueError for other types"""
+    value = data.get(field)
+    if value is None:
+        return default
+    if not isinstance(value, str):
+        raise ValueError(f'{field} must be a string')
+    return value
+
+def row_int(data, field, default=None):
+    """The integer in data[field], or default when it is missing or null; raises ValueError for other types"""
+    value = data.get(field)
+    if value is None:
+        return default
+    if not is_id(value):
+        raise ValueError(f'{field} must be an integer')
+    return value
+
+def validate_rows(rows, parse_row):
+    """Run parse_row over every row, collecting values and per-row errors"""
+    valid = []
+    results = []
+    for index, row in enumerate(rows):
+        try:
+            if not isinstance(row, dict):
+                raise ValueError('Row must be a JSON object')
+            valid.append((index, parse_row(row)))
+            results.append(None)
+        except (ValueError, TypeError) as e:
+            results.append({'index': index, 'success': False, 'error': str(e)})
+    return valid, results
+
+def existing_ids(id_column, ids):
+    """The subset of ids present in id_column's table, looked up in chunks"""
+    ids = list(set(ids))
+    found = set()
+    for start in range(0, len(ids), BULK_CHUNK_SIZE):
+        chunk = ids[start:start + BULK_CHUNK_SIZE]
+        statement = select(id_column).where(id_column.in_(chunk)).execution_options(**{BATCH_OPTION: True})
+        found.update(db.session.execute(statement).scalars())
+    return found
+
+def insert_rows(session, model, values, chunk_size=BULK_CHUNK_SIZE):
+    """Insert rows with multi-row INSERT ... RETURNING statements, returning their ids in order.
+
+    Runs in session's transaction; the caller commits. Column defaults are
+    applied as for ORM inserts, and triggers on the table (the dashboard
+    counters and search index) fire as usual.
+    """
+    table = model.__table__
+    statement = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+    ids = []
+    for start in range(0, len(values), chunk_size):
+        chunk = values[start:start + chunk_size]
+        ids.extend(session.execute(statement, chunk).scalars())
+    # Core inserts bypass the ORM flush hooks, so tell the response cache directly
+    mark_changed(session, table.name)
+    return ids
+
+def bulk_create(model, rows, parse_row):
+    """Validate and insert rows, returning the JSON report and HTTP status.
+
+    Invalid rows are reported and skipped; all valid rows are inserted in
+    one transaction, through run_write like every other write.
+    """
+    valid, results = validate_rows(rows, parse_row)
+    if valid:
+        values = [value for _, value in valid]
+        ids = run_write(lambda session: insert_rows(session, model, values))
+        for (index, _), row_id in zip(valid, ids):
+            results[index] = {'index': index, 'success': True, 'id': row_id}
+
+    failed = len(rows) - len(valid)
+    if not valid:
+        status = 400
+    elif failed:
+        status = 207
+    else:
+        status = 201
+    return {
+        'success': failed == 0,
+        'created': len(valid),
+        'failed': failed,
+        'results': results
+    }, status
@@ -0,0 +1,125 @@
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+DEFAULT_TTL = 30
+MAX_ENTRIES = 256
+
+class ResponseCache:
+    """In-process cache of serialized responses, invalidated per table.
+
+    Every entry is tagged with the tables it was computed from. Committing a
+    change to one of those tables drops the entry; the TTL bounds staleness
+    for writes the commit hooks cannot see, such as other worker processes.
+    """
+    
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+    
+    def generation(self, tags):
+        """Snapshot of the tag versions, taken before computing a value"""
+        with self._lock:
+            return tuple(self._generations.get(tag, 0) for tag in tags)
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry['expires'] > time.monotonic():
+                self.hits += 1
+                return entry['value']
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+    
+    def set(self, key, value, tags, ttl, generation):
+        """Store a value unless one of its tags was invalidated since generation was taken"""
+        with self._lock:
+            if tuple(self._generations.get(tag, 0) for tag in tags) != generation:
+                return
+            if len(self._entries) >= self.max_entries and key not in self._entries:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = {'value': value, 'tags': tuple(tags), 'expires': time.monotonic() + ttl}
+    
+    def invalidate(self, tags):
+        """Drop every entry computed from any of the given tables"""
+        tags = set(tags)
+        if not tags:
+            return
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+            stale = [key for key, entry in self._entries.items() if tags.intersection(entry['tags'])]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+response_cache = ResponseCache()
+
+def mark_changed(session, *tables):
+    """Record tables written outside the ORM unit of work (e.g. Core bulk inserts)"""
+    session.info.setdefault('changed_tables', set()).update(tables)
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changed_tables(session, flush_context):
+    changed = session.info.setdefault('changed_tables', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        table = getattr(obj, '__tablename__', None)
+        if table:
+            changed.add(table)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_on_commit(session):
+    response_cache.invalidate(session.info.pop('changed_tables', ()))
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_on_rollback(session):
+    session.info.pop('changed_tables', None)
+
+def cached_response(depends_on):
+    """Cache a GET view's successful responses until a depends_on table changes"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = (request.endpoint, tuple(sorted(kwargs.items())), request.query_string)
+            cached = response_cache.get(key)
+            if cached is not None:
+                body, mimetype = cached
+                response = current_app.response_class(body, status=200, mimetype=mimetype)
+                response.headers['X-Cache'] = 'HIT'
+                return response
+            
+            generation = response_cache.generation(depends_on)
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                ttl = current_app.config.get('RESPONSE_CACHE_TTL', DEFAULT_TTL)
+                response_cache.set(key, (response.get_data(), response.mimetype), depends_on, ttl, generation)
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
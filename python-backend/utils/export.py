@@ -0,0 +1,67 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+
+from flask import Response, stream_with_context
+
+from utils.serializer import default_fields
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+EXPORT_BATCH_SIZE = 1000
+
+def parse_export_format(args):
+    """Read format= from the query string, raising ValueError for unsupported formats"""
+    export_format = args.get('format', 'ndjson').lower()
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    return export_format
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def _encode_ndjson(names, rows):
+    return ''.join(json.dumps(dict(zip(names, map(_plain, row)))) + '\n' for row in rows)
+
+def _encode_csv(names, rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([_plain(value) for value in row] for row in rows)
+    return buffer.getvalue()
+
+def stream_export(query, model, export_format, filename, batch_size=EXPORT_BATCH_SIZE):
+    """Stream every row of query as NDJSON or CSV without building the result in memory.
+
+    Only the model's default_fields are selected (no ORM objects), the columns
+    its JSON representation has, so internal columns and the rollup counters
+    stay out of the export. Rows are read
+    from the database cursor batch_size at a time with yield_per, so memory
+    use stays flat whatever the size of the export. The first chunk is sent as
+    soon as the first row is available.
+    """
+    names = list(default_fields(model))
+    columns = [model.__table__.columns[name] for name in names]
+    encode = _encode_csv if export_format == 'csv' else _encode_ndjson
+    rows = query.with_entities(*columns).yield_per(batch_size)
+
+    def generate():
+        if export_format == 'csv':
+            yield _encode_csv(names, [names])
+        batch = []
+        first = True
+        for row in rows:
+            batch.append(row)
+            if first or len(batch) >= batch_size:
+                yield encode(names, batch)
+                batch = []
+                first = False
+        if batch:
+            yield encode(names, batch)
+
+    response = Response(stream_with_context(generate()), mimetype=EXPORT_FORMATS[export_format])
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}.{export_format}'
+    return response
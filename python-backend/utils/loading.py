@@ -0,0 +1,45 @@
+from sqlalchemy.orm import joinedload, selectinload
+
+from utils.serializer import default_fields
+
+def parse_include(args, allowed, default):
+    """Read the comma separated include parameter, raising ValueError on unknown values"""
+    raw = args.get('include')
+    if raw is None:
+        return set(default)
+    include = {part.strip() for part in raw.replace('|', ',').split(',') if part.strip()}
+    unknown = include - set(allowed)
+    if unknown:
+        raise ValueError(f"Unknown include value(s): {', '.join(sorted(unknown))}")
+    return include
+
+def parse_fields(args, model, default=None, extra=()):
+    """Read the comma separated fields parameter, raising ValueError on unknown field names.
+
+    Returns the chosen field names in the model's serialization order, always
+    with id. Without the parameter the result is default, or every field the
+    model serializes; extra fields (such as the rollups include=counts asks
+    for) are added either way. A model's rollup_fields may be asked for too.
+    """
+    available = default_fields(model) + getattr(model, 'rollup_fields', ())
+    raw = args.get('fields')
+    if raw is None:
+        fields = set(default if default is not None else default_fields(model))
+    else:
+        fields = {part.strip() for part in raw.split(',') if part.strip()}
+        unknown = fields - set(available)
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(sorted(unknown))}")
+    fields.update(extra)
+    return tuple(name for name in available if name == 'id' or name in fields)
+
+def load_children(query, relationship, needed, strategy='selectin'):
+    """Eager load a child collection when it will be serialized.
+
+    selectin issues one extra IN query for the whole page and suits lists;
+    joined folds the children into the parent query and suits single rows.
+    """
+    if not needed:
+        return query
+    loader = joinedload if strategy == 'joined' else selectinload
+    return query.options(loader(relationship))
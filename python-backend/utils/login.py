@@ -0,0 +1,149 @@
+import atexit
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from flask import current_app
+from sqlalchemy import bindparam, update
+from werkzeug.security import check_password_hash
+
+DEFAULT_HASH_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+DEFAULT_HASH_QUEUE = 256
+DEFAULT_HASH_TIMEOUT = 30
+DEFAULT_FLUSH_INTERVAL = 5
+
+class LoginBusy(Exception):
+    """Raised when a password check cannot be queued or does not finish in time"""
+
+class PasswordVerifier:
+    """Runs password hash checks on a small, bounded thread pool.
+
+    The hash is a deliberately slow KDF. Running it on a fixed number of
+    workers caps the CPU a login burst can take from other requests; at most
+    LOGIN_HASH_QUEUE checks wait for a worker and further logins are
+    refused with LoginBusy instead of piling up.
+    """
+    
+    def __init__(self):
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+    
+    def _start(self):
+        with self._lock:
+            if self._executor is None:
+                workers = current_app.config.get('LOGIN_HASH_WORKERS', DEFAULT_HASH_WORKERS)
+                queue = current_app.config.get('LOGIN_HASH_QUEUE', DEFAULT_HASH_QUEUE)
+                self._slots = threading.BoundedSemaphore(workers + queue)
+                self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+    
+    def verify(self, password_hash, password):
+        """True when password matches password_hash; runs on the hashing pool"""
+        if not password_hash:
+            return False
+        if self._executor is None:
+            self._start()
+        if not self._slots.acquire(blocking=False):
+            raise LoginBusy('Too many logins in progress, please retry')
+        try:
+            future = self._executor.submit(check_password_hash, password_hash, password)
+        except Exception:
+            self._slots.release()
+            raise
+        # The slot is held until the hash finishes, even if this request gives up waiting
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=current_app.config.get('LOGIN_HASH_TIMEOUT', DEFAULT_HASH_TIMEOUT))
+        except TimeoutError:
+            raise LoginBusy('Login timed out waiting for a password check, please retry')
+
+class LastLoginBuffer:
+    """Write-behind buffer for users.last_login.
+
+    Logins record their timestamp here and a background thread writes all
+    pending timestamps in one UPDATE transaction every
+    LAST_LOGIN_FLUSH_INTERVAL seconds, so a login burst takes the SQLite
+    write lock a few times rather than once per login. An interval of 0
+    writes each login immediately.
+    """
+    
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._app = None
+        self._thread = None
+        self.flushes = 0
+        self.written = 0
+    
+    def record(self, user_id, when):
+        interval = current_app.config.get('LAST_LOGIN_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL)
+        with self._lock:
+            self._pending[user_id] = when
+        if interval <= 0:
+            self.flush()
+            return
+        if self._thread is None:
+            self._start(current_app._get_current_object(), interval)
+    
+    def pending(self, user_id):
+        """The buffered last_login of a user, or None when nothing is waiting"""
+        with self._lock:
+            return self._pending.get(user_id)
+    
+    def flush(self):
+        """Write every pending timestamp in one transaction; returns the row count"""
+        from models import db
+        from models.user import User
+
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+        users = User.__table__
+        statement = update(users) \
+            .where(users.c.id == bindparam('user_id')) \
+            .values(last_login=bindparam('login_at'))
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(statement, [
+                    {'user_id': user_id, 'login_at': when} for user_id, when in batch.items()
+                ])
+        except Exception:
+            # Put the batch back unless a newer login for the same user arrived meanwhile
+            with self._lock:
+                for user_id, when in batch.items():
+                    self._pending.setdefault(user_id, when)
+            raise
+        # Cached copies of these users now hold an old last_login
+        from utils.auth import principal_cache
+        principal_cache.invalidate(*batch)
+        self.flushes += 1
+        self.written += len(batch)
+        return len(batch)
+    
+    def _start(self, app, interval):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._app = app
+            self._thread = threading.Thread(target=self._run, args=(interval,),
+                                            name='last-login-flush', daemon=True)
+            self._thread.start()
+        atexit.register(self._flush_at_exit)
+    
+    def _run(self, interval):
+        while True:
+            time.sleep(interval)
+            with self._app.app_context():
+                try:
+                    self.flush()
+                except Exception:
+                    self._app.logger.exception('Writing buffered last_login values failed')
+    
+    def _flush_at_exit(self):
+        with self._app.app_context():
+            self.flush()
+
+password_verifier = PasswordVerifier()
+last_login_buffer = LastLoginBuffer()
@@ -0,0 +1,210 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import current_app, g, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Upper bounds (le) of the histogram buckets
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+class Histogram:
+    """A Prometheus histogram with labels, rendered in the text exposition format"""
+    
+    def __init__(self, name, documentation, buckets, labelnames):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for position, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['buckets'][position] += 1
+            series['sum'] += value
+            series['count'] += 1
+    
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+    
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for labels, values in sorted(self._series.items()):
+                pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labels)]
+                for bound, count in zip(self.buckets, values['buckets']):
+                    lines.append(f'{self.name}_bucket{_label_set(pairs, le=bound)} {count}')
+                lines.append(f'{self.name}_bucket{_label_set(pairs, le="+Inf")} {values["count"]}')
+                lines.append(f'{self.name}_sum{_label_set(pairs)} {values["sum"]}')
+                lines.append(f'{self.name}_count{_label_set(pairs)} {values["count"]}')
+        return '\n'.join(lines)
+
+def _label_set(pairs, le=None):
+    if le is not None:
+        pairs = pairs + [f'le="{le}"']
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class RequestMetrics:
+    """Per-route histograms of request time, SQL work, serialization and response size.
+    
+    The route label is the URL rule (/api/pac/operations/<int:operation_id>),
+    not the path, so the number of series stays bounded. Values are kept per
+    process; every worker exposes its own.
+    """
+    
+    def __init__(self):
+        labels = ('method', 'route')
+        self.request_duration = Histogram(
+            'fwfps_request_duration_seconds', 'Wall time spent handling a request',
+            DURATION_BUCKETS, labels + ('status',))
+        self.sql_queries = Histogram(
+            'fwfps_request_sql_queries', 'SQL statements executed per request',
+            QUERY_COUNT_BUCKETS, labels)
+        self.sql_duration = Histogram(
+            'fwfps_request_sql_duration_seconds', 'Time spent executing SQL per request',
+            DURATION_BUCKETS, labels)
+        self.serialization_duration = Histogram(
+            'fwfps_response_serialization_seconds', 'Time spent encoding the response body as JSON',
+            DURATION_BUCKETS, labels)
+        self.response_size = Histogram(
+            'fwfps_response_size_bytes', 'Size of response bodies with a known length',
+            SIZE_BUCKETS, labels)
+        self.histograms = (self.request_duration, self.sql_queries, self.sql_duration,
+                           self.serialization_duration, self.response_size)
+    
+    def record(self, method, route, status, timing, size):
+        labels = (method, route)
+        self.request_duration.observe(timing.elapsed(), *labels, str(status))
+        self.sql_queries.observe(timing.queries, *labels)
+        self.sql_duration.observe(timing.sql_seconds, *labels)
+        self.serialization_duration.observe(timing.serialize_seconds, *labels)
+        if size is not None:
+            self.response_size.observe(size, *labels)
+    
+    def clear(self):
+        for histogram in self.histograms:
+            histogram.clear()
+    
+    def render(self):
+        return '\n'.join(histogram.render() for histogram in self.histograms) + '\n'
+
+class RequestTiming:
+    """What one request spent its time on, accumulated on flask.g"""
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.serialize_seconds = 0.0
+    
+    def elapsed(self):
+        return time.perf_counter() - self.started
+    
+    def server_timing(self):
+        """Value of the Server-Timing header, in milliseconds"""
+        return (f'app;dur={self.elapsed() * 1000:.2f}, '
+                f'db;dur={self.sql_seconds * 1000:.2f};desc="{self.queries} queries", '
+                f'serialize;dur={self.serialize_seconds * 1000:.2f}')
+
+request_metrics = RequestMetrics()
+
+def current_timing():
+    """The RequestTiming of the request being handled, or None outside one"""
+    if has_request_context():
+        return g.get('request_timing')
+    return None
+
+@contextmanager
+def serialization_timer():
+    """Count the time spent in the block as the request's serialization time"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing = current_timing()
+        if timing is not None:
+            timing.serialize_seconds += time.perf_counter() - started
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider, with jsonify's encoding counted as serialization time"""
+    
+    def response(self, *args, **kwargs):
+        with serialization_timer():
+            return super().response(*args, **kwargs)
+
+# Called as listener(statement, seconds, context, executemany) after every statement
+_statement_listeners = []
+
+def on_statement(listener):
+    """Register listener to be called with the duration of every SQL statement.
+
+    Statements are timed once, here, for the request metrics and every
+    listener (such as the query guard).
+    """
+    _statement_listeners.append(listener)
+    return listener
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_statement(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('statement_started', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _end_statement(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - conn.info['statement_started'].pop()
+    timing = current_timing()
+    if timing is not None:
+        timing.queries += 1
+        timing.sql_seconds += seconds
+    for listener in _statement_listeners:
+        listener(statement, seconds, context, executemany)
+
+@event.listens_for(Engine, 'handle_error')
+def _failed_statement(exception_context):
+    # after_cursor_execute does not run for a failed statement
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('statement_started'):
+        connection.info['statement_started'].pop()
+
+def init_metrics(app):
+    """Time every request of app and register GET /api/metrics.
+
+    With SERVER_TIMING enabled, responses also carry a Server-Timing header
+    with the request, SQL and serialization times.
+    """
+    app.json = TimedJSONProvider(app)
+
+    @app.before_request
+    def _start_timing():
+        g.request_timing = RequestTiming()
+
+    @app.after_request
+    def _record_timing(response):
+        timing = g.pop('request_timing', None)
+        if timing is None:
+            return response
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        size = None if response.is_streamed else response.calculate_content_length()
+        request_metrics.record(request.method, route, response.status_code, timing, size)
+        if current_app.config.get('SERVER_TIMING'):
+            response.headers['Server-Timing'] = timing.server_timing()
+        return response
+
+    @app.route('/api/metrics', methods=['GET'])
+    def metrics():
+        """Request metrics in the Prometheus text format"""
+        return current_app.response_class(request_metrics.render(),
+                                          mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,104 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import and_, or_, select, union_all
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+# The kind of cursor search results (q=) page with; other lists name their sort column
+RANK_CURSOR = 'rank'
+
+def encode_cursor(kind, sort_value, row_id):
+    """Encode the cursor kind and the (sort value, id) of the last row on a page as an opaque token"""
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([kind, sort_value, row_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, kind):
+    """Decode a token produced by encode_cursor for kind, raising ValueError if it is malformed or another kind.
+
+    Rank cursors carry a number. The others carry a datetime (sent as an ISO
+    string), or None when the last row's sort value was NULL.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_kind, sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if cursor_kind == RANK_CURSOR:
+            if isinstance(sort_value, bool) or not isinstance(sort_value, (int, float)):
+                raise ValueError
+        elif sort_value is not None:
+            sort_value = datetime.fromisoformat(sort_value)
+        row_id = int(row_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if cursor_kind != kind:
+        raise ValueError('Cursor belongs to a different ordering; start again without it')
+    return sort_value, row_id
+
+def parse_page_args(args, sort_column):
+    """Read limit, cursor and include_total from the request query string.
+
+    The cursor must come from the same ordering: searches (q=) page by rank,
+    other requests by sort_column.
+    """
+    try:
+        limit = int(args.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    if limit < 1 or limit > MAX_LIMIT:
+        raise ValueError(f'limit must be between 1 and {MAX_LIMIT}')
+
+    cursor = args.get('cursor')
+    kind = RANK_CURSOR if args.get('q') is not None else sort_column.key
+    after = decode_cursor(cursor, kind) if cursor else None
+    include_total = args.get('include_total', 'false').lower() in ('1', 'true', 'yes')
+    return limit, after, include_total
+
+def keyset_page(query, sort_column, id_column, after, limit):
+    """Fetch one page ordered by (sort_column, id_column) descending, NULL sort values last.
+
+    Rows are located by seeking past the last (sort value, id) pair of the
+    previous page instead of using OFFSET, so every page costs the same no
+    matter how deep into the result set it is. When sort_column is nullable,
+    the rows without a sort value are read by a second seek on id in the
+    same statement (a UNION ALL); an OR in the first would turn its index
+    range into a scan. Only datetime columns can be nullable sort columns.
+    """
+    seek = query.filter(sort_column.is_not(None))
+    nulls = query.filter(sort_column.is_(None))
+    if after is not None:
+        sort_value, row_id = after
+        if sort_value is None:
+            seek = None
+            nulls = nulls.filter(id_column < row_id)
+        else:
+            seek = seek.filter(or_(
+                sort_column < sort_value,
+                and_(sort_column == sort_value, id_column < row_id)
+            ))
+
+    # Fetch one extra row to find out whether another page exists
+    page = None if seek is None else seek.order_by(sort_column.desc(), id_column.desc()).limit(limit + 1)
+    if not sort_column.nullable:
+        rows = page.all()
+    else:
+        null_page = nulls.order_by(id_column.desc()).limit(limit + 1)
+        if page is None:
+            rows = null_page.all()
+        else:
+            # SQLite only takes a LIMIT inside a compound SELECT from subqueries.
+            # The two arms are merged here: at most 2 * (limit + 1) rows, and
+            # an ORDER BY on the compound would sort them in a temporary b-tree
+            both = union_all(select(page.subquery()), select(null_page.subquery())).subquery()
+            rows = sorted(query.session.execute(select(both)).all(), reverse=True, key=lambda row: (
+                getattr(row, sort_column.key) is not None, getattr(row, sort_column.key) or datetime.min,
+                getattr(row, id_column.key)
+            ))[:limit + 1]
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(sort_column.key, getattr(last, sort_column.key), getattr(last, id_column.key))
+    return rows, next_cursor
@@ -0,0 +1,123 @@
+import re
+import sysconfig
+import traceback
+from collections import Counter
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy.engine.interfaces import ExecuteStyle
+
+import utils.metrics
+from utils.metrics import on_statement
+
+DEFAULT_REPEAT_THRESHOLD = 5
+DEFAULT_SLOW_QUERY_MS = 200
+STACK_DEPTH = 8
+
+# Frames from these directories (the standard library and installed packages) are left out of stacks
+LIBRARY_DIRS = tuple({sysconfig.get_paths()[name] for name in ('stdlib', 'platstdlib', 'purelib', 'platlib')})
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_VALUE_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_SPACE = re.compile(r'\s+')
+# Left out of the reported stacks: the guard and the statement timer that calls it
+_OWN_FILES = (__file__, utils.metrics.__file__)
+# Execution option marking statements a caller deliberately runs in chunks
+BATCH_OPTION = 'query_guard_batch'
+
+class QueryBudgetExceeded(Exception):
+    """Raised after a request that ran more SQL statements than its view allows"""
+
+def fingerprint(statement):
+    """The statement with literals and IN lists collapsed, so repeats compare equal"""
+    statement = _STRING.sub('?', statement)
+    statement = _NUMBER.sub('?', statement)
+    statement = _VALUE_LIST.sub('(?, ...)', statement)
+    return _SPACE.sub(' ', statement).strip()
+
+def is_batch(context, executemany):
+    """Whether a statement is one part of a batch (executemany, multi-row INSERT pages, chunked reads)"""
+    if executemany or context is None:
+        return executemany
+    return (context.execute_style is not ExecuteStyle.EXECUTE
+            or context.execution_options.get(BATCH_OPTION, False))
+
+def query_budget(limit):
+    """Declare the most SQL statements one request to the view may run.
+
+    Goes directly under the route decorator. A request over the budget is
+    logged, and fails with QueryBudgetExceeded when QUERY_BUDGET_ENFORCE is
+    set, as the benchmark checks do.
+    """
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
+
+def app_stack():
+    """The application frames of the current stack, innermost last"""
+    frames = [frame for frame in traceback.extract_stack()
+              if not frame.filename.startswith(LIBRARY_DIRS) and frame.filename not in _OWN_FILES]
+    return ''.join(traceback.format_list(frames[-STACK_DEPTH:]))
+
+class QueryTracker:
+    """The statements of one request, by fingerprint"""
+    
+    def __init__(self):
+        self.counts = Counter()
+        self.total = 0
+    
+    def record(self, statement, seconds, config, batch=False):
+        self.total += 1
+        # A batch repeats one statement by design, so it only counts toward the budget
+        if batch:
+            return
+        key = fingerprint(statement)
+        self.counts[key] += 1
+        threshold = config.get('QUERY_REPEAT_THRESHOLD', DEFAULT_REPEAT_THRESHOLD)
+        # Report a repeated statement once per request, when it crosses the threshold
+        if self.counts[key] == threshold + 1:
+            current_app.logger.warning(
+                'Possible N+1: statement repeated more than %d times in %s %s\n%s\nat\n%s',
+                threshold, request.method, _route(), key, app_stack())
+
+def _route():
+    return request.url_rule.rule if request.url_rule is not None else request.path
+
+@on_statement
+def _check_statement(statement, seconds, context, executemany):
+    # Only requests are checked: CLI commands such as flask seed run long statements on purpose
+    if not has_request_context():
+        return
+    config = current_app.config
+    batch = is_batch(context, executemany)
+    slow_ms = config.get('SLOW_QUERY_MS', DEFAULT_SLOW_QUERY_MS)
+    if not batch and seconds * 1000 > slow_ms:
+        current_app.logger.warning('Slow query (%.1f ms, budget %d ms) in %s %s\n%s\nat\n%s',
+                                   seconds * 1000, slow_ms, request.method, _route(),
+                                   fingerprint(statement), app_stack())
+    tracker = g.get('query_tracker')
+    if tracker is not None:
+        tracker.record(statement, seconds, config, batch)
+
+def init_query_guard(app):
+    """Track the SQL of every request of app and check it against the view's query_budget"""
+
+    @app.before_request
+    def _start_tracking():
+        g.query_tracker = QueryTracker()
+
+    @app.after_request
+    def _check_budget(response):
+        tracker = g.pop('query_tracker', None)
+        view = app.view_functions.get(request.endpoint)
+        budget = getattr(view, 'query_budget', None)
+        if tracker is None or budget is None or tracker.total <= budget:
+            return response
+        repeated = ', '.join(f'{count}x {key[:80]}' for key, count in tracker.counts.most_common(3))
+        message = (f'{request.method} {_route()} ran {tracker.total} SQL statements, '
+                   f'over its budget of {budget} (most repeated: {repeated})')
+        if app.config.get('QUERY_BUDGET_ENFORCE'):
+            raise QueryBudgetExceeded(message)
+        app.logger.warning(message)
+        return response
@@ -0,0 +1,275 @@
+import heapq
+from bisect import bisect_left
+from collections import Counter
+from datetime import date, timedelta
+
+# Planning order: higher weights are placed first
+PRIORITY_WEIGHTS = {'critical': 4, 'high': 3, 'medium': 2, 'low': 1}
+RISK_WEIGHTS = {'critical': 4, 'high': 3, 'medium': 2, 'low': 1}
+# Hours one visit takes an inspector, by operation type
+VISIT_HOURS = {'inspection': 4, 'sampling': 2, 'audit': 8, 'investigation': 6}
+DEFAULT_VISIT_HOURS = 4
+MAX_WINDOW_DAYS = 366
+MAX_DAILY_CAPACITY = 24
+
+def parse_window(data):
+    """Read the inclusive from/to dates of a planning window, raising ValueError when invalid"""
+    try:
+        start = date.fromisoformat(data['from'])
+        end = date.fromisoformat(data['to'])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError('from and to must be dates (YYYY-MM-DD)')
+    if end < start:
+        raise ValueError('to must not be before from')
+    if (end - start).days >= MAX_WINDOW_DAYS:
+        raise ValueError(f'The window can span at most {MAX_WINDOW_DAYS} days')
+    return start, end
+
+def parse_roster(items):
+    """Read the inspector roster, a list of {name, id, capacity}, into (name, id, capacity) tuples.
+
+    capacity is the most visits the inspector can make per day; id (a user
+    id) is optional. Raises ValueError when the roster is invalid.
+    """
+    if not isinstance(items, list) or not items:
+        raise ValueError('inspectors must be a non-empty array')
+    roster = []
+    seen = set()
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise ValueError(f'inspectors[{index}] must be an object')
+        name = item.get('name')
+        inspector_id = item.get('id')
+        capacity = item.get('capacity')
+        if not isinstance(name, str) or not name.strip():
+            raise ValueError(f'inspectors[{index}].name is required')
+        if inspector_id is not None and (not isinstance(inspector_id, int) or isinstance(inspector_id, bool)):
+            raise ValueError(f'inspectors[{index}].id must be an integer')
+        if not isinstance(capacity, int) or isinstance(capacity, bool) or not 1 <= capacity <= MAX_DAILY_CAPACITY:
+            raise ValueError(f'inspectors[{index}].capacity must be an integer from 1 to {MAX_DAILY_CAPACITY}')
+        # Two inspectors can share a name, but not an id
+        key = inspector_id if inspector_id is not None else name.strip().lower()
+        if key in seen:
+            raise ValueError(f'Inspector {inspector_id if inspector_id is not None else name} is listed twice')
+        seen.add(key)
+        roster.append((name.strip(), inspector_id, capacity))
+    return roster
+
+def parse_durations(overrides):
+    """The visit hours per operation type, with the request's overrides applied"""
+    durations = dict(VISIT_HOURS)
+    if overrides is None:
+        return durations
+    if not isinstance(overrides, dict):
+        raise ValueError('durations must be an object of hours per operation type')
+    for operation_type, hours in overrides.items():
+        if not isinstance(hours, (int, float)) or isinstance(hours, bool) or not 0 < hours <= 24:
+            raise ValueError(f'durations.{operation_type} must be a number of hours from 0 to 24')
+        durations[operation_type] = hours
+    return durations
+
+class InspectorSchedule:
+    """The visits booked for one inspector.
+
+    Busy time is kept as sorted, non-overlapping intervals (parallel start
+    and end lists), so checking a new visit for a clash is one binary search
+    and a look at its two neighbours. Visits are also counted per day
+    against the daily capacity.
+    """
+    
+    def __init__(self, position, name, inspector_id, capacity):
+        self.position = position
+        self.name = name
+        self.inspector_id = inspector_id
+        self.capacity = capacity
+        self.starts = []
+        self.ends = []
+        self.per_day = Counter()
+        self.visits = 0
+        self.hours = 0.0
+    
+    def fits(self, start, end):
+        """Whether a visit from start to end clashes with nothing and the day has room"""
+        if self.per_day[start.date()] >= self.capacity:
+            return False
+        position = bisect_left(self.starts, start)
+        if position > 0 and self.ends[position - 1] > start:
+            return False
+        return position == len(self.starts) or self.starts[position] >= end
+    
+    def book(self, start, end):
+        """Add a visit, returning whether it fills the day to capacity.
+        
+        Busy time the visit overlaps (only possible for fixed visits) is
+        merged with it.
+        """
+        day = start.date()
+        self.per_day[day] += 1
+        filled = self.per_day[day] == self.capacity
+        self.visits += 1
+        self.hours += (end - start).total_seconds() / 3600
+        position = bisect_left(self.starts, start)
+        if position > 0 and self.ends[position - 1] > start:
+            position -= 1
+            start = self.starts[position]
+        while position < len(self.starts) and self.starts[position] < end:
+            end = max(end, self.ends[position])
+            del self.starts[position], self.ends[position]
+        self.starts.insert(position, start)
+        self.ends.insert(position, end)
+        return filled
+    
+    def load(self):
+        """Visits booked relative to the daily capacity, the measure workloads are balanced on"""
+        return self.visits / self.capacity
+
+class LoadQueue:
+    """A min-heap of inspector schedules by load, with stale entries skipped lazily"""
+    
+    def __init__(self, schedules):
+        self.versions = [0] * len(schedules)
+        self.schedules = schedules
+        self.heap = [(schedule.load(), schedule.position, 0) for schedule in schedules]
+        heapq.heapify(self.heap)
+    
+    def least_loaded_fitting(self, start, end):
+        """The least loaded schedule with room for the visit, or None"""
+        passed = []
+        found = None
+        while self.heap:
+            entry = heapq.heappop(self.heap)
+            _, position, version = entry
+            if version != self.versions[position]:
+                continue
+            passed.append(entry)
+            if self.schedules[position].fits(start, end):
+                found = self.schedules[position]
+                break
+        for entry in passed:
+            heapq.heappush(self.heap, entry)
+        return found
+    
+    def updated(self, schedule):
+        """Requeue a schedule whose load changed"""
+        self.versions[schedule.position] += 1
+        heapq.heappush(self.heap, (schedule.load(), schedule.position, self.versions[schedule.position]))
+
+def plan_schedule(operations, roster, durations=None, keep_assignments=True, clear_unplaced=False):
+    """Assign inspectors from roster to the scheduled operations without double-booking anyone.
+
+    operations are rows with id, operation_type, operation_date, status,
+    priority, risk_level, inspector and inspector_id. Visits that are under
+    way or completed stay with their inspector and only take up their time.
+    With keep_assignments set, scheduled visits assigned to an inspector who
+    is not on the roster are left alone. The other scheduled visits are
+    placed highest priority and risk first (then earliest), each with its
+    current inspector when keep_assignments is set and that inspector is
+    free, otherwise with the least loaded inspector who is. A visit nobody
+    can take is unplaced, so lower priority work is what gets dropped; it
+    keeps the inspector it has unless clear_unplaced is set.
+
+    Returns the changes, the unplaced visits (as unassigned), the visits
+    left with an inspector outside the roster and every inspector's workload.
+    """
+    durations = durations or VISIT_HOURS
+    schedules = [InspectorSchedule(position, name, inspector_id, capacity)
+                 for position, (name, inspector_id, capacity) in enumerate(roster)]
+    by_id = {schedule.inspector_id: schedule for schedule in schedules if schedule.inspector_id is not None}
+    # Operations without a known inspector_id are matched on a name only one inspector has
+    names = Counter(schedule.name.lower() for schedule in schedules)
+    by_name = {schedule.name.lower(): schedule for schedule in schedules if names[schedule.name.lower()] == 1}
+
+    def current_schedule(operation):
+        if operation.inspector_id is not None and operation.inspector_id in by_id:
+            return by_id[operation.inspector_id]
+        return by_name.get((operation.inspector or '').strip().lower())
+
+    def visit(operation):
+        hours = durations.get(operation.operation_type, DEFAULT_VISIT_HOURS)
+        return operation.operation_date, operation.operation_date + timedelta(hours=hours)
+
+    planned = []
+    fixed = 0
+    # Inspectors at capacity per day; once all are, the day's visits need no search
+    full = Counter()
+    for operation in operations:
+        if operation.status == 'scheduled':
+            planned.append(operation)
+            continue
+        fixed += 1
+        schedule = current_schedule(operation)
+        if schedule is not None and schedule.book(*visit(operation)):
+            full[operation.operation_date.date()] += 1
+    planned.sort(key=lambda operation: (-PRIORITY_WEIGHTS.get(operation.priority, 0)
+                                        - RISK_WEIGHTS.get(operation.risk_level, 0),
+                                        operation.operation_date, operation.id))
+
+    queue = LoadQueue(schedules)
+    changes, unassigned, outside_roster = [], [], []
+    unchanged = 0
+    for operation in planned:
+        start, end = visit(operation)
+        current = current_schedule(operation)
+        assigned = operation.inspector is not None or operation.inspector_id is not None
+        if keep_assignments and current is None and assigned:
+            outside = _describe(operation)
+            outside['inspector'] = operation.inspector
+            outside['inspector_id'] = operation.inspector_id
+            outside_roster.append(outside)
+            continue
+        if keep_assignments and current is not None and current.fits(start, end):
+            chosen = current
+        elif full[start.date()] < len(schedules):
+            chosen = queue.least_loaded_fitting(start, end)
+        else:
+            chosen = None
+        if chosen is not None:
+            if chosen.book(start, end):
+                full[start.date()] += 1
+            queue.updated(chosen)
+            target = (chosen.name, chosen.inspector_id)
+        else:
+            unassigned.append(_describe(operation))
+            if assigned and not clear_unplaced:
+                continue
+            target = (None, None)
+        if target == (operation.inspector, operation.inspector_id):
+            if chosen is not None:
+                unchanged += 1
+        else:
+            change = _describe(operation)
+            change['from'] = {'inspector': operation.inspector, 'inspector_id': operation.inspector_id}
+            change['to'] = {'inspector': target[0], 'inspector_id': target[1]}
+            changes.append(change)
+
+    return {
+        'summary': {
+            'operations': len(planned) + fixed,
+            'planned': len(planned),
+            'fixed': fixed,
+            'unchanged': unchanged,
+            'changed': len(changes),
+            'unassigned': len(unassigned),
+            'outside_roster': len(outside_roster),
+        },
+        'changes': changes,
+        'unassigned': unassigned,
+        'outside_roster': outside_roster,
+        'workload': [{
+            'inspector': schedule.name,
+            'inspector_id': schedule.inspector_id,
+            'capacity': schedule.capacity,
+            'visits': schedule.visits,
+            'hours': round(schedule.hours, 2),
+            'busiest_day_visits': max(schedule.per_day.values(), default=0),
+        } for schedule in schedules],
+    }
+
+def _describe(operation):
+    return {
+        'id': operation.id,
+        'operation_date': operation.operation_date,
+        'operation_type': operation.operation_type,
+        'priority': operation.priority,
+        'risk_level': operation.risk_level,
+    }
@@ -0,0 +1,84 @@
+import re
+
+from sqlalchemy import and_, column, literal_column, or_, select, table
+
+from utils.pagination import RANK_CURSOR, encode_cursor
+
+TOKEN = re.compile(r'\w+', re.UNICODE)
+
+class SearchIndex:
+    """An FTS5 external-content index over some text columns of a table"""
+    
+    def __init__(self, source, columns):
+        self.source = source
+        self.name = f'{source}_fts'
+        self.columns = columns
+        self.table = table(self.name, column('rowid'), column('rank'))
+        self.matches = literal_column(self.name).op('MATCH')
+    
+    def ddl(self):
+        """Statements creating the index and the triggers that keep it in sync"""
+        cols = ', '.join(self.columns)
+        new = ', '.join(f'NEW.{c}' for c in self.columns)
+        old = ', '.join(f'OLD.{c}' for c in self.columns)
+        delete_old = (f"INSERT INTO {self.name}({self.name}, rowid, {cols}) "
+                      f"VALUES ('delete', OLD.id, {old});")
+        insert_new = f"INSERT INTO {self.name}(rowid, {cols}) VALUES (NEW.id, {new});"
+        return [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.name} USING fts5("
+            f"{cols}, content='{self.source}', content_rowid='id', prefix='2 3')",
+            f"CREATE TRIGGER IF NOT EXISTS trg_{self.name}_insert AFTER INSERT ON {self.source} "
+            f"BEGIN {insert_new} END",
+            f"CREATE TRIGGER IF NOT EXISTS trg_{self.name}_delete AFTER DELETE ON {self.source} "
+            f"BEGIN {delete_old} END",
+            f"CREATE TRIGGER IF NOT EXISTS trg_{self.name}_update AFTER UPDATE OF {cols} ON {self.source} "
+            f"BEGIN {delete_old} {insert_new} END",
+        ]
+    
+    def match(self, id_column, expression):
+        """Filter clause keeping source rows that match expression, in any order"""
+        rowids = select(self.table.c.rowid).where(self.matches(expression)).correlate(None)
+        return id_column.in_(rowids)
+
+SEARCH_INDEXES = {
+    'pac_operations': SearchIndex('pac_operations', [
+        'facility_name', 'facility_address', 'inspector', 'notes', 'findings'
+    ]),
+    'workplans': SearchIndex('workplans', ['title', 'description', 'assigned_to']),
+}
+
+def match_expression(text_value, column_name=None):
+    """Turn user input into a safe FTS5 query: every word must match as a prefix.
+
+    Raises ValueError when the input has no searchable words.
+    """
+    tokens = TOKEN.findall(text_value or '')
+    if not tokens:
+        raise ValueError('Search text must contain at least one letter or digit')
+    terms = ' AND '.join(f'"{token}"*' for token in tokens)
+    return f'{column_name} : ({terms})' if column_name else f'({terms})'
+
+def combine_expressions(*expressions):
+    return ' AND '.join(expression for expression in expressions if expression)
+
+def ranked_page(query, model, index, expression, after, limit):
+    """Fetch one page of matches ordered by relevance (bm25), best first.
+
+    query must select plain columns including id; each returned row carries
+    its rank as a trailing search_rank value. Pages are keyed on (rank, id)
+    the same way keyset_page keys on the sort column, so deep pages stay
+    cheap to fetch.
+    """
+    rank = index.table.c.rank
+    query = query.join(index.table, index.table.c.rowid == model.id) \
+        .filter(index.matches(expression))
+    if after is not None:
+        rank_value, row_id = after
+        query = query.filter(or_(rank > rank_value, and_(rank == rank_value, model.id > row_id)))
+
+    rows = query.add_columns(rank.label('search_rank')).order_by(rank, model.id).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(RANK_CURSOR, rows[-1].search_rank, rows[-1].id)
+    return rows, next_cursor
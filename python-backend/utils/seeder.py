@@ -0,0 +1,395 @@
+"""Synthetic data for load testing, generated straight into SQLite.
+
+Rows are built as tuples with explicit ids and written with executemany in
+chunks, with the secondary indexes and triggers of the seeded tables
+dropped for the duration and recreated at the end. The full-text indexes,
+dashboard counters and table versions the triggers would have maintained are
+then rebuilt in one pass each. Everything runs in a single transaction, so
+a failed run leaves the database as it was.
+"""
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+SEEDED_TABLES = ('users', 'workplans', 'workplan_tasks', 'pac_operations', 'pac_samples')
+DEFAULT_CHUNK_SIZE = 20000
+# Every generated user signs in with this password; hashing one per user would take hours
+SEED_PASSWORD = 'seed-password'
+# Operations are spread from a year before today to three months after it
+PAST_DAYS = 365
+FUTURE_DAYS = 90
+# The FTS5 in-memory term buffer while the search indexes are rebuilt. Fewer,
+# larger flushes leave fewer segments to merge; 1MB is the SQLite default
+FTS_HASH_SIZE = 64 * 1024 * 1024
+FTS_DEFAULT_HASH_SIZE = 1024 * 1024
+
+FIRST_NAMES = ('Maria', 'James', 'Aisha', 'Chen', 'Priya', 'Daniel', 'Sofia', 'Omar', 'Grace', 'Luis',
+               'Hannah', 'Kwame', 'Elena', 'Ravi', 'Fatima', 'Noah', 'Yuki', 'Samuel', 'Leila', 'Ivan')
+LAST_NAMES = ('Garcia', 'Smith', 'Nguyen', 'Patel', 'Johnson', 'Kim', 'Okafor', 'Rossi', 'Cohen', 'Silva',
+              'Brown', 'Haddad', 'Novak', 'Martin', 'Singh', 'Lopez', 'Ito', 'Mensah', 'Walker', 'Khan')
+DEPARTMENTS = ('Food Safety', 'Dietary Supplements', 'Field Operations', 'Laboratory Services', 'Compliance')
+DISTRICTS = ('Northeast', 'Southeast', 'Central', 'Southwest', 'Pacific', 'Mountain', 'Great Lakes', 'Gulf')
+PROGRAMS = ('Food Safety Inspection', 'Supplement Compliance', 'Seafood HACCP', 'Produce Safety',
+            'Infant Formula Surveillance', 'Import Sampling', 'Allergen Control', 'Low-Acid Canned Foods')
+FACILITY_WORDS = ('Valley', 'Golden', 'River', 'Summit', 'Harbor', 'Prairie', 'Coastal', 'Evergreen',
+                  'Sunrise', 'Pioneer', 'Heritage', 'Lakeside', 'Redwood', 'Maple', 'Silver', 'Northern')
+FACILITY_KINDS = ('Foods', 'Dairy', 'Bakery', 'Seafood', 'Produce', 'Nutrition', 'Farms', 'Packing Co.',
+                  'Beverages', 'Meats', 'Supplements', 'Canning')
+STREETS = ('Main St', 'Industrial Pkwy', 'Commerce Dr', 'Harbor Rd', 'Mill Ave', 'Market St')
+CITIES = (('Albany', 'NY'), ('Atlanta', 'GA'), ('Chicago', 'IL'), ('Dallas', 'TX'), ('Denver', 'CO'),
+          ('Fresno', 'CA'), ('Portland', 'OR'), ('Omaha', 'NE'), ('Tampa', 'FL'), ('Detroit', 'MI'))
+
+ROLES = (('inspector', 60), ('analyst', 30), ('manager', 9), ('admin', 1))
+PRIORITIES = (('low', 25), ('medium', 50), ('high', 20), ('critical', 5))
+OPERATION_TYPES = (('inspection', 50), ('sampling', 30), ('audit', 15), ('investigation', 5))
+RISK_LEVELS = (('low', 40), ('medium', 35), ('high', 20), ('critical', 5))
+COMPLETED_COMPLIANCE = (('compliant', 75), ('requires_followup', 15), ('non_compliant', 10))
+SAMPLE_TYPES = (('product', 50), ('environmental', 25), ('water', 10), ('swab', 15))
+TEST_TYPES = ('microbiological', 'chemical', 'physical')
+FINDINGS = ('No objectionable conditions observed', 'Minor labeling deviations noted',
+            'Sanitation deficiencies in processing area', 'Temperature records incomplete',
+            'Corrective actions from previous visit verified')
+TASK_TITLES = ('Schedule facility visits', 'Review prior inspection reports', 'Collect product samples',
+               'Verify corrective actions', 'Prepare establishment inspection report',
+               'Coordinate with state partners', 'Review import entries', 'Close out findings')
+
+COLUMNS = {
+    'users': ('id', 'username', 'email', 'password_hash', 'full_name', 'role', 'department',
+              'is_active', 'created_at', 'last_login'),
+    'workplans': ('id', 'title', 'description', 'status', 'priority', 'start_date', 'end_date',
+                  'assigned_to', 'progress', 'created_at', 'updated_at', 'created_by'),
+    'workplan_tasks': ('id', 'workplan_id', 'title', 'status', 'priority', 'due_date', 'assigned_to',
+                       'progress', 'created_at', 'completed_at'),
+    'pac_operations': ('id', 'operation_type', 'facility_name', 'facility_id', 'facility_address',
+                       'operation_date', 'status', 'priority', 'inspector', 'inspector_id', 'findings',
+                       'risk_level', 'compliance_status', 'created_at', 'updated_at', 'completed_at',
+                       # The sample rollups, in the order of rollup_columns('pac_samples')
+                       'sample_count', 'samples_collected', 'samples_in_transit', 'samples_testing',
+                       'samples_completed'),
+    'pac_samples': ('id', 'operation_id', 'sample_type', 'sample_description', 'collection_date',
+                    'test_type', 'status', 'results', 'lab_id', 'created_at'),
+}
+
+def _pool(weighted):
+    """Expand (value, percent) pairs into a list that uniform picks sample by weight"""
+    return [value for value, weight in weighted for _ in range(weight)]
+
+def _timestamp(moment):
+    # The storage format SQLAlchemy uses for DateTime columns on SQLite
+    return moment.strftime('%Y-%m-%d %H:%M:%S.%f')
+
+class Seeder:
+    """Generates users, workplans, tasks, operations and samples into one database.
+    
+    The distributions follow the real data: operations fall on weekday
+    working hours, are completed in the past and scheduled in the future,
+    and a few inspectors and facilities carry most of the visits. Passing a
+    seed makes the dataset reproducible.
+    """
+    
+    def __init__(self, engine, seed=None, chunk_size=DEFAULT_CHUNK_SIZE, today=None, log=print):
+        self.engine = engine
+        self.rng = random.Random(seed)
+        self.chunk_size = chunk_size
+        self.now = datetime.combine(today, datetime.min.time()).replace(hour=12) if today else datetime.now()
+        self.today = self.now.date()
+        self.log = log
+    
+    def run(self, users=0, workplans=0, tasks_per_workplan=5, operations=0, samples_per_operation=2):
+        """Generate the rows and return how many were inserted per table"""
+        from models.dashboard_counter import rebuild_dashboard_counters
+        from models.rollups import reconcile_rollups
+        from models.table_version import VERSIONED_TABLES
+        from utils.search import SEARCH_INDEXES
+        
+        counts = {}
+        started = time.perf_counter()
+        with self.engine.connect() as connection:
+            # The safety level cannot change inside a transaction, so it is set on
+            # the driver connection before SQLAlchemy begins one
+            driver = connection.connection.driver_connection
+            synchronous = driver.execute('PRAGMA synchronous').fetchone()[0]
+            # The run is one transaction; losing it to a power cut only loses the seed
+            driver.execute('PRAGMA synchronous = OFF')
+            try:
+                with connection.begin():
+                    # The version triggers are deferred with the others, so bump each table's version
+                    # by hand, or ETags issued before the seed would still match afterwards
+                    for table in VERSIONED_TABLES:
+                        connection.execute(text(
+                            'INSERT INTO table_versions (table_name, version) VALUES (:table, 1) '
+                            'ON CONFLICT (table_name) DO UPDATE SET version = version + 1'
+                        ), {'table': table})
+                    deferred = self._drop_deferred(connection)
+                    self.log(f'Deferred {len(deferred)} indexes and triggers')
+                    
+                    counts['users'] = self._insert_users(connection, users)
+                    counts['workplans'], counts['workplan_tasks'] = self._insert_workplans(
+                        connection, workplans, tasks_per_workplan)
+                    counts['pac_operations'], counts['pac_samples'] = self._insert_operations(
+                        connection, operations, samples_per_operation)
+                    
+                    self.log(f'Inserted rows in {time.perf_counter() - started:.1f}s; '
+                             f'rebuilding indexes, search indexes, counters and rollups')
+                    for statement in deferred:
+                        connection.exec_driver_sql(statement)
+                    for index in SEARCH_INDEXES.values():
+                        self._rebuild_search_index(connection, index.name)
+                    rebuild_dashboard_counters(connection)
+                    # Operations are written with their sample rollups; only the task rollups need a recount
+                    reconcile_rollups(connection, ['workplan_tasks'])
+                    connection.exec_driver_sql('ANALYZE')
+            finally:
+                driver.execute(f'PRAGMA synchronous = {int(synchronous)}')
+        self.log(f'Seeded {sum(counts.values())} rows in {time.perf_counter() - started:.1f}s')
+        return counts
+    
+    def _drop_deferred(self, connection):
+        """Drop the secondary indexes and triggers of the seeded tables, returning their DDL"""
+        placeholders = ', '.join('?' for _ in SEEDED_TABLES)
+        rows = connection.exec_driver_sql(
+            f"SELECT type, name, sql FROM sqlite_master WHERE type IN ('index', 'trigger') "
+            f"AND tbl_name IN ({placeholders}) AND sql IS NOT NULL ORDER BY type, name",
+            SEEDED_TABLES
+        ).all()
+        for kind, name, _ in rows:
+            connection.exec_driver_sql(f'DROP {kind.upper()} "{name}"')
+        return [sql for _, _, sql in rows]
+    
+    def _rebuild_search_index(self, connection, name):
+        # hashsize is stored with the index, so the default is put back afterwards
+        connection.exec_driver_sql(f"INSERT INTO {name}({name}, rank) VALUES ('hashsize', {FTS_HASH_SIZE})")
+        connection.exec_driver_sql(f"INSERT INTO {name}({name}) VALUES ('rebuild')")
+        connection.exec_driver_sql(f"INSERT INTO {name}({name}, rank) VALUES ('hashsize', {FTS_DEFAULT_HASH_SIZE})")
+    
+    def _insert(self, connection, table, rows):
+        """executemany a list of tuples in the order of COLUMNS[table]"""
+        if rows:
+            columns = COLUMNS[table]
+            connection.exec_driver_sql(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+                rows
+            )
+        return len(rows)
+    
+    def _next_id(self, connection, table):
+        return connection.exec_driver_sql(f'SELECT COALESCE(MAX(id), 0) + 1 FROM {table}').scalar()
+    
+    def _past(self, days):
+        """A timestamp up to days before now"""
+        return _timestamp(self.now - timedelta(seconds=self.rng.randrange(max(1, days * 86400))))
+    
+    def _insert_users(self, connection, count):
+        from werkzeug.security import generate_password_hash
+        
+        rng = self.rng
+        password_hash = generate_password_hash(SEED_PASSWORD)
+        roles = _pool(ROLES)
+        first_id = self._next_id(connection, 'users')
+        rows = []
+        for user_id in range(first_id, first_id + count):
+            rows.append((
+                user_id, f'user{user_id}', f'user{user_id}@fwfps.example', password_hash,
+                f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}', rng.choice(roles),
+                rng.choice(DEPARTMENTS), rng.random() < 0.97, self._past(3 * 365),
+                self._past(30) if rng.random() < 0.8 else None
+            ))
+            if len(rows) >= self.chunk_size:
+                self._insert(connection, 'users', rows)
+                rows = []
+        self._insert(connection, 'users', rows)
+        return count
+    
+    def _inspectors(self, connection):
+        """(id, name) of the inspectors operations are assigned to, and their workload weights"""
+        inspectors = connection.exec_driver_sql(
+            "SELECT id, full_name FROM users WHERE role = 'inspector' AND is_active ORDER BY id LIMIT 5000"
+        ).all()
+        if not inspectors:
+            inspectors = [(None, f'{first} {last}') for first in FIRST_NAMES for last in LAST_NAMES[:5]]
+        # Workload falls off with rank, so some inspectors carry far more visits
+        weights = [1 / (rank + 1) ** 0.5 for rank in range(len(inspectors))]
+        return [tuple(inspector) for inspector in inspectors], weights
+    
+    def _insert_workplans(self, connection, count, tasks_per_workplan):
+        rng = self.rng
+        today = self.today
+        priorities = _pool(PRIORITIES)
+        task_priorities = ('low', 'medium', 'medium', 'high')
+        creators = [row[0] for row in connection.exec_driver_sql(
+            "SELECT id FROM users WHERE role IN ('manager', 'admin') LIMIT 5000").all()] or [None]
+        inspectors, _ = self._inspectors(connection)
+        workplan_id = self._next_id(connection, 'workplans')
+        task_id = first_task_id = self._next_id(connection, 'workplan_tasks')
+        workplans, tasks = [], []
+        for _ in range(count):
+            start = today + timedelta(days=rng.randint(-PAST_DAYS, FUTURE_DAYS))
+            length = rng.randint(30, 180)
+            end = start + timedelta(days=length)
+            if end < today:
+                status = 'completed' if rng.random() < 0.85 else 'cancelled'
+            elif start > today:
+                status = 'planned'
+            else:
+                status = 'active'
+            if status == 'active':
+                elapsed = (today - start).days / length
+                progress = max(0, min(99, int(elapsed * 100 + rng.randint(-15, 15))))
+            elif status == 'cancelled':
+                progress = rng.randint(0, 60)
+            else:
+                progress = 100 if status == 'completed' else 0
+            created = datetime.combine(start - timedelta(days=rng.randint(7, 45)), datetime.min.time())
+            created = _timestamp(created.replace(hour=9)) if created.date() < today else self._past(30)
+            district = rng.choice(DISTRICTS)
+            program = rng.choice(PROGRAMS)
+            workplans.append((
+                workplan_id, f'Q{(start.month - 1) // 3 + 1} {start.year} {program} - {district}',
+                f'{program} activities for the {district} district', status, rng.choice(priorities),
+                start.isoformat(), end.isoformat(), f'{district} Team {rng.randint(1, 4)}', progress,
+                created, created, rng.choice(creators)
+            ))
+            
+            for _ in range(rng.randint(0, 2 * tasks_per_workplan)):
+                due = start + timedelta(days=rng.randint(0, length))
+                if status in ('completed', 'planned'):
+                    task_status = 'completed' if status == 'completed' else 'pending'
+                elif status == 'cancelled':
+                    task_status = 'cancelled' if rng.random() < 0.7 else 'completed'
+                elif due < today:
+                    task_status = 'completed' if rng.random() < 0.8 else 'in_progress'
+                else:
+                    task_status = 'in_progress' if rng.random() < 0.3 else 'pending'
+                if task_status == 'completed':
+                    completed_at = f'{min(due, today - timedelta(days=1)).isoformat()} 16:00:00.000000'
+                    task_progress = 100
+                else:
+                    completed_at = None
+                    task_progress = rng.randint(10, 90) if task_status == 'in_progress' else 0
+                tasks.append((
+                    task_id, workplan_id, rng.choice(TASK_TITLES), task_status, rng.choice(task_priorities),
+                    due.isoformat(), rng.choice(inspectors)[1], task_progress, created, completed_at
+                ))
+                task_id += 1
+            
+            workplan_id += 1
+            if len(workplans) >= self.chunk_size or len(tasks) >= self.chunk_size:
+                self._insert(connection, 'workplans', workplans)
+                self._insert(connection, 'workplan_tasks', tasks)
+                workplans, tasks = [], []
+        self._insert(connection, 'workplans', workplans)
+        self._insert(connection, 'workplan_tasks', tasks)
+        return count, task_id - first_task_id
+    
+    def _insert_operations(self, connection, count, samples_per_operation):
+        rng = self.rng
+        random_value = rng.random
+        today = self.today
+        
+        # Visits fall on weekday working hours across the operation window.
+        # Timestamps are formatted once per day and slot, not once per row
+        first_day = today - timedelta(days=PAST_DAYS)
+        days = [first_day + timedelta(days=offset) for offset in range(-60, PAST_DAYS + FUTURE_DAYS + 1)]
+        day_stamps = [day.isoformat() for day in days]
+        today_index = days.index(today)
+        slots = [(index, f'{hour:02d}:{minute:02d}:00.000000')
+                 for index, day in enumerate(days) if day >= first_day and day.weekday() < 5
+                 for hour in range(7, 17) for minute in (0, 30)]
+        slot_stamps = [f'{day_stamps[index]} {clock}' for index, clock in slots]
+        # Bookings are made in office hours and visits closed out in the evening,
+        # both on a quarter hour: 40 and 16 stamps per day
+        office_stamps = [f'{stamp} {hour:02d}:{minute:02d}:00.000000' for stamp in day_stamps
+                         for hour in range(8, 18) for minute in (0, 15, 30, 45)]
+        closing_stamps = [f'{stamp} {hour:02d}:{minute:02d}:00.000000' for stamp in day_stamps
+                          for hour in range(17, 21) for minute in (0, 15, 30, 45)]
+        
+        types = _pool(OPERATION_TYPES)
+        priorities = _pool(PRIORITIES)
+        risks = _pool(RISK_LEVELS)
+        compliance = _pool(COMPLETED_COMPLIANCE)
+        sample_types = _pool(SAMPLE_TYPES)
+        # Sample status follows the operation's, as (status, results, position in the rollups)
+        sample_statuses = {
+            'completed': _pool(((('completed', 'Within limits', 3), 80), (('testing', None, 2), 15),
+                                (('in_transit', None, 1), 5))),
+            'in_progress': _pool(((('collected', None, 0), 50), (('in_transit', None, 1), 30),
+                                  (('testing', None, 2), 20))),
+        }
+        no_samples = (0, 0, 0, 0, 0)
+        lab_ids = [f'LAB-{lab:02d}' for lab in range(1, 13)]
+        inspectors, inspector_weights = self._inspectors(connection)
+        # About one facility per twenty visits, a few of them visited far more often
+        facility_count = max(1, count // 20)
+        facility_weights = [1 / (rank + 1) ** 0.6 for rank in range(facility_count)]
+        facilities = [(
+            f'{FACILITY_WORDS[n % 16]} {FACILITY_KINDS[n // 16 % 12]} #{n}',
+            f'FEI-{n:07d}',
+            f'{100 + n % 9900} {STREETS[n % 6]}, {CITIES[n % 10][0]}, {CITIES[n % 10][1]}'
+        ) for n in range(facility_count)]
+        sample_descriptions = {sample_type: f'{sample_type.capitalize()} sample' for sample_type in sample_types}
+        
+        operation_id = first_operation_id = self._next_id(connection, 'pac_operations')
+        sample_id = first_sample_id = self._next_id(connection, 'pac_samples')
+        samples = []
+        while operation_id < first_operation_id + count:
+            n = min(self.chunk_size, first_operation_id + count - operation_id)
+            operations = []
+            # Draw the weighted columns for the whole chunk at once
+            for slot, inspector, facility in zip(rng.choices(range(len(slots)), k=n),
+                                                 rng.choices(inspectors, inspector_weights, k=n),
+                                                 rng.choices(facilities, facility_weights, k=n)):
+                day_index, clock = slots[slot]
+                visit = slot_stamps[slot]
+                days_out = day_index - today_index
+                roll = random_value()
+                if days_out > 0:
+                    status = 'scheduled' if roll < 0.95 else 'cancelled'
+                elif days_out == 0:
+                    status = 'in_progress' if roll < 0.5 else 'scheduled'
+                elif days_out > -14:
+                    status = 'in_progress' if roll < 0.4 else 'completed' if roll < 0.95 else 'cancelled'
+                else:
+                    status = 'completed' if roll < 0.93 else 'cancelled' if roll < 0.97 else 'in_progress'
+                # Booked one to eight weeks ahead, and never later than yesterday
+                created_index = min(day_index - 7 - int(random_value() * 50), today_index - 1)
+                created = office_stamps[created_index * 40 + int(random_value() * 40)]
+                if status == 'completed':
+                    completed_at = closing_stamps[day_index * 16 + int(random_value() * 16)]
+                    findings = FINDINGS[int(random_value() * 5)]
+                    compliance_status = compliance[int(random_value() * 100)]
+                else:
+                    completed_at = findings = None
+                    compliance_status = 'pending'
+                operation = (
+                    operation_id, types[int(random_value() * 100)], facility[0], facility[1], facility[2],
+                    visit, status, priorities[int(random_value() * 100)], inspector[1], inspector[0],
+                    findings, risks[int(random_value() * 100)], compliance_status, created,
+                    completed_at or created, completed_at
+                )
+                
+                pool = sample_statuses.get(status)
+                if pool is None:
+                    operations.append(operation + no_samples)
+                else:
+                    # Count the samples by status as they are made, so the triggers' rollups need no recount
+                    tally = [0, 0, 0, 0]
+                    for _ in range(int(random_value() * (2 * samples_per_operation + 1))):
+                        sample_status, results, position = pool[int(random_value() * 100)]
+                        tally[position] += 1
+                        sample_type = sample_types[int(random_value() * 100)]
+                        samples.append((
+                            sample_id, operation_id, sample_type, sample_descriptions[sample_type], visit,
+                            TEST_TYPES[sample_id % 3], sample_status, results, lab_ids[sample_id % 12], visit
+                        ))
+                        sample_id += 1
+                    operations.append(operation + (sum(tally), *tally))
+                operation_id += 1
+            
+            self._insert(connection, 'pac_operations', operations)
+            if len(samples) >= self.chunk_size:
+                self._insert(connection, 'pac_samples', samples)
+                samples = []
+        self._insert(connection, 'pac_samples', samples)
+        return count, sample_id - first_sample_id
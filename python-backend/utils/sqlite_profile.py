@@ -0,0 +1,104 @@
+from sqlalchemy import event
+
+# PRAGMAs applied to every new SQLite connection, in order. busy_timeout goes
+# first so the journal_mode switch itself waits out a concurrent writer.
+SQLITE_PROFILES = {
+    # WAL lets readers run alongside the single writer; NORMAL skips the
+    # fsync on every commit (a power loss can drop the last commits, never
+    # corrupt the file); mmap and a larger page cache cut read syscalls
+    'production': {
+        'busy_timeout': 5000,
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64000,
+        'temp_store': 'MEMORY',
+    },
+    # As production, but fsync on every commit
+    'durable': {
+        'busy_timeout': 5000,
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64000,
+        'temp_store': 'MEMORY',
+    },
+    # SQLite's own defaults (rollback journal), kept for comparison
+    'off': {},
+}
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_OVERFLOW = 20
+DEFAULT_POOL_TIMEOUT = 30
+
+def is_sqlite_file(uri):
+    return uri.startswith('sqlite') and ':memory:' not in uri and uri.rstrip('/') != 'sqlite:'
+
+def sqlite_profile(name):
+    """The PRAGMAs of a named profile; raises ValueError for unknown names"""
+    if name not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown SQLite profile '{name}', expected one of {', '.join(SQLITE_PROFILES)}")
+    return SQLITE_PROFILES[name]
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS for a file database under the configured profile.
+
+    With SQLITE_READ_ROUTING the engine is the single writer: one connection,
+    so concurrent writers queue in the pool rather than on SQLite's lock. A
+    request must therefore not hold it while waiting on the group-commit
+    thread; run_write releases the request's session before queueing.
+    """
+    pragmas = sqlite_profile(config.get('SQLITE_PROFILE', 'production'))
+    if config.get('SQLITE_READ_ROUTING'):
+        options = {'pool_size': 1, 'max_overflow': 0}
+    else:
+        options = {
+            'pool_size': config.get('SQLITE_POOL_SIZE', DEFAULT_POOL_SIZE),
+            'max_overflow': config.get('SQLITE_MAX_OVERFLOW', DEFAULT_MAX_OVERFLOW),
+        }
+    options['pool_timeout'] = config.get('SQLITE_POOL_TIMEOUT', DEFAULT_POOL_TIMEOUT)
+    if 'busy_timeout' in pragmas:
+        # The driver's own lock wait, used while it opens the connection
+        options['connect_args'] = {'timeout': pragmas['busy_timeout'] / 1000}
+    options.update(config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    return options
+
+def install_pragmas(engine, pragmas):
+    """Apply pragmas to every connection the engine opens from now on"""
+    if not pragmas or engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+def install_transactions(engine):
+    """Have SQLAlchemy, not the driver, begin the transactions of the engine's connections.
+
+    pysqlite in its default mode sends BEGIN only before INSERT, UPDATE and
+    DELETE, so a SAVEPOINT opened first is the outermost transaction and
+    releasing it commits, and DDL is never transactional. With the driver's
+    handling off and an explicit BEGIN whenever SQLAlchemy starts a
+    transaction, savepoints nest inside it and only COMMIT makes it durable.
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _driver_autocommit(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, 'begin')
+    def _begin(connection):
+        # On the driver connection, so BEGIN is not counted as a query of the request
+        connection.connection.driver_connection.execute('BEGIN')
+
+def connection_pragmas(connection, names=None):
+    """Current values of the profile's PRAGMAs on a connection, for checks and diagnostics"""
+    names = names or SQLITE_PROFILES['production'].keys()
+    return {name: connection.exec_driver_sql(f'PRAGMA {name}').scalar() for name in names}
@@ -0,0 +1,137 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from flask import current_app
+
+DEFAULT_WINDOW = 0.002
+DEFAULT_MAX_BATCH = 64
+
+class NotFound(Exception):
+    """Raised by a write when the row it targets does not exist"""
+
+class WriteQueue:
+    """Group commit for mutating routes.
+
+    Writes are functions taking the session. One background thread runs the
+    writes that arrive within GROUP_COMMIT_WINDOW seconds of each other (up
+    to GROUP_COMMIT_MAX_BATCH) in a single transaction, each in its own
+    SAVEPOINT, and commits once. A failing write rolls back only its
+    savepoint and gets its own exception; the others in the group still
+    commit. Callers are answered only after the commit, so a result is never
+    returned for a write that was not made durable.
+    """
+    
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.groups = 0
+        self.writes = 0
+    
+    def submit(self, work):
+        """Queue work(session) and wait for its result once its group commits"""
+        if self._thread is None:
+            self._start(current_app._get_current_object())
+        future = Future()
+        self._queue.put((work, future))
+        return future.result()
+    
+    def stats(self):
+        return {
+            'groups': self.groups,
+            'writes': self.writes,
+            'mean_group_size': round(self.writes / self.groups, 2) if self.groups else 0.0
+        }
+    
+    def _start(self, app):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, args=(app,), name='group-commit', daemon=True)
+                self._thread.start()
+    
+    def _collect(self, window, max_batch):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + window
+        while len(batch) < max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+    
+    def _run(self, app):
+        window = app.config.get('GROUP_COMMIT_WINDOW', DEFAULT_WINDOW)
+        max_batch = app.config.get('GROUP_COMMIT_MAX_BATCH', DEFAULT_MAX_BATCH)
+        while True:
+            batch = self._collect(window, max_batch)
+            with app.app_context():
+                try:
+                    outcomes = self._commit_group(batch)
+                except Exception as e:
+                    app.logger.exception('Group commit of %d writes failed', len(batch))
+                    outcomes = [(future, False, e) for _, future in batch]
+            for future, ok, value in outcomes:
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+    
+    def _commit_group(self, batch):
+        """Run every write of the batch in its own savepoint, then commit once"""
+        from models import db
+        
+        session = db.session
+        outcomes = []
+        try:
+            for work, future in batch:
+                try:
+                    with session.begin_nested():
+                        result = work(session)
+                except Exception as e:
+                    outcomes.append((future, False, e))
+                else:
+                    outcomes.append((future, True, result))
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            db.session.remove()
+        self.groups += 1
+        self.writes += len(batch)
+        return outcomes
+
+write_queue = WriteQueue()
+
+def run_write(work):
+    """Run work(session) and commit it, returning what work returned.
+
+    With GROUP_COMMIT enabled the write joins the next group commit on the
+    writer thread; otherwise it runs on the request's session and commits
+    on its own. work should flush before building its result so that
+    generated ids and defaults are filled in.
+
+    Before queueing, the request's session is closed: with read routing the
+    writer engine has a single connection, which the writer thread needs
+    while the request waits. Reads made before run_write are fine (their
+    objects are detached), but changes made on the request's session
+    instead of in work are an error rather than being lost.
+    """
+    from models import db
+
+    if current_app.config.get('GROUP_COMMIT'):
+        session = db.session
+        if session.new or session.dirty or session.deleted:
+            raise RuntimeError('Make changes inside the function passed to run_write, not on the request session')
+        session.close()
+        return write_queue.submit(work)
+    try:
+        result = work(db.session)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return result